@@ -1,6 +1,12 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
-from .models import User, PatientProfile
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from .forms import PatientImportForm
+from .models import User, PatientProfile, MRNSequence
+from .onboarding import PatientImporter, iter_records, detect_format, write_error_report
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -18,10 +24,56 @@ class CustomUserAdmin(UserAdmin):
                       'emergency_phone')
         }),
     )
+    change_list_template = 'admin/accounts/user/change_list.html'
+    
+    def get_urls(self):
+        urls = [
+            path('import-patients/', self.admin_site.admin_view(self.import_patients_view), name='accounts_user_import_patients'),
+        ]
+        return urls + super().get_urls()
+    
+    def import_patients_view(self, request):
+        """Upload a patient roster; rejected rows come back as a CSV error report"""
+        if not self.has_add_permission(request):
+            messages.error(request, "You do not have permission to import patients.")
+            return redirect('admin:accounts_user_changelist')
+        
+        form = PatientImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            # Hash in-process: web workers should not fork process pools
+            importer = PatientImporter(send_invites=form.cleaned_data['send_invites'])
+            try:
+                result = importer.run(iter_records(upload, detect_format(upload.name)))
+            except ValueError as e:
+                messages.error(request, f"Could not parse {upload.name}: {e}. No patients were created.")
+                return redirect('admin:accounts_user_import_patients')
+            
+            if result['errors']:
+                messages.warning(request, f"Created {result['created']} patients; {len(result['errors'])} rows were rejected")
+                response = HttpResponse(content_type='text/csv')
+                response['Content-Disposition'] = 'attachment; filename="patient_import_errors.csv"'
+                write_error_report(result['errors'], response)
+                return response
+            messages.success(request, f"Created {result['created']} patients")
+            return redirect('admin:accounts_user_changelist')
+        
+        context = dict(
+            self.admin_site.each_context(request),
+            title='Import patients',
+            form=form,
+            opts=self.model._meta,
+        )
+        return TemplateResponse(request, 'admin/accounts/user/import_patients.html', context)
 
 @admin.register(PatientProfile)
 class PatientProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'attending_physician', 'admission_date', 'is_active')
     list_filter = ('is_active', 'admission_date', 'discharge_date')
     search_fields = ('user__username', 'user__first_name', 'user__last_name', 'attending_physician')
-    raw_id_fields = ('user',)
\ No newline at end of file
+    raw_id_fields = ('user',)
+
+@admin.register(MRNSequence)
+class MRNSequenceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'next_value')
+    readonly_fields = ('next_value',)
@@ -57,4 +57,26 @@ class CustomLoginForm(AuthenticationForm):
             raise forms.ValidationError(
                 "This account is inactive.",
                 code='inactive',
-            )
\ No newline at end of file
+            )
+class PatientImportRowForm(forms.Form):
+    """Validates one row of a bulk patient import file"""
+    username = forms.CharField(max_length=150)
+    first_name = forms.CharField(max_length=150)
+    last_name = forms.CharField(max_length=150)
+    email = forms.EmailField(required=False)
+    phone_number = forms.CharField(max_length=17, required=False, validators=[User.phone_regex])
+    date_of_birth = forms.DateField(required=False)
+    emergency_contact = forms.CharField(max_length=100, required=False)
+    emergency_phone = forms.CharField(max_length=17, required=False, validators=[User.phone_regex])
+    password = forms.CharField(required=False, strip=False)
+    allergies = forms.CharField(required=False)
+    medical_conditions = forms.CharField(required=False)
+    insurance_number = forms.CharField(max_length=50, required=False)
+    attending_physician = forms.CharField(max_length=100, required=False)
+
+class PatientImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV with a header row, or a JSON array / NDJSON of objects")
+    send_invites = forms.BooleanField(
+        required=False, initial=True,
+        help_text="Create accounts without a usable password; ignores any password column"
+    )
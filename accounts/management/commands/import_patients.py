@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+from accounts.onboarding import PatientImporter, iter_records, detect_format, write_error_report
+import os
+import sys
+
+class Command(BaseCommand):
+    help = 'Bulk-import patients (with profiles) from a CSV, JSON or NDJSON roster'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Roster file; CSV needs a header row with at least username, first_name, last_name',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'json', 'ndjson'],
+            help='Input format, detected from the file extension by default',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Users created per bulk insert',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processes used to hash passwords (0 hashes in this process)',
+        )
+        parser.add_argument(
+            '--invite',
+            action='store_true',
+            help='Create accounts with unusable passwords (patients set one via password reset)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file and report errors without creating accounts',
+        )
+        parser.add_argument(
+            '--errors',
+            help='Write rejected rows to this CSV file instead of stdout',
+        )
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['path']):
+            raise CommandError(f"File '{options['path']}' does not exist")
+
+        importer = PatientImporter(
+            batch_size=options['batch_size'],
+            hash_workers=options['workers'],
+            send_invites=options['invite'],
+        )
+        fmt = options['format'] or detect_format(options['path'])
+        with open(options['path'], 'rb') as roster:
+            try:
+                result = importer.run(iter_records(roster, fmt), dry_run=options['dry_run'])
+            except ValueError as e:
+                raise CommandError(f"Could not parse {options['path']}: {e}")
+
+        if result['errors']:
+            if options['errors']:
+                with open(options['errors'], 'w', newline='') as report:
+                    write_error_report(result['errors'], report)
+            else:
+                write_error_report(result['errors'], sys.stdout)
+
+        verb = 'Validated' if options['dry_run'] else 'Created'
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {result['created']} patients, rejected {len(result['errors'])} rows")
+        )
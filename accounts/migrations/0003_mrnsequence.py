@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_user_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MRNSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(default='patient', max_length=50, unique=True)),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+            ],
+        ),
+    ]
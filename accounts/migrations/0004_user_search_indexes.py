@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:46
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_mrnsequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('last_name'), name='accounts_user_last_name_ci'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('first_name'), name='accounts_user_first_name_ci'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='accounts_user_username_ci'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['phone_number'], name='accounts_user_phone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='accounts_user_name_order'),
+        ),
+    ]
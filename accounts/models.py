@@ -1,7 +1,31 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.core.validators import RegexValidator
 
+class MRNSequence(models.Model):
+    """Monotonic counter medical record numbers are allocated from, in blocks"""
+    name = models.CharField(max_length=50, unique=True, default='patient')
+    next_value = models.PositiveBigIntegerField(default=1)
+    
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+    
+    @classmethod
+    def allocate(cls, count=1, name='patient'):
+        """Reserve `count` consecutive MRNs and return them; one row update per block"""
+        with transaction.atomic():
+            # Write before reading: SQLite ignores SELECT ... FOR UPDATE, and a
+            # transaction that reads first fails with "database is locked" when
+            # a concurrent import holds the write lock, where a first write waits for it.
+            if not cls.objects.filter(name=name).update(next_value=F('next_value') + count):
+                cls.objects.get_or_create(name=name)
+                cls.objects.filter(name=name).update(next_value=F('next_value') + count)
+            start = cls.objects.values_list('next_value', flat=True).get(name=name) - count
+        # Nine digits never collide with the legacy eight-character uuid-based numbers
+        return [f"MRN{value:09d}" for value in range(start, start + count)]
+
 class User(AbstractUser):
     USER_TYPE_CHOICES = [
         ('patient', 'Patient'),  # Active users (sick people)
@@ -24,9 +48,8 @@ class User(AbstractUser):
     
     def save(self, *args, **kwargs):
         if not self.medical_record_number and self.user_type == 'patient':
-            # Generate unique medical record number
-            import uuid
-            self.medical_record_number = f"MRN{str(uuid.uuid4())[:8].upper()}"
+            # Allocate the next medical record number from the sequence
+            self.medical_record_number = MRNSequence.allocate(1)[0]
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -51,6 +74,16 @@ class User(AbstractUser):
     @property
     def can_manage_staff(self):
         return self.is_hospital_it
+    
+    class Meta(AbstractUser.Meta):
+        # Expression indexes serve the case-insensitive prefix ranges in accounts.search
+        indexes = [
+            models.Index(Lower('last_name'), name='accounts_user_last_name_ci'),
+            models.Index(Lower('first_name'), name='accounts_user_first_name_ci'),
+            models.Index(Lower('username'), name='accounts_user_username_ci'),
+            models.Index(fields=['phone_number'], name='accounts_user_phone_idx'),
+            models.Index(fields=['last_name', 'first_name', 'id'], name='accounts_user_name_order'),
+        ]
 
 class PatientProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='patient_profile')
@@ -0,0 +1,220 @@
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+import codecs
+import csv
+import json
+import logging
+
+from reports.counters import dashboard_counters
+from .forms import PatientImportRowForm
+from .models import User, PatientProfile, MRNSequence
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FIELDS = ['allergies', 'medical_conditions', 'insurance_number', 'attending_physician']
+USER_FIELDS = [
+    'username', 'first_name', 'last_name', 'email', 'phone_number',
+    'date_of_birth', 'emergency_contact', 'emergency_phone',
+]
+
+
+class InvalidRecord(ValueError):
+    """A row that cannot be read; reported against its line instead of ending the import"""
+
+
+def decode_lines(stream, encoding, invalid):
+    """Decode a binary stream a line at a time. Lines that are not valid
+    `encoding` are decoded with replacement characters and their numbers
+    added to `invalid`."""
+    for number, line in enumerate(stream, start=1):
+        try:
+            yield line.decode(encoding)
+        except UnicodeDecodeError:
+            invalid.add(number)
+            yield line.decode(encoding, errors='replace')
+
+
+def iter_records(stream, fmt):
+    """Yield (line number, dict) from a binary CSV, JSON array or NDJSON stream.
+
+    Rows that cannot be read are yielded as InvalidRecord so they join the
+    per-row error report. A file that cannot be parsed at all raises
+    ValueError before the first row, so no batch has been created yet.
+    """
+    invalid = set()
+    if fmt == 'csv':
+        reader = csv.DictReader(decode_lines(stream, 'utf-8-sig', invalid))
+        try:
+            reader.fieldnames
+        except csv.Error as e:
+            raise ValueError(f"Header row: {e}")
+        if invalid:
+            raise ValueError("Header row is not valid UTF-8")
+        previous = reader.line_num
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                yield reader.line_num, InvalidRecord(str(e))
+            else:
+                # A quoted field may span lines
+                if invalid.intersection(range(previous + 1, reader.line_num + 1)):
+                    yield reader.line_num, InvalidRecord("Not valid UTF-8")
+                else:
+                    yield reader.line_num, row
+            previous = reader.line_num
+    elif fmt == 'ndjson':
+        first = True
+        for number, line in enumerate(decode_lines(stream, 'utf-8', invalid), start=1):
+            if not line.strip():
+                continue
+            try:
+                if number in invalid:
+                    raise InvalidRecord("Not valid UTF-8")
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise InvalidRecord("Expected a JSON object")
+            except ValueError as e:
+                if first:
+                    raise ValueError(f"Line {number} is not a JSON object: {e}")
+                record = e if isinstance(e, InvalidRecord) else InvalidRecord(f"Not valid JSON: {e}")
+            first = False
+            yield number, record
+    elif fmt == 'json':
+        rows = json.load(codecs.getreader('utf-8')(stream))
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of objects")
+        for number, row in enumerate(rows, start=1):
+            yield number, row if isinstance(row, dict) else InvalidRecord("Expected a JSON object")
+    else:
+        raise ValueError(f"Unknown import format '{fmt}'")
+
+
+def detect_format(filename):
+    name = filename.lower()
+    if name.endswith('.ndjson') or name.endswith('.jsonl'):
+        return 'ndjson'
+    if name.endswith('.json'):
+        return 'json'
+    return 'csv'
+
+
+class PatientImporter:
+    """Bulk patient onboarding: validate rows in one streaming pass, then create
+    users and profiles in batches with MRNs allocated a block at a time.
+
+    Passwords are hashed in a process pool when `hash_workers` > 0; with
+    `send_invites` the accounts get an unusable password instead and skip hashing.
+    """
+
+    def __init__(self, batch_size=500, hash_workers=0, send_invites=False):
+        self.batch_size = batch_size
+        self.hash_workers = hash_workers
+        self.send_invites = send_invites
+
+    def run(self, records, dry_run=False):
+        """Import (line number, dict) records; returns a summary with a per-row error list"""
+        result = {'created': 0, 'errors': []}
+        seen_usernames = set()
+        batch = []
+
+        pool = ProcessPoolExecutor(max_workers=self.hash_workers) if self.hash_workers and not self.send_invites else None
+        try:
+            for line, record in records:
+                if isinstance(record, InvalidRecord):
+                    result['errors'].append(self.error(line, {}, str(record)))
+                    continue
+                form = PatientImportRowForm(data={key: (value or '') for key, value in record.items()})
+                if not form.is_valid():
+                    result['errors'].append(self.error(line, record, form.errors.get_json_data()))
+                    continue
+                username = form.cleaned_data['username']
+                if username in seen_usernames:
+                    result['errors'].append(self.error(line, record, {'username': 'Duplicate username in file'}))
+                    continue
+                seen_usernames.add(username)
+                batch.append((line, form.cleaned_data))
+
+                if len(batch) >= self.batch_size:
+                    self.flush(batch, result, pool, dry_run)
+                    batch = []
+            if batch:
+                self.flush(batch, result, pool, dry_run)
+        finally:
+            if pool:
+                pool.shutdown()
+
+        logger.info(f"Patient import created {result['created']} accounts with {len(result['errors'])} rejected rows")
+        return result
+
+    def error(self, line, record, errors):
+        if not isinstance(errors, dict):
+            errors = {'__all__': errors}
+        messages = []
+        for field, field_errors in errors.items():
+            if isinstance(field_errors, list):
+                field_errors = '; '.join(e['message'] for e in field_errors)
+            messages.append(f"{field}: {field_errors}")
+        return {'line': line, 'username': record.get('username', ''), 'error': ' | '.join(messages)}
+
+    def hash_passwords(self, passwords, pool):
+        if self.send_invites:
+            return [make_password(None) for _ in passwords]
+        if pool:
+            return list(pool.map(make_password, passwords, chunksize=max(len(passwords) // (self.hash_workers * 4), 1)))
+        return [make_password(password) for password in passwords]
+
+    def flush(self, batch, result, pool, dry_run):
+        """Create one batch of users and profiles; rows whose username exists are reported"""
+        existing = set(User.objects.filter(
+            username__in=[data['username'] for _, data in batch]
+        ).values_list('username', flat=True))
+        for line, data in batch:
+            if data['username'] in existing:
+                result['errors'].append(self.error(line, data, {'username': 'A user with that username already exists'}))
+        batch = [(line, data) for line, data in batch if data['username'] not in existing]
+        if not batch or dry_run:
+            result['created'] += len(batch)
+            return
+
+        # Rows without a password (or invite imports) get an unusable one: make_password(None)
+        passwords = self.hash_passwords([data['password'] or None for _, data in batch], pool)
+        with transaction.atomic():
+            mrns = MRNSequence.allocate(len(batch))
+            users = [
+                User(
+                    user_type='patient',
+                    medical_record_number=mrn,
+                    password=password,
+                    **{field: data[field] for field in USER_FIELDS}
+                )
+                for (_, data), mrn, password in zip(batch, mrns, passwords)
+            ]
+            User.objects.bulk_create(users, batch_size=self.batch_size)
+            # bulk_create only returns primary keys on backends that support RETURNING
+            if users[0].pk is None:
+                ids = dict(User.objects.filter(
+                    username__in=[user.username for user in users]
+                ).values_list('username', 'id'))
+                for user in users:
+                    user.pk = ids[user.username]
+            PatientProfile.objects.bulk_create(
+                [
+                    PatientProfile(user=user, **{field: data[field] for field in PROFILE_FIELDS})
+                    for user, (_, data) in zip(users, batch)
+                ],
+                batch_size=self.batch_size
+            )
+            # bulk_create skips post_save, so the dashboard counter is bumped here
+            dashboard_counters.adjust('total_patients', len(users))
+        result['created'] += len(users)
+
+
+def write_error_report(errors, stream):
+    """Write the per-row error list as CSV (line, username, error)"""
+    writer = csv.DictWriter(stream, fieldnames=['line', 'username', 'error'])
+    writer.writeheader()
+    writer.writerows(errors)
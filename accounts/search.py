@@ -0,0 +1,65 @@
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.urls import reverse
+import re
+
+from hospital_system.pagination import KeysetPaginator
+from .models import User
+
+# Highest code point, appended to a prefix to get the exclusive upper bound of its range
+PREFIX_END = '\U0010ffff'
+
+SEARCH_FIELDS = [
+    'id', 'username', 'first_name', 'last_name', 'medical_record_number', 'phone_number', 'email', 'date_joined',
+]
+
+
+def prefix_range(field, prefix):
+    """``field >= prefix AND field < prefix + max`` - unlike LIKE, a plain btree range on every backend"""
+    return Q(**{f"{field}__gte": prefix, f"{field}__lt": prefix + PREFIX_END})
+
+
+class PatientSearchService:
+    """Prefix search over patient name, username, MRN and phone.
+
+    Each term must prefix-match at least one field; names and usernames are
+    compared lower-cased against the expression indexes on ``User``.
+    """
+
+    paginator = KeysetPaginator(ordering=('last_name', 'first_name', 'id'), limit=20, max_limit=50)
+
+    def term_filter(self, term):
+        condition = (
+            prefix_range('last_name_ci', term.lower())
+            | prefix_range('first_name_ci', term.lower())
+            | prefix_range('username_ci', term.lower())
+            | prefix_range('medical_record_number', term.upper())
+        )
+        digits = re.sub(r'[^\d]', '', term)
+        if digits and len(digits) >= 3:
+            condition |= prefix_range('phone_number', digits) | prefix_range('phone_number', f"+{digits}")
+        return condition
+
+    def queryset(self, query=''):
+        patients = User.objects.filter(user_type='patient', is_active=True).annotate(
+            last_name_ci=Lower('last_name'),
+            first_name_ci=Lower('first_name'),
+            username_ci=Lower('username'),
+        )
+        for term in query.split()[:4]:
+            patients = patients.filter(self.term_filter(term))
+        return patients
+
+    def search(self, query='', cursor=None, limit=None):
+        """Return (results, next_cursor) as plain dicts ready for JSON"""
+        rows, next_cursor = self.paginator.paginate(
+            self.queryset(query).values(*SEARCH_FIELDS), cursor=cursor, limit=limit
+        )
+        for row in rows:
+            row['full_name'] = f"{row['first_name']} {row['last_name']}".strip() or row['username']
+            row['detail_url'] = reverse('medications:patient_detail', args=[row['id']])
+            row['report_url'] = reverse('reports:generate_report', args=[row['id']])
+        return rows, next_cursor
+
+# Initialize the search service
+patient_search = PatientSearchService()
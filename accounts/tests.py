@@ -0,0 +1,49 @@
+from django.test import TestCase
+from io import BytesIO
+import json
+
+from .models import MRNSequence, User
+from .onboarding import PatientImporter, iter_records
+
+
+def ndjson(*lines):
+    return BytesIO('\n'.join(lines).encode())
+
+
+def row(username):
+    return json.dumps({'username': username, 'first_name': 'Test', 'last_name': 'Patient'})
+
+
+class PatientImportTests(TestCase):
+    def setUp(self):
+        self.importer = PatientImporter(batch_size=1, send_invites=True)
+
+    def test_malformed_lines_are_reported_per_row(self):
+        result = self.importer.run(iter_records(ndjson(row('first'), '{not json', '[1]', row('second')), 'ndjson'))
+        self.assertEqual(result['created'], 2)
+        self.assertEqual([error['line'] for error in result['errors']], [2, 3])
+        self.assertTrue(User.objects.filter(username='second').exists())
+
+    def test_array_elements_that_are_not_objects_are_reported(self):
+        rows = BytesIO(json.dumps([1, json.loads(row('only'))]).encode())
+        result = self.importer.run(iter_records(rows, 'json'))
+        self.assertEqual((result['created'], [error['line'] for error in result['errors']]), (1, [1]))
+
+    def test_unparseable_file_is_rejected_before_any_account_is_created(self):
+        for stream, fmt in ((ndjson('not json', row('late')), 'ndjson'), (BytesIO(b'{"a": 1}'), 'json')):
+            with self.assertRaises(ValueError):
+                self.importer.run(iter_records(stream, fmt))
+        self.assertFalse(User.objects.exists())
+
+    def test_duplicate_usernames_are_rejected(self):
+        User.objects.create(username='taken')
+        result = self.importer.run(iter_records(ndjson(row('taken'), row('twice'), row('twice')), 'ndjson'))
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(sorted(error['line'] for error in result['errors']), [1, 3])
+
+
+class MRNSequenceTests(TestCase):
+    def test_blocks_are_consecutive(self):
+        self.assertEqual(MRNSequence.allocate(2), ['MRN000000001', 'MRN000000002'])
+        self.assertEqual(MRNSequence.allocate(), ['MRN000000003'])
+        self.assertEqual(MRNSequence.objects.get(name='patient').next_value, 4)
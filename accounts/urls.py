@@ -8,4 +8,5 @@ urlpatterns = [
     path('logout/', views.CustomLogoutView.as_view(), name='logout'),
     path('register/', views.PatientRegistrationView.as_view(), name='register'),
     path('staff/register/', views.StaffRegistrationView.as_view(), name='staff_register'),
+    path('patients/search/', views.patient_search_api, name='patient_search'),
 ]
\ No newline at end of file
@@ -5,7 +5,12 @@ from django.views.generic import CreateView
 from django.contrib.messages.views import SuccessMessageMixin
 from django.urls import reverse_lazy
 from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from hospital_system.pagination import InvalidCursor
+from monitoring.budgets import query_budget
 from .models import User, PatientProfile
+from .search import patient_search
 from .forms import PatientRegistrationForm, StaffRegistrationForm, CustomLoginForm
 
 class CustomLoginView(LoginView):
@@ -64,4 +69,22 @@ class CustomLogoutView(LogoutView):
     
     def dispatch(self, request, *args, **kwargs):
         messages.info(request, "You have been successfully logged out.")
-        return super().dispatch(request, *args, **kwargs)
\ No newline at end of file
+        return super().dispatch(request, *args, **kwargs)
+
+@query_budget(5)
+@login_required
+def patient_search_api(request):
+    """Autocomplete: patients whose name, username, MRN or phone starts with each term of `q`"""
+    if not request.user.can_manage_patients:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    try:
+        results, next_cursor = patient_search.search(
+            query=request.GET.get('q', '').strip()[:100],
+            cursor=request.GET.get('cursor'),
+            limit=request.GET.get('limit'),
+        )
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({'results': results, 'next_cursor': next_cursor})
@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import ApiToken
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    list_display = ('name', 'user', 'is_active', 'created_at', 'last_used_at')
+    list_filter = ('is_active',)
+    search_fields = ('name', 'user__username')
+    readonly_fields = ('key_hash', 'created_at', 'last_used_at')
+    raw_id_fields = ('user',)
+    
+    def has_add_permission(self, request):
+        # Keys are only shown once, so tokens are issued with `manage.py create_api_token`
+        return False
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class ApiConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'api'
+    verbose_name = 'JSON API'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import User
+from api.models import ApiToken
+
+class Command(BaseCommand):
+    help = 'Issue an API bearer token for a user and print its key once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User the token acts as')
+        parser.add_argument('--name', default='mobile', help='Device or integration name')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        token, key = ApiToken.issue(user, options['name'])
+        self.stdout.write(self.style.SUCCESS(f"Issued token '{token.name}' for {user.username}"))
+        self.stdout.write(key)
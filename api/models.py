@@ -0,0 +1,32 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+import hashlib
+import secrets
+
+User = get_user_model()
+
+class ApiToken(models.Model):
+    """Bearer token for API clients (mobile app, SMS gateway). Only a hash of the key is stored."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100, help_text="Which device or integration uses this token")
+    key_hash = models.CharField(max_length=64, unique=True, editable=False)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.name} ({self.user.username})"
+    
+    @staticmethod
+    def hash_key(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def issue(cls, user, name):
+        """Create a token and return (token, key); the key is not recoverable afterwards"""
+        key = secrets.token_urlsafe(32)
+        token = cls.objects.create(user=user, name=name, key_hash=cls.hash_key(key))
+        return token, key
+    
+    class Meta:
+        ordering = ['-created_at']
@@ -0,0 +1,132 @@
+from django.utils import timezone
+from datetime import timedelta
+
+from hospital_system.pagination import KeysetPaginator
+from medications.models import MedicationIntake
+from notifications.content import email_text
+from notifications.models import EmailNotification, SMSNotification
+
+
+class Rendered:
+    """An output field computed in Python from several columns, for values
+    that are not stored as such (e.g. email bodies kept as template references)"""
+
+    def __init__(self, lookups, render):
+        self.lookups = lookups
+        self.render = render
+
+
+# Output field name -> ORM lookup. Responses are built from values_list() tuples
+# over these lookups, so related names are joined in SQL and no model is hydrated.
+# Clients see the public UUID as 'id'; integer keys stay internal.
+DOSE_FIELDS = {
+    'id': 'public_id',
+    'scheduled_at': 'scheduled_datetime',
+    'taken_at': 'actual_datetime',
+    'status': 'status',
+    'notes': 'notes',
+    'prescription_id': 'prescription_id',
+    'medication': 'prescription__medication__name',
+    'dosage': 'prescription__dosage',
+    'instructions': 'prescription__special_instructions',
+    'priority': 'prescription__priority',
+}
+
+NOTIFICATION_FIELDS = {
+    'id': 'public_id',
+    'type': 'notification_type',
+    'message': 'message',
+    'status': 'status',
+    'scheduled_at': 'scheduled_at',
+    'sent_at': 'sent_at',
+    'created_at': 'created_at',
+}
+
+EMAIL_NOTIFICATION_FIELDS = dict(
+    NOTIFICATION_FIELDS,
+    subject='subject',
+    message=Rendered(('body', 'template_key', 'template_version', 'context', 'message'), email_text),
+)
+
+NOTIFICATION_CHANNELS = {
+    'sms': (SMSNotification, NOTIFICATION_FIELDS),
+    'email': (EmailNotification, EMAIL_NOTIFICATION_FIELDS),
+}
+
+history_paginator = KeysetPaginator(ordering=('-scheduled_datetime', '-id'), limit=50, max_limit=200)
+notification_paginator = KeysetPaginator(ordering=('-created_at', '-id'), limit=50, max_limit=200)
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def parse_fields(value, available):
+    """Names from a ?fields=a,b sparse fieldset, or every field when empty"""
+    if not value:
+        return list(available)
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}")
+    return names
+
+
+def serialize(rows, names):
+    return [dict(zip(names, row)) for row in rows]
+
+
+def row_reader(available, names):
+    """The lookups to select for `names`, and a function turning one selected
+    row into the output values"""
+    lookups, readers = [], []
+    for name in names:
+        field = available[name]
+        start = len(lookups)
+        if isinstance(field, Rendered):
+            lookups += field.lookups
+            readers.append(lambda row, field=field, start=start: field.render(*row[start:start + len(field.lookups)]))
+        else:
+            lookups.append(field)
+            readers.append(lambda row, start=start: row[start])
+    return lookups, lambda row: [read(row) for read in readers]
+
+
+def paginated_rows(queryset, paginator, available, names, cursor=None, limit=None):
+    """Page through values_list() tuples; ordering columns the client did not ask
+    for are selected after the requested ones and dropped before serialising."""
+    lookups, read = row_reader(available, names)
+    extra = [field for field in paginator.fields if field not in lookups]
+    lookups += extra
+    positions = [lookups.index(field) for field in paginator.fields]
+
+    rows, next_cursor = paginator.paginate(
+        queryset.values_list(*lookups),
+        cursor=cursor,
+        limit=limit,
+        row_key=lambda row: [row[i] for i in positions],
+    )
+    return serialize((read(row) for row in rows), names), next_cursor
+
+
+def patient_doses(patient):
+    return MedicationIntake.objects.filter(patient=patient)
+
+
+def patient_notifications(model, patient):
+    return model.objects.filter(recipient=patient)
+
+
+def schedule_rows(patient, date, names):
+    """All doses scheduled on one (local) date, in time order"""
+    start = timezone.make_aware(timezone.datetime.combine(date, timezone.datetime.min.time()))
+    doses = patient_doses(patient).filter(
+        scheduled_datetime__gte=start,
+        scheduled_datetime__lt=start + timedelta(days=1),
+    ).order_by('scheduled_datetime', 'id')
+    return serialize(doses.values_list(*[DOSE_FIELDS[name] for name in names]), names)
+
+
+def dose_row(dose_id, names):
+    row = MedicationIntake.objects.filter(pk=dose_id).values_list(*[DOSE_FIELDS[name] for name in names]).first()
+    return dict(zip(names, row)) if row else None
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from hospital_system.cache_versions import bump
+from notifications.models import EmailNotification, SMSNotification
+
+
+@receiver([post_save, post_delete], sender=SMSNotification)
+@receiver([post_save, post_delete], sender=EmailNotification)
+def bump_notification_versions(sender, instance, **kwargs):
+    bump(f"notifications:{instance.recipient_id}")
@@ -0,0 +1,66 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+import base64
+import json
+
+from accounts.models import User
+from medications.models import Medication, MedicationIntake, Prescription
+from notifications.models import SMSNotification
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+
+class NotificationPagingTests(TestCase):
+    def setUp(self):
+        self.patient = User.objects.create(username='paging-patient', user_type='patient')
+        SMSNotification.objects.bulk_create([
+            SMSNotification(recipient=self.patient, phone_number='+255700000000', message=f"Reminder {i}",
+                            notification_type='general', scheduled_at=timezone.now())
+            for i in range(5)
+        ])
+        self.client.force_login(self.patient)
+
+    def test_next_cursor_continues_the_listing(self):
+        first = self.client.get(reverse('api:notifications'), {'limit': 3, 'fields': 'message'}).json()
+        rest = self.client.get(reverse('api:notifications'), {'limit': 3, 'cursor': first['next_cursor']}).json()
+        self.assertEqual((len(first['results']), len(rest['results']), rest['next_cursor']), (3, 2, None))
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get(reverse('api:notifications'), {'cursor': raw_cursor(5)})
+        self.assertEqual(response.status_code, 400)
+
+    def test_archive_cursor_that_is_not_a_list_is_rejected(self):
+        response = self.client.get(reverse('api:archive', args=['intakes']), {'cursor': raw_cursor({'0': 1})})
+        self.assertEqual(response.status_code, 400)
+
+
+class ConfirmDoseTests(TestCase):
+    def setUp(self):
+        self.patient = User.objects.create(username='confirm-patient', user_type='patient')
+        prescription = Prescription.objects.create(
+            patient=self.patient, medication=Medication.objects.create(name='Confirm test'),
+            prescribing_physician='Dr. Test', dosage='1 tablet', frequency='once_daily',
+            start_date=timezone.now().date(), created_by=self.patient,
+        )
+        self.dose = MedicationIntake.objects.create(
+            prescription=prescription, patient=self.patient, scheduled_datetime=timezone.now(),
+        )
+        self.client.force_login(self.patient)
+
+    def confirm(self, body):
+        return self.client.post(
+            reverse('api:confirm_dose', args=[self.dose.public_id]), body, content_type='application/json'
+        )
+
+    def test_confirms_dose(self):
+        response = self.confirm({'status': 'taken'})
+        self.assertEqual(response.status_code, 200)
+        self.dose.refresh_from_db()
+        self.assertEqual(self.dose.status, 'taken')
+
+    def test_body_that_is_not_an_object_is_rejected(self):
+        for body in ('[]', '"x"', '5'):
+            self.assertEqual(self.confirm(body).status_code, 400, body)
@@ -0,0 +1,12 @@
+from django.urls import path
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('schedule/', views.schedule, name='schedule'),
+    path('history/', views.history, name='history'),
+    path('doses/<uuid:dose_id>/confirm/', views.confirm_dose, name='confirm_dose'),
+    path('notifications/', views.notifications, name='notifications'),
+    path('archive/<str:dataset>/', views.archive, name='archive'),
+]
@@ -0,0 +1,248 @@
+from django.http import JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
+from datetime import datetime, timedelta
+from functools import wraps
+import hashlib
+import json
+
+from accounts.models import User
+from hospital_system.cache_versions import get_version
+from hospital_system.pagination import InvalidCursor
+from medications.models import MedicationIntake
+from monitoring.budgets import query_budget
+from reports.archive import ARCHIVE_DATASETS, history_archiver
+from .models import ApiToken
+from .resources import (
+    DOSE_FIELDS, NOTIFICATION_CHANNELS, InvalidFields, dose_row, history_paginator,
+    notification_paginator, paginated_rows, parse_fields, patient_doses, patient_notifications, schedule_rows,
+)
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def api_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={'separators': (',', ':')})
+
+
+def authenticate_token(request):
+    """Resolve an ``Authorization: Bearer <key>`` header to an active user, or None"""
+    key = request.headers['Authorization'][len('Bearer '):].strip()
+    token = ApiToken.objects.select_related('user').filter(
+        key_hash=ApiToken.hash_key(key), is_active=True, user__is_active=True
+    ).first()
+    if token is None:
+        return None
+    # Record usage at most every few minutes rather than writing on every request
+    if token.last_used_at is None or token.last_used_at < timezone.now() - timedelta(minutes=5):
+        ApiToken.objects.filter(pk=token.pk).update(last_used_at=timezone.now())
+    return token.user
+
+
+def api_endpoint(*methods):
+    """JSON endpoint accepting a bearer token or a session (CSRF-checked for writes)"""
+    def decorator(view):
+        @csrf_exempt
+        @gzip_page
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in methods:
+                return error('Method not allowed', 405)
+
+            if request.headers.get('Authorization', '').startswith('Bearer '):
+                user = authenticate_token(request)
+                if user is None:
+                    return error('Invalid or revoked token', 401)
+                request.user = user
+            elif not request.user.is_authenticated:
+                return error('Authentication required', 401)
+            elif request.method not in SAFE_METHODS:
+                if CsrfViewMiddleware(lambda r: None).process_view(request, None, (), {}) is not None:
+                    return error('CSRF check failed', 403)
+
+            response = view(request, *args, **kwargs)
+            patch_vary_headers(response, ['Authorization', 'Cookie'])
+            return response
+        return wrapped
+    return decorator
+
+
+def target_patient(request):
+    """The patient a request is about: the caller, or ?patient=<id> for staff"""
+    if request.user.is_patient:
+        return request.user
+    if request.user.can_manage_patients and request.GET.get('patient', '').isdigit():
+        return get_object_or_404(User, id=request.GET['patient'], user_type='patient')
+    return None
+
+
+def conditional(request, version, build):
+    """Serve 304 when the client's ETag matches `version`, else build the response.
+
+    The version comes from the data-version cache, so unchanged data is
+    answered without touching the database.
+    """
+    digest = hashlib.sha256(f"{request.user.pk}|{request.get_full_path()}|{version}".encode()).hexdigest()[:32]
+    etag = f'"{digest}"'
+    response = get_conditional_response(request, etag=etag) or build()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@query_budget(6)
+@api_endpoint('GET')
+def schedule(request):
+    """Doses for one day (?date=YYYY-MM-DD, default today)"""
+    patient = target_patient(request)
+    if patient is None:
+        return error('Specify ?patient=<id>', 400)
+    try:
+        names = parse_fields(request.GET.get('fields'), DOSE_FIELDS)
+        date = datetime.strptime(request.GET['date'], '%Y-%m-%d').date() if request.GET.get('date') else timezone.localdate()
+    except InvalidFields as e:
+        return error(str(e), 400)
+    except ValueError:
+        return error('date must be YYYY-MM-DD', 400)
+
+    version = get_version(f"patient:{patient.pk}", 'medications')
+    return conditional(request, version, lambda: api_response({
+        'date': date,
+        'results': schedule_rows(patient, date, names),
+    }))
+
+
+@query_budget(6)
+@api_endpoint('GET')
+def history(request):
+    """Dose history, newest first, keyset-paginated (?cursor=, ?limit=, ?status=)"""
+    patient = target_patient(request)
+    if patient is None:
+        return error('Specify ?patient=<id>', 400)
+    try:
+        names = parse_fields(request.GET.get('fields'), DOSE_FIELDS)
+    except InvalidFields as e:
+        return error(str(e), 400)
+
+    doses = patient_doses(patient)
+    if request.GET.get('status'):
+        doses = doses.filter(status__in=request.GET['status'].split(','))
+
+    def build():
+        try:
+            results, next_cursor = paginated_rows(
+                doses, history_paginator, DOSE_FIELDS, names,
+                cursor=request.GET.get('cursor'), limit=request.GET.get('limit'),
+            )
+        except InvalidCursor as e:
+            return error(str(e), 400)
+        return api_response({'results': results, 'next_cursor': next_cursor})
+
+    return conditional(request, get_version(f"patient:{patient.pk}", 'medications'), build)
+
+
+@api_endpoint('POST')
+def confirm_dose(request, dose_id):
+    """Record a dose as taken or skipped; body: {"status": "taken"|"skipped", "notes": ""}"""
+    dose = get_object_or_404(MedicationIntake, public_id=dose_id)
+    if not (request.user.can_manage_patients or dose.patient_id == request.user.pk):
+        return error('Dose not found', 404)
+
+    try:
+        names = parse_fields(request.GET.get('fields'), DOSE_FIELDS) if request.GET.get('fields') else ['id', 'status', 'taken_at']
+    except InvalidFields as e:
+        return error(str(e), 400)
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return error('Body must be JSON', 400)
+    if not isinstance(payload, dict):
+        return error('Body must be a JSON object', 400)
+    status = payload.get('status', 'taken')
+    if status not in ('taken', 'skipped'):
+        return error('status must be "taken" or "skipped"', 400)
+
+    # Replays of the same confirmation (e.g. a retried request on a flaky link) are no-ops
+    if dose.status != status:
+        dose.status = status
+        dose.actual_datetime = timezone.now() if status == 'taken' else None
+        if payload.get('notes'):
+            dose.notes = str(payload['notes'])[:1000]
+        dose.save()
+
+    return api_response(dose_row(dose.pk, names))
+
+
+@query_budget(6)
+@api_endpoint('GET')
+def notifications(request):
+    """SMS (default) or email notifications sent to the patient, newest first (?channel=sms|email)"""
+    patient = target_patient(request)
+    if patient is None:
+        return error('Specify ?patient=<id>', 400)
+    channel = request.GET.get('channel', 'sms')
+    if channel not in NOTIFICATION_CHANNELS:
+        return error('channel must be "sms" or "email"', 400)
+    model, available = NOTIFICATION_CHANNELS[channel]
+    try:
+        names = parse_fields(request.GET.get('fields'), available)
+    except InvalidFields as e:
+        return error(str(e), 400)
+
+    def build():
+        try:
+            results, next_cursor = paginated_rows(
+                patient_notifications(model, patient), notification_paginator, available, names,
+                cursor=request.GET.get('cursor'), limit=request.GET.get('limit'),
+            )
+        except InvalidCursor as e:
+            return error(str(e), 400)
+        return api_response({'results': results, 'next_cursor': next_cursor})
+
+    return conditional(request, get_version(f"notifications:{patient.pk}"), build)
+
+
+@query_budget(6)
+@api_endpoint('GET')
+def archive(request, dataset):
+    """Archived history for one patient, newest first, read-only
+    (?from=, ?to=YYYY-MM-DD, ?status=, ?q=, ?cursor=, ?limit=)"""
+    patient = target_patient(request)
+    if patient is None:
+        return error('Specify ?patient=<id>', 400)
+    if dataset not in ARCHIVE_DATASETS:
+        return error(f"Unknown archive '{dataset}'. Available: {', '.join(ARCHIVE_DATASETS)}", 404)
+    try:
+        date_from, date_to = [
+            datetime.strptime(request.GET[name], '%Y-%m-%d').date() if request.GET.get(name) else None
+            for name in ('from', 'to')
+        ]
+    except ValueError:
+        return error('from and to must be YYYY-MM-DD', 400)
+    try:
+        limit = min(max(int(request.GET.get('limit', 50)), 1), 200)
+    except ValueError:
+        return error('limit must be a number', 400)
+
+    def build():
+        try:
+            results, next_cursor = history_archiver.search(
+                dataset, patient, date_from=date_from, date_to=date_to,
+                statuses=request.GET['status'].split(',') if request.GET.get('status') else None,
+                text=request.GET.get('q'), cursor=request.GET.get('cursor'), limit=limit,
+            )
+        except InvalidCursor as e:
+            return error(str(e), 400)
+        return api_response({'results': results, 'next_cursor': next_cursor})
+
+    # Archives only change when the archiver adds a segment, which bumps this version
+    return conditional(request, get_version(f"archive:{patient.pk}"), build)
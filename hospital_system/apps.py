@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class HospitalSystemConfig(AppConfig):
+    name = 'hospital_system'
+    verbose_name = 'Hospital system'
+    
+    def ready(self):
+        # SQLite connection profile, applied to every connection the project opens
+        from . import db  # noqa: F401
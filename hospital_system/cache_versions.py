@@ -0,0 +1,34 @@
+from django.core.cache import cache
+from django.db import transaction
+import time
+
+# Cache keys are built from data versions instead of being deleted: bumping a
+# version makes every fragment keyed on the old one unreachable at once, and
+# the stale entries simply age out.
+
+
+def version_key(scope):
+    return f"dataversion:{scope}"
+
+
+def get_version(*scopes):
+    """Combined version string for one or more scopes, e.g. ('patient:12', 'medications')"""
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Seed from the clock so a version evicted from the cache never repeats
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return '-'.join(str(versions[key]) for key in keys)
+
+
+def bump(*scopes):
+    """Invalidate all fragments keyed on these scopes once the current transaction commits"""
+    def apply():
+        for scope in scopes:
+            try:
+                cache.incr(version_key(scope))
+            except ValueError:
+                cache.add(version_key(scope), time.time_ns(), timeout=None)
+    transaction.on_commit(apply)
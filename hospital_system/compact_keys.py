@@ -0,0 +1,64 @@
+"""Migration helpers for moving a table from UUID primary keys to compact
+integer keys.
+
+The table is rebuilt rather than altered in place: the migration creates a
+copy of the model with a BigAutoField key and a unique `public_id`, copies
+the rows across with their old UUID as `public_id`, drops the old table and
+renames the copy. Only tables that no foreign key points at can be moved
+this way.
+"""
+from django.db import migrations
+
+RESERVED_COLUMNS = ('id', 'public_id')
+
+
+def copy_rows(schema_editor, source, target, source_key, target_key, order_by):
+    """Copy every row of `source` into `target` with one INSERT ... SELECT,
+    writing `source_key` into `target_key`. New integer keys follow `order_by`."""
+    quote = schema_editor.quote_name
+    source_table, target_table = quote(source._meta.db_table), quote(target._meta.db_table)
+    columns = [field.column for field in target._meta.concrete_fields if field.column not in RESERVED_COLUMNS]
+    if schema_editor.connection.vendor == 'postgresql':
+        # Hold writers off until the old table is dropped so no row is left behind
+        schema_editor.execute(f"LOCK TABLE {source_table} IN SHARE MODE")
+    column_list = ', '.join(quote(column) for column in columns)
+    ordering = ', '.join(quote(column) for column in (*order_by, source_key))
+    schema_editor.execute(
+        f"INSERT INTO {target_table} ({column_list}, {quote(target_key)}) "
+        f"SELECT {column_list}, {quote(source_key)} FROM {source_table} ORDER BY {ordering}"
+    )
+
+
+def copy_to_compact_table(app_label, model_name, compact_name, order_by=('created_at',)):
+    """RunPython operation moving `model_name` rows into `compact_name`, the old
+    UUID key becoming `public_id`. Reversing copies them back under their UUID.
+
+    Copying in created_at order keeps rows in the order they were written,
+    so rows that were stored together (and read together) stay together.
+    """
+
+    def forward(apps, schema_editor):
+        copy_rows(
+            schema_editor, apps.get_model(app_label, model_name), apps.get_model(app_label, compact_name),
+            'id', 'public_id', order_by,
+        )
+
+    def backward(apps, schema_editor):
+        copy_rows(
+            schema_editor, apps.get_model(app_label, compact_name), apps.get_model(app_label, model_name),
+            'public_id', 'id', order_by,
+        )
+
+    return migrations.RunPython(forward, backward)
+
+
+def analyze_table(app_label, model_name):
+    """RunPython operation refreshing planner statistics for a rebuilt table;
+    run it after the indexes are recreated, or joins are planned blind."""
+
+    def forward(apps, schema_editor):
+        if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+            table = apps.get_model(app_label, model_name)._meta.db_table
+            schema_editor.execute(f"ANALYZE {schema_editor.quote_name(table)}")
+
+    return migrations.RunPython(forward, migrations.RunPython.noop)
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# The SQLite database is shared by web workers, Celery workers and management
+# commands. WAL lets readers run alongside the single writer, busy_timeout makes
+# a writer wait for the lock instead of failing with "database is locked", and
+# synchronous=NORMAL is durable in WAL mode except on power loss.
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative: KiB, i.e. 64 MiB of page cache per connection
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def sqlite_pragmas():
+    """The default PRAGMAs with any overrides from settings.SQLITE_PRAGMAS"""
+    return {**DEFAULT_SQLITE_PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {})}
+
+
+def pragma_statements(pragmas):
+    return [f"PRAGMA {name} = {value}" for name, value in pragmas.items()]
+
+
+@receiver(connection_created)
+def apply_sqlite_profile(sender, connection, **kwargs):
+    """Run the SQLite PRAGMAs on every new connection (they are per connection,
+    except journal_mode, which sticks to the database file)"""
+    if connection.vendor != 'sqlite':
+        return
+    # On the driver connection, so they are not logged or counted as the app's queries
+    for statement in pragma_statements(sqlite_pragmas()):
+        connection.connection.execute(statement)
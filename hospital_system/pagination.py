@@ -0,0 +1,159 @@
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+import base64
+import datetime
+import json
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder keeps only milliseconds of a datetime; a cursor needs
+    all of it, or rows sharing the last row's millisecond are skipped"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """The list of ordering values in a cursor; datetimes come back as ISO strings"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+    if not isinstance(values, list):
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+class KeysetPaginator:
+    """Cursor pagination over a fixed ordering, e.g. ('last_name', 'first_name', 'id').
+
+    The cursor holds the ordering values of the last row served; the next page
+    is fetched with a lexicographic ``(a, b, id) > (x, y, z)`` filter so every
+    page is an index range scan, however deep. The last ordering field must be
+    unique (normally the primary key). Fields prefixed with '-' sort descending.
+    """
+
+    def __init__(self, ordering, limit=20, max_limit=100):
+        self.ordering = list(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.limit = limit
+        self.max_limit = max_limit
+
+    def clamp_limit(self, limit):
+        try:
+            return min(max(int(limit), 1), self.max_limit)
+        except (TypeError, ValueError):
+            return self.limit
+
+    def parse(self, model, values):
+        """Cursor values converted back to their fields' types"""
+        if len(values) != len(self.fields):
+            raise InvalidCursor("Cursor does not match this ordering")
+        try:
+            return [model._meta.get_field(name).to_python(value) for name, value in zip(self.fields, values)]
+        except ValidationError:
+            raise InvalidCursor("Invalid cursor")
+
+    def after(self, values):
+        """Q for rows that sort strictly after the given ordering values"""
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f"{name}__{lookup}": values[i]})
+            for previous, value in zip(self.fields[:i], values[:i]):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def page_query(self, queryset, cursor=None, limit=None):
+        """The queryset for one page, plus one row to tell whether another follows"""
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            values = self.parse(queryset.model, decode_cursor(cursor))
+            queryset = queryset.filter(self.after(values))
+        return queryset[:(limit or self.limit) + 1]
+
+    def paginate(self, queryset, cursor=None, limit=None, row_key=None):
+        """Return (rows, next_cursor); next_cursor is None on the last page.
+
+        `row_key` extracts the ordering values from a row when rows are
+        ``values_list()`` tuples rather than dicts or model instances.
+        """
+        limit = self.clamp_limit(limit) if limit is not None else self.limit
+        rows = list(self.page_query(queryset, cursor, limit))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            if row_key is not None:
+                next_cursor = encode_cursor(row_key(last))
+            else:
+                get = last.get if isinstance(last, dict) else lambda name: getattr(last, name)
+                next_cursor = encode_cursor(get(field) for field in self.fields)
+        return rows, next_cursor
+
+
+def estimate_count(queryset):
+    """Row count for display: the planner's estimate for an unfiltered PostgreSQL
+    table (no scan), an exact COUNT(*) otherwise"""
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    return queryset.count()
+
+
+class KeysetListMixin:
+    """ListView mixin paginating by cursor (?cursor=) instead of page number.
+
+    Every page is one indexed range read of `paginate_by` + 1 rows, with no
+    COUNT(*) and no OFFSET, so the last page costs the same as the first.
+    The context gains `next_cursor` and `is_first_page`; pass ?count=1 to
+    also get `total_count` (estimated where the database can).
+    """
+
+    keyset_ordering = ('-created_at', '-id')
+
+    @classmethod
+    def keyset_paginator(cls, page_size=None):
+        page_size = page_size or cls.paginate_by
+        return KeysetPaginator(cls.keyset_ordering, limit=page_size, max_limit=page_size)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.keyset_paginator(page_size)
+        try:
+            rows, self.next_cursor = paginator.paginate(queryset, cursor=self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404("Invalid page cursor")
+        return None, None, rows, self.next_cursor is not None or not self.is_first_page
+
+    @property
+    def is_first_page(self):
+        return not self.request.GET.get('cursor')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = getattr(self, 'next_cursor', None)
+        context['is_first_page'] = self.is_first_page
+        if self.request.GET.get('count') == '1':
+            context['total_count'] = estimate_count(self.get_queryset())
+        return context
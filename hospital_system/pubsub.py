@@ -0,0 +1,139 @@
+from collections import deque
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One connected client: an asyncio queue bound to the loop that reads it"""
+
+    def __init__(self, loop, maxsize=100):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, event):
+        # Slow consumers lose events instead of growing memory without bound
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+
+class InProcessBroker:
+    """Fan events out to subscribers in this process.
+
+    `publish` may be called from any thread (signal handlers run in sync
+    workers); delivery is handed to each subscriber's event loop. Recent
+    events are kept in a ring buffer so reconnecting clients can resume
+    from their Last-Event-ID.
+    """
+
+    def __init__(self, history=200):
+        self.subscribers = set()
+        self.recent = deque(maxlen=history)
+        self.lock = threading.Lock()
+        self.sequence = itertools.count(1)
+
+    def next_id(self):
+        return f"{time.time_ns() // 1_000_000}-{next(self.sequence)}"
+
+    def publish(self, event_type, data):
+        self.deliver({'id': self.next_id(), 'type': event_type, 'data': data})
+
+    def deliver(self, event):
+        with self.lock:
+            self.recent.append(event)
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; its cleanup will unsubscribe it
+                pass
+
+    def replay(self, last_event_id):
+        """Buffered events newer than last_event_id (ids sort by time, then sequence)"""
+        def key(event_id):
+            millis, _, sequence = event_id.partition('-')
+            return int(millis), int(sequence or 0)
+        try:
+            since = key(last_event_id)
+        except ValueError:
+            return []
+        with self.lock:
+            return [event for event in self.recent if key(event['id']) > since]
+
+    async def subscribe(self):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self.lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self.subscribers)
+
+
+class RedisBroker(InProcessBroker):
+    """Redis pub/sub fan-out so events published by any process (web, Celery)
+    reach subscribers in every process. One Redis subscription per process
+    feeds the local subscribers."""
+
+    def __init__(self, url, channel='medcare:live', history=200):
+        super().__init__(history=history)
+        self.url = url
+        self.channel = channel
+        self.publisher = None
+        self.listener = None
+
+    def publish(self, event_type, data):
+        import redis
+        if self.publisher is None:
+            self.publisher = redis.Redis.from_url(self.url)
+        event = {'id': self.next_id(), 'type': event_type, 'data': data}
+        try:
+            self.publisher.publish(self.channel, json.dumps(event, cls=DjangoJSONEncoder))
+        except redis.RedisError as e:
+            logger.error(f"Failed to publish live event {event_type}: {e}")
+
+    async def subscribe(self):
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.get_running_loop().create_task(self.listen())
+        return await super().subscribe()
+
+    async def listen(self):
+        import redis.asyncio as aioredis
+        while True:
+            try:
+                client = aioredis.Redis.from_url(self.url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self.deliver(json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Live event listener lost Redis connection: {e}")
+                await asyncio.sleep(2)
+
+
+def get_broker():
+    url = getattr(settings, 'LIVE_EVENTS_URL', '')
+    if url.startswith(('redis://', 'rediss://')):
+        return RedisBroker(url)
+    return InProcessBroker()
+
+# Initialize the process-wide broker
+broker = get_broker()
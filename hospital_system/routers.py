@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+
+REPLICA = 'replica'
+
+PIN_COOKIE = 'pin_primary'
+
+# Set by use_replica() around read-only analytical work (reports, exports,
+# history pages, analytics); every other read stays on the primary
+_analytical = ContextVar('analytical_reads', default=False)
+
+# Set for a request that writes, and for the client's requests shortly after
+# it: their reads stay on the primary so they see their own writes even while
+# the replica lags behind
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def read_alias():
+    """The alias analytical reads should use now: the replica, unless there
+    is none or the current request is pinned to the primary"""
+    if replica_configured() and not _pinned.get():
+        return REPLICA
+    return 'default'
+
+
+@contextmanager
+def use_replica():
+    """Route reads in this block (or decorated function) to the replica.
+
+    Querysets are routed when they are evaluated, so evaluate them inside
+    the block; a lazy queryset returned out of it reads from the primary.
+    """
+    token = _analytical.set(True)
+    try:
+        yield
+    finally:
+        _analytical.reset(token)
+
+
+class ReplicaRouter:
+    """Analytical reads to the replica, everything else to the primary.
+
+    Only code inside use_replica() reads from the replica; writes and all
+    other reads go to 'default'. Without a 'replica' database configured
+    the router sends everything to 'default'.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_alias() if _analytical.get() else 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica's schema arrives by replication
+        return db != REPLICA
+
+
+class ReplicaPinningMiddleware:
+    """Read-your-writes for web clients.
+
+    A request with an unsafe method reads only from the primary and sets a
+    cookie that keeps the same client's requests on the primary for
+    REPLICA_PIN_SECONDS, long enough for the redirect after a POST to show
+    what was just written.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+        token = _pinned.set(writes or PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+            if writes and replica_configured():
+                response.set_cookie(
+                    PIN_COOKIE, '1', max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                    httponly=True, samesite='Lax',
+                )
+            return response
+        finally:
+            _pinned.reset(token)
+
+
+class ReplicaReadMixin:
+    """View mixin running the whole view, template rendering included, with
+    analytical reads on the replica. List it after the access mixins, so the
+    session and user are loaded from the primary."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with use_replica():
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+            return response
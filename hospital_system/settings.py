@@ -23,13 +23,17 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'crispy_forms',
     'crispy_bootstrap5',
+    'hospital_system.apps.HospitalSystemConfig',
     'accounts.apps.AccountsConfig',
-    'medications',
-    'notifications',
-    'reports',
+    'medications.apps.MedicationsConfig',
+    'notifications.apps.NotificationsConfig',
+    'reports.apps.ReportsConfig',
+    'api.apps.ApiConfig',
+    'monitoring.apps.MonitoringConfig',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -37,6 +41,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hospital_system.routers.ReplicaPinningMiddleware',
 ]
 
 ROOT_URLCONF = 'hospital_system.urls'
@@ -64,9 +69,51 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Reuse connections across requests and tasks; checked before reuse
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Seconds to wait for the write lock (mirrors busy_timeout below)
+            'timeout': 20,
+        },
     }
 }
 
+# Read replica: reports, exports, history pages and analytics read from it when
+# REPLICA_DATABASE_NAME is set; writes always go to default. Locally, point it at a
+# second SQLite file and refresh it with manage.py sync_replica.
+REPLICA_DATABASE_NAME = config('REPLICA_DATABASE_NAME', default='')
+if REPLICA_DATABASE_NAME:
+    DATABASES['replica'] = dict(DATABASES['default'], NAME=REPLICA_DATABASE_NAME, TEST={'MIRROR': 'default'})
+
+DATABASE_ROUTERS = ['hospital_system.routers.ReplicaRouter']
+
+# Seconds a client keeps reading from default after a POST, so it sees its own writes
+REPLICA_PIN_SECONDS = 5
+
+# PRAGMAs run on every new SQLite connection are defined in hospital_system.db;
+# set SQLITE_PRAGMAS to a dict to override some of them
+
+# Cache: per-process locmem by default; set CACHE_URL=redis://... so all nodes share
+# fragment caches, data versions and counters
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'medcare',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'medcare',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -98,6 +145,38 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Live dose/alert feed: in-process by default; a redis:// URL fans events out across
+# processes (needed once there is more than one ASGI worker or Celery publishes events)
+LIVE_EVENTS_URL = config('LIVE_EVENTS_URL', default='')
+
+# Report PDF storage: blobs compressed at rest with 'none', 'gzip' or 'zstd' (needs zstandard)
+REPORT_BLOB_COMPRESSION = config('REPORT_BLOB_COMPRESSION', default='gzip')
+
+# Days to keep each report type before prune_reports expires it (None keeps forever)
+REPORT_RETENTION_DAYS = {
+    'weekly_summary': 90,
+    'monthly_summary': 365,
+    'treatment_complete': None,
+    'discharge_summary': None,
+}
+
+# Days of history kept in the hot tables per dataset; older rows are moved to monthly
+# compressed archive segments by archive_history (None keeps everything in place).
+# Intakes must cover the longest report period, reports read them directly.
+ARCHIVE_HORIZON_DAYS = {
+    'intakes': 365,
+    'schedules': 90,
+    'sms': 180,
+    'email': 180,
+}
+
+# Notification send outcomes are written in one bulk UPDATE per batch_size sends, or
+# flush_interval_ms after the first unwritten one (see notifications.status_buffer)
+NOTIFICATION_STATUS_BUFFER = {
+    'batch_size': 100,
+    'flush_interval_ms': 500,
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -128,11 +207,47 @@ DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@medcare.com')
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'advance-dashboard-counters': {
+        'task': 'reports.tasks.advance_dashboard_counters',
+        'schedule': 60.0,
+    },
+    'reconcile-dashboard-counters': {
+        'task': 'reports.tasks.reconcile_dashboard_counters',
+        'schedule': 6 * 60 * 60.0,
+    },
+    'archive-history': {
+        'task': 'reports.tasks.archive_history',
+        'schedule': 24 * 60 * 60.0,
+    },
+}
+
+# Requests and Celery tasks over any of these are written to logs/slow_requests.log,
+# with their most repeated statements (see monitoring.queries)
+QUERY_INSTRUMENTATION = {
+    'slow_ms': 1000,
+    'max_queries': 50,
+    'duplicate_queries': 5,
+}
+
+# Each process writes its metrics to its own file here at most every
+# METRICS_FLUSH_SECONDS, and /metrics sums them (see monitoring.metrics).
+# Clear the directory when deploying. Scrapers send METRICS_TOKEN as a bearer
+# token; without one only localhost may scrape.
+METRICS_DIR = config('METRICS_DIR', default=str(BASE_DIR / 'metrics'))
+METRICS_FLUSH_SECONDS = 5
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
 
 # Logging
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'timestamped': {
+            'format': '{asctime} {message}',
+            'style': '{',
+        },
+    },
     'handlers': {
         'file': {
             'level': 'INFO',
@@ -143,6 +258,14 @@ LOGGING = {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
         },
+        'slow_requests': {
+            'level': 'WARNING',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'logs' / 'slow_requests.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'timestamped',
+        },
     },
     'loggers': {
         'django': {
@@ -155,6 +278,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'monitoring': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 
@@ -0,0 +1,62 @@
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+import base64
+import json
+
+from accounts.models import User
+from notifications.models import SMSNotification
+from .db import DEFAULT_SQLITE_PRAGMAS, sqlite_pragmas
+from .pagination import InvalidCursor, KeysetPaginator, decode_cursor, encode_cursor
+
+
+class SqliteProfileTests(SimpleTestCase):
+    databases = {'default'}
+
+    def test_settings_override_single_pragmas(self):
+        with override_settings(SQLITE_PRAGMAS={'busy_timeout': 5000}):
+            pragmas = sqlite_pragmas()
+        self.assertEqual(pragmas['busy_timeout'], 5000)
+        self.assertEqual(pragmas['synchronous'], DEFAULT_SQLITE_PRAGMAS['synchronous'])
+
+    def test_profile_is_applied_to_connections(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], sqlite_pragmas()['busy_timeout'])
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        patient = User.objects.create(username='paging-patient', user_type='patient')
+        SMSNotification.objects.bulk_create([
+            SMSNotification(recipient=patient, phone_number='+255700000000', message=f"Reminder {i}",
+                            notification_type='general', scheduled_at=timezone.now())
+            for i in range(10)
+        ])
+        # Every row in the same millisecond, apart by microseconds
+        base = timezone.now().replace(microsecond=123000)
+        for i, pk in enumerate(SMSNotification.objects.order_by('pk').values_list('pk', flat=True)):
+            SMSNotification.objects.filter(pk=pk).update(created_at=base + timedelta(microseconds=i * 100))
+        self.paginator = KeysetPaginator(('-created_at', '-id'), limit=3)
+
+    def test_pages_include_rows_created_in_the_same_millisecond(self):
+        messages, cursor = [], None
+        while True:
+            rows, cursor = self.paginator.paginate(SMSNotification.objects.all(), cursor=cursor)
+            messages += [row.message for row in rows]
+            if not cursor:
+                break
+        self.assertEqual(messages, [f"Reminder {i}" for i in reversed(range(10))])
+
+    def test_cursor_keeps_microseconds(self):
+        moment = timezone.now().replace(microsecond=123456)
+        self.assertEqual(decode_cursor(encode_cursor([moment, 7])), [moment.isoformat(), 7])
+
+    def test_malformed_cursors_are_rejected(self):
+        for value in (5, {'a': 1}, 'x', ['not a date', 1], [1]):
+            token = base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+            with self.subTest(value=value), self.assertRaises(InvalidCursor):
+                self.paginator.paginate(SMSNotification.objects.all(), cursor=token)
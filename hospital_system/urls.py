@@ -4,12 +4,19 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import RedirectView
 
+from medications.history_views import MedicationHistoryView
+from monitoring.views import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
+    path('medications/feedback/', include('medications.feedback_urls')),
+    path('medications/history/', MedicationHistoryView.as_view(), name='medication_history'),
     path('medications/', include('medications.urls')),
     path('notifications/', include('notifications.urls')),
     path('reports/', include('reports.urls')),
+    path('api/v1/', include('api.urls')),
+    path('metrics', metrics_view, name='metrics'),
     path('', RedirectView.as_view(url='/medications/dashboard/', permanent=False)),
 ]
 
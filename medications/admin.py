@@ -26,12 +26,12 @@ class MedicationScheduleAdmin(admin.ModelAdmin):
 class DailyMedicationScheduleAdmin(admin.ModelAdmin):
     list_display = ('prescription', 'date', 'time_slot', 'is_taken', 'taken_at')
     list_filter = ('is_taken', 'date', 'created_at')
-    search_fields = ('prescription__medication__name', 'prescription__patient__username')
+    search_fields = ('prescription__medication__name', 'patient__username')
     readonly_fields = ('created_at',)
     raw_id_fields = ('prescription',)
 @admin.register(MedicationIntake)
 class MedicationIntakeAdmin(admin.ModelAdmin):
     list_display = ('prescription', 'scheduled_datetime', 'actual_datetime', 'status')
     list_filter = ('status', 'scheduled_datetime', 'created_at')
-    readonly_fields = ('id', 'created_at')
+    readonly_fields = ('public_id', 'created_at')
     raw_id_fields = ('prescription',)
\ No newline at end of file
@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from hospital_system.cache_versions import bump, get_version
+from hospital_system.pagination import KeysetPaginator
+from .models import MedicationFeedback, Prescription
+
+# Output field name -> ORM lookup for the detail modal, read as one joined row
+DETAIL_FIELDS = {
+    'id': 'id',
+    'feedback_type': 'feedback_type',
+    'message': 'message',
+    'created_at': 'created_at',
+    'is_read': 'is_read',
+    'read_at': 'read_at',
+    'read_by_first_name': 'read_by__first_name',
+    'read_by_last_name': 'read_by__last_name',
+    'patient_first_name': 'daily_schedule__patient__first_name',
+    'patient_last_name': 'daily_schedule__patient__last_name',
+    'medical_record_number': 'daily_schedule__patient__medical_record_number',
+    'email': 'daily_schedule__patient__email',
+    'phone_number': 'daily_schedule__patient__phone_number',
+    'medication': 'daily_schedule__prescription__medication__name',
+    'dosage': 'daily_schedule__prescription__dosage',
+    'priority': 'daily_schedule__prescription__priority',
+    'date': 'daily_schedule__date',
+    'time_slot': 'daily_schedule__time_slot',
+}
+
+
+class FeedbackInboxService:
+    """Staff inbox over patient feedback.
+
+    Pages are keyset-paginated with every relation a row renders joined in,
+    so a page costs one query however many rows it shows. Total and unread
+    counts are cached under the 'feedback' data version, which any feedback
+    change bumps.
+    """
+
+    paginator = KeysetPaginator(ordering=('-created_at', '-id'), limit=25, max_limit=100)
+
+    def queryset(self, unread_only=False):
+        feedback = MedicationFeedback.objects.select_related(
+            'daily_schedule__patient',
+            'daily_schedule__prescription__medication',
+            'read_by',
+        )
+        if unread_only:
+            feedback = feedback.filter(is_read=False)
+        return feedback
+
+    def page(self, cursor=None, limit=None, unread_only=False):
+        """Return (feedback, next_cursor) for one page, newest first"""
+        return self.paginator.paginate(self.queryset(unread_only), cursor=cursor, limit=limit)
+
+    def counts(self):
+        """{'total': n, 'unread': n} for the inbox"""
+        key = f"feedback:counts:{get_version('feedback')}"
+        counts = cache.get(key)
+        if counts is None:
+            counts = MedicationFeedback.objects.aggregate(
+                total=Count('id'),
+                unread=Count('id', filter=Q(is_read=False)),
+            )
+            cache.set(key, counts, timeout=3600)
+        return counts
+
+    def detail(self, feedback_id):
+        """Everything the detail modal shows, as a dict, or None"""
+        values = MedicationFeedback.objects.filter(pk=feedback_id).values_list(*DETAIL_FIELDS.values()).first()
+        if values is None:
+            return None
+        row = dict(zip(DETAIL_FIELDS, values))
+        feedback_types = dict(MedicationFeedback._meta.get_field('feedback_type').flatchoices)
+        priorities = dict(Prescription._meta.get_field('priority').flatchoices)
+        row['feedback_type_display'] = feedback_types.get(row['feedback_type'], row['feedback_type'])
+        row['priority_display'] = priorities.get(row['priority'], row['priority'])
+        row['patient_name'] = f"{row.pop('patient_first_name')} {row.pop('patient_last_name')}".strip()
+        first, last = row.pop('read_by_first_name'), row.pop('read_by_last_name')
+        row['read_by'] = f"{first or ''} {last or ''}".strip() or None
+        return row
+
+    def mark_read(self, staff, feedback_ids=None):
+        """Mark the given (or all) unread feedback as read by `staff` in one UPDATE"""
+        unread = MedicationFeedback.objects.filter(is_read=False)
+        if feedback_ids is not None:
+            unread = unread.filter(pk__in=feedback_ids)
+        updated = unread.update(is_read=True, read_by=staff, read_at=timezone.now())
+        if updated:
+            bump('feedback')
+        return updated
+
+
+# Initialize the feedback inbox
+feedback_inbox = FeedbackInboxService()
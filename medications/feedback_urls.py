@@ -0,0 +1,12 @@
+from django.urls import path
+from . import feedback_views
+
+app_name = 'feedback'
+
+urlpatterns = [
+    path('', feedback_views.feedback_list, name='inbox'),
+    path('search/', feedback_views.feedback_search, name='search'),
+    path('<int:feedback_id>/', feedback_views.feedback_detail, name='detail'),
+    path('read/', feedback_views.mark_feedback_read, name='mark_read'),
+    path('read/<int:feedback_id>/', feedback_views.mark_feedback_read, name='mark_one_read'),
+]
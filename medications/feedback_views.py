@@ -0,0 +1,109 @@
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_POST
+from datetime import datetime
+import json
+
+from hospital_system.pagination import InvalidCursor
+from monitoring.budgets import query_budget
+from .feedback import feedback_inbox
+from .fulltext import text_search
+
+
+@query_budget(6)
+@login_required
+def feedback_list(request):
+    """Feedback inbox, newest first (?unread=1 for unread only, ?cursor= for older pages)"""
+    if not request.user.can_manage_patients:
+        messages.error(request, 'Access denied. Staff privileges required.')
+        return redirect('medications:dashboard')
+    
+    unread_only = request.GET.get('unread') == '1'
+    try:
+        feedbacks, next_cursor = feedback_inbox.page(
+            cursor=request.GET.get('cursor'),
+            limit=request.GET.get('limit'),
+            unread_only=unread_only,
+        )
+    except InvalidCursor:
+        return redirect('feedback:inbox')
+    
+    counts = feedback_inbox.counts()
+    context = {
+        'feedbacks': feedbacks,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+        'unread_only': unread_only,
+        'total_count': counts['total'],
+        'unread_count': counts['unread'],
+    }
+    return render(request, 'medications/feedback_list.html', context)
+
+
+@query_budget(4)
+@login_required
+def feedback_detail(request, feedback_id):
+    """JSON for the detail modal, fetched when it is opened"""
+    if not request.user.can_manage_patients:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    detail = feedback_inbox.detail(feedback_id)
+    if detail is None:
+        return JsonResponse({'error': 'Feedback not found'}, status=404)
+    return JsonResponse(detail)
+
+
+@login_required
+@require_POST
+def mark_feedback_read(request, feedback_id=None):
+    """Mark feedback as read: one id from the URL, or a JSON body {"ids": [...]} or {"all": true}"""
+    if not request.user.can_manage_patients:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    if feedback_id is not None:
+        feedback_ids = [feedback_id]
+    else:
+        try:
+            payload = json.loads(request.body or b'{}')
+            if not isinstance(payload, dict):
+                raise ValueError('Body must be an object')
+            feedback_ids = None if payload.get('all') is True else [int(pk) for pk in payload['ids']]
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse({'error': 'Body must be {"ids": [...]} or {"all": true}'}, status=400)
+    
+    updated = feedback_inbox.mark_read(request.user, feedback_ids)
+    return JsonResponse({'status': 'success', 'updated': updated})
+
+
+@query_budget(4)
+@login_required
+def feedback_search(request):
+    """Full-text search over feedback messages and schedule notes, best matches first.
+    
+    Filters: ?type=<feedback type>, ?source=feedback|note, ?from= and ?to= (YYYY-MM-DD).
+    """
+    if not request.user.can_manage_patients:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    try:
+        date_from, date_to = (
+            datetime.strptime(request.GET[name], '%Y-%m-%d').date() if request.GET.get(name) else None
+            for name in ('from', 'to')
+        )
+        limit = int(request.GET.get('limit', 20))
+        offset = int(request.GET.get('offset', 0))
+    except ValueError:
+        return JsonResponse({'error': 'Dates must be YYYY-MM-DD; limit and offset must be integers'}, status=400)
+    
+    results = text_search.search(
+        request.GET.get('q', '')[:200],
+        feedback_type=request.GET.get('type') or None,
+        source=request.GET.get('source') or None,
+        date_from=date_from,
+        date_to=date_to,
+        limit=limit,
+        offset=offset,
+    )
+    return JsonResponse({'results': results})
@@ -0,0 +1,289 @@
+from django.db import connection, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+import re
+
+from .models import DailyMedicationSchedule, MedicationFeedback
+
+INDEX_TABLE = 'medications_text_search'
+
+# Feedback messages and schedule notes share one index. Document ids encode
+# the source in the low bit so a row is replaced or removed by primary key.
+SOURCES = ('feedback', 'note')
+
+# Highlight markers are control characters so the patient's own text can be
+# HTML-escaped before the markers become <mark> tags
+MARK_START, MARK_END = '\x02', '\x03'
+
+# Whole words; a trailing * (e.g. kizungu*) asks for prefix matching
+TERM_PATTERN = re.compile(r'\w+\*?', re.UNICODE)
+
+
+def document_id(source, source_id):
+    return int(source_id) * 2 + SOURCES.index(source)
+
+
+def split_document_id(doc_id):
+    return SOURCES[doc_id % 2], doc_id // 2
+
+
+def query_terms(query, max_terms=8):
+    """Words of a user query; other punctuation and search operators are dropped"""
+    return TERM_PATTERN.findall(query.lower())[:max_terms]
+
+
+def highlight(text):
+    return mark_safe(escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+class SQLiteSearchBackend:
+    """FTS5 virtual table ranked with bm25(). The unicode61 tokenizer folds
+    case and diacritics and does no stemming, so Swahili and English text
+    are matched word for word."""
+
+    def create_schema(self, schema_editor):
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5("
+            "body, feedback_type UNINDEXED, day UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def drop_schema(self, schema_editor):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+    def upsert(self, cursor, rows):
+        cursor.executemany(f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {INDEX_TABLE} (rowid, body, feedback_type, day) VALUES (%s, %s, %s, %s)", rows
+        )
+
+    def delete(self, cursor, doc_ids):
+        cursor.executemany(f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s", [(doc_id,) for doc_id in doc_ids])
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE}")
+
+    def match_expression(self, terms):
+        # Quoted terms are literal, so user input cannot inject FTS5 syntax
+        return ' '.join(f'"{term[:-1]}"*' if term.endswith('*') else f'"{term}"' for term in terms)
+
+    def search_sql(self, where):
+        conditions = ''.join(f" AND {condition}" for condition in where)
+        return (
+            f"SELECT rowid, feedback_type, day, bm25({INDEX_TABLE}) AS rank, "
+            f"snippet({INDEX_TABLE}, 0, '{MARK_START}', '{MARK_END}', '…', 24) "
+            f"FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s{conditions} "
+            "ORDER BY rank LIMIT %s OFFSET %s"
+        )
+
+    def source_condition(self):
+        return "rowid %% 2 = %s"
+
+
+class PostgresSearchBackend:
+    """tsvector column with a GIN index, ranked with ts_rank(). Uses the
+    'simple' configuration (no stemming or stop words) so Swahili and English
+    text are matched word for word."""
+
+    def create_schema(self, schema_editor):
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ("
+            "id bigint PRIMARY KEY, body text NOT NULL, feedback_type varchar(20), day date, "
+            "document tsvector GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED)"
+        )
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_document ON {INDEX_TABLE} USING GIN (document)")
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_day ON {INDEX_TABLE} (day)")
+
+    def drop_schema(self, schema_editor):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+    def upsert(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {INDEX_TABLE} (id, body, feedback_type, day) VALUES (%s, %s, %s, %s) "
+            "ON CONFLICT (id) DO UPDATE SET body = EXCLUDED.body, "
+            "feedback_type = EXCLUDED.feedback_type, day = EXCLUDED.day",
+            rows,
+        )
+
+    def delete(self, cursor, doc_ids):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE id = ANY(%s)", [list(doc_ids)])
+
+    def clear(self, cursor):
+        cursor.execute(f"TRUNCATE {INDEX_TABLE}")
+
+    def match_expression(self, terms):
+        return ' & '.join(f"{term[:-1]}:*" if term.endswith('*') else term for term in terms)
+
+    def search_sql(self, where):
+        conditions = ''.join(f" AND {condition}" for condition in where)
+        return (
+            "SELECT id, feedback_type, day, -ts_rank(document, query) AS rank, "
+            f"ts_headline('simple', body, query, 'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=40, MinWords=15') "
+            f"FROM {INDEX_TABLE}, to_tsquery('simple', %s) AS query WHERE document @@ query{conditions} "
+            "ORDER BY rank LIMIT %s OFFSET %s"
+        )
+
+    def source_condition(self):
+        return "id %% 2 = %s"
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(vendor=None):
+    backend = BACKENDS.get(vendor or connection.vendor)
+    return backend() if backend else None
+
+
+class TextSearchService:
+    """Ranked, highlighted search over feedback messages and schedule notes.
+
+    The index is kept current by signals in medications.signals; rebuild it
+    with the rebuild_search_index command after bulk loads that bypass them.
+    """
+
+    def __init__(self, max_limit=100):
+        self.max_limit = max_limit
+
+    @property
+    def backend(self):
+        return get_backend()
+
+    def feedback_row(self, feedback):
+        return (
+            document_id('feedback', feedback.pk),
+            feedback.message,
+            feedback.feedback_type,
+            feedback.daily_schedule.date if feedback.daily_schedule_id else None,
+        )
+
+    def note_row(self, schedule):
+        return (document_id('note', schedule.pk), schedule.notes, None, schedule.date)
+
+    def index(self, rows, removed=()):
+        """Write index rows; documents with empty text are removed instead"""
+        backend = self.backend
+        if backend is None:
+            return
+        rows = list(rows)
+        removed = list(removed) + [row[0] for row in rows if not (row[1] or '').strip()]
+        rows = [row for row in rows if (row[1] or '').strip()]
+        with connection.cursor() as cursor:
+            if removed:
+                backend.delete(cursor, removed)
+            if rows:
+                backend.upsert(cursor, rows)
+
+    def index_feedback(self, feedback):
+        self.index([self.feedback_row(feedback)])
+
+    def index_note(self, schedule):
+        self.index([self.note_row(schedule)])
+
+    def remove(self, source, source_id):
+        self.index([], removed=[document_id(source, source_id)])
+
+    def rebuild(self, batch_size=2000):
+        """Re-index every feedback message and schedule note; returns the document count"""
+        backend = self.backend
+        if backend is None:
+            return 0
+        # One transaction, so searches keep using the old index until the new one is complete
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                backend.clear(cursor)
+
+            total = 0
+            feedback = MedicationFeedback.objects.exclude(message='').values_list(
+                'pk', 'message', 'feedback_type', 'daily_schedule__date'
+            )
+            notes = DailyMedicationSchedule.objects.exclude(notes='').values_list('pk', 'notes', 'date')
+            sources = (
+                (feedback, lambda row: (document_id('feedback', row[0]), row[1], row[2], row[3])),
+                (notes, lambda row: (document_id('note', row[0]), row[1], None, row[2])),
+            )
+            for queryset, to_row in sources:
+                batch = []
+                for row in queryset.iterator(chunk_size=batch_size):
+                    batch.append(to_row(row))
+                    if len(batch) >= batch_size:
+                        self.index(batch)
+                        total += len(batch)
+                        batch = []
+                self.index(batch)
+                total += len(batch)
+        return total
+
+    def search(self, query, feedback_type=None, source=None, date_from=None, date_to=None, limit=20, offset=0):
+        """Best matches first as dicts with source, id, feedback_type, date and an
+        HTML-safe highlighted snippet, plus the patient and medication they concern"""
+        backend = self.backend
+        terms = query_terms(query)
+        if backend is None or not terms:
+            return []
+
+        where, params = [], [backend.match_expression(terms)]
+        if feedback_type:
+            where.append("feedback_type = %s")
+            params.append(feedback_type)
+        if source in SOURCES:
+            where.append(backend.source_condition())
+            params.append(SOURCES.index(source))
+        if date_from:
+            where.append("day >= %s")
+            params.append(date_from)
+        if date_to:
+            where.append("day <= %s")
+            params.append(date_to)
+        params += [min(max(int(limit), 1), self.max_limit), max(int(offset), 0)]
+
+        with connection.cursor() as cursor:
+            cursor.execute(backend.search_sql(where), params)
+            matches = cursor.fetchall()
+
+        results = []
+        for doc_id, kind, day, rank, snippet in matches:
+            source_name, source_id = split_document_id(doc_id)
+            results.append({
+                'source': source_name,
+                'id': source_id,
+                'feedback_type': kind,
+                'date': day,
+                'rank': -rank,
+                'snippet': highlight(snippet),
+            })
+        return self.attach_context(results)
+
+    def attach_context(self, results):
+        """Add patient and medication names: one query per source, not per result"""
+        lookups = {
+            'feedback': (MedicationFeedback, 'daily_schedule__'),
+            'note': (DailyMedicationSchedule, ''),
+        }
+        for source, (model, prefix) in lookups.items():
+            ids = [result['id'] for result in results if result['source'] == source]
+            if not ids:
+                continue
+            context = {
+                row[0]: row[1:]
+                for row in model.objects.filter(pk__in=ids).values_list(
+                    'pk', f'{prefix}patient_id', f'{prefix}patient__first_name',
+                    f'{prefix}patient__last_name', f'{prefix}prescription__medication__name',
+                )
+            }
+            for result in results:
+                if result['source'] == source and result['id'] in context:
+                    patient_id, first_name, last_name, medication = context[result['id']]
+                    result.update(
+                        patient_id=patient_id,
+                        patient_name=f"{first_name} {last_name}".strip(),
+                        medication=medication,
+                    )
+        return results
+
+
+# Initialize the text search service
+text_search = TextSearchService()
@@ -0,0 +1,25 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views.generic import ListView
+
+from hospital_system.pagination import KeysetListMixin
+from hospital_system.routers import ReplicaReadMixin
+from .models import MedicationIntake
+
+
+def patient_history(patient):
+    return MedicationIntake.objects.filter(
+        patient=patient
+    ).select_related('prescription__medication')
+
+
+class MedicationHistoryView(LoginRequiredMixin, ReplicaReadMixin, KeysetListMixin, ListView):
+    """The signed-in patient's doses, newest first"""
+    model = MedicationIntake
+    template_name = 'medications/medication_history.html'
+    context_object_name = 'medication_history'
+    paginate_by = 20
+    keyset_ordering = ('-scheduled_datetime', '-id')
+    query_budget = 5
+
+    def get_queryset(self):
+        return patient_history(self.request.user)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from medications.fulltext import text_search
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text index over feedback messages and schedule notes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Documents written per batch (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        if text_search.backend is None:
+            self.stdout.write(self.style.WARNING('Full-text search is not supported on this database backend'))
+            return
+        
+        total = text_search.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} documents'))
@@ -0,0 +1,81 @@
+from django.db import migrations
+
+# The schema as it stood when this migration was written, inlined so later
+# changes to medications.fulltext cannot change what this migration does
+INDEX_TABLE = 'medications_text_search'
+
+CREATE_SQL = {
+    'sqlite': [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5("
+        "body, feedback_type UNINDEXED, day UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2')",
+    ],
+    'postgresql': [
+        f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ("
+        "id bigint PRIMARY KEY, body text NOT NULL, feedback_type varchar(20), day date, "
+        "document tsvector GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED)",
+        f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_document ON {INDEX_TABLE} USING GIN (document)",
+        f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_day ON {INDEX_TABLE} (day)",
+    ],
+}
+
+INSERT_SQL = {
+    'sqlite': f"INSERT INTO {INDEX_TABLE} (rowid, body, feedback_type, day) VALUES (%s, %s, %s, %s)",
+    'postgresql': f"INSERT INTO {INDEX_TABLE} (id, body, feedback_type, day) VALUES (%s, %s, %s, %s)",
+}
+
+
+def create_index(apps, schema_editor):
+    """Create the index and fill it with the existing schedule notes and
+    feedback messages (rebuild_search_index does the same later)"""
+    vendor = schema_editor.connection.vendor
+    if vendor not in CREATE_SQL:
+        return
+    for sql in CREATE_SQL[vendor]:
+        schema_editor.execute(sql)
+
+    alias = schema_editor.connection.alias
+    # Document ids put the source in the low bit: 0 for feedback, 1 for notes
+    DailyMedicationSchedule = apps.get_model('medications', 'DailyMedicationSchedule')
+    sources = [
+        DailyMedicationSchedule.objects.using(alias).exclude(notes='').values_list('pk', 'notes', 'date').iterator(),
+    ]
+    to_rows = [lambda row: (row[0] * 2 + 1, row[1], None, row[2])]
+    try:
+        MedicationFeedback = apps.get_model('medications', 'MedicationFeedback')
+    except LookupError:
+        # Feedback has no table yet at this point of the migration history
+        pass
+    else:
+        sources.append(MedicationFeedback.objects.using(alias).exclude(message='').values_list(
+            'pk', 'message', 'feedback_type', 'daily_schedule__date'
+        ).iterator())
+        to_rows.append(lambda row: (row[0] * 2, row[1], row[2], row[3]))
+
+    with schema_editor.connection.cursor() as cursor:
+        for rows, to_row in zip(sources, to_rows):
+            batch = []
+            for row in rows:
+                if row[1].strip():
+                    batch.append(to_row(row))
+                if len(batch) >= 1000:
+                    cursor.executemany(INSERT_SQL[vendor], batch)
+                    batch = []
+            if batch:
+                cursor.executemany(INSERT_SQL[vendor], batch)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_SQL:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0002_dailymedicationschedule'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0003_text_search_index'),
+    ]
+
+    operations = [
+        # Keyset pagination of dose history reads (scheduled_datetime, id) ranges
+        migrations.AddIndex(
+            model_name='medicationintake',
+            index=models.Index(fields=['-scheduled_datetime', '-id'], name='med_intake_history_idx'),
+        ),
+    ]
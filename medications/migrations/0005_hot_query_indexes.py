@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0004_medicationintake_history_idx'),
+    ]
+
+    operations = [
+        # Reminder bookkeeping used by MedicationSchedulingService.send_due_medication_reminders
+        migrations.AddField(
+            model_name='dailymedicationschedule',
+            name='email_sent',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='dailymedicationschedule',
+            name='email_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        # Reminder and overdue sweeps only ever look at today's untaken doses
+        migrations.AddIndex(
+            model_name='dailymedicationschedule',
+            index=models.Index(fields=['date', 'email_sent'], condition=models.Q(is_taken=False), name='daily_sched_untaken_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicationintake',
+            index=models.Index(fields=['status', 'scheduled_datetime'], name='med_intake_status_idx'),
+        ),
+        # Active prescriptions by date window, for daily schedule generation
+        migrations.AddIndex(
+            model_name='prescription',
+            index=models.Index(fields=['start_date', 'end_date'], condition=models.Q(is_active=True), name='rx_active_dates_idx'),
+        ),
+    ]
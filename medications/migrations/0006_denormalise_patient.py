@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.db import migrations, models, transaction
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+
+def backfill_patient(apps, schema_editor):
+    """Copy prescription.patient_id onto schedules and intakes, a batch of
+    prescriptions per transaction so large tables are not locked at once"""
+    Prescription = apps.get_model('medications', 'Prescription')
+    models_to_fill = [
+        apps.get_model('medications', 'DailyMedicationSchedule'),
+        apps.get_model('medications', 'MedicationIntake'),
+    ]
+    prescription_ids = list(Prescription.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(prescription_ids), BATCH_SIZE):
+        batch = prescription_ids[start:start + BATCH_SIZE]
+        patient = Subquery(Prescription.objects.filter(pk=OuterRef('prescription_id')).values('patient_id')[:1])
+        with transaction.atomic():
+            for model in models_to_fill:
+                model.objects.filter(prescription_id__in=batch, patient__isnull=True).update(patient_id=patient)
+
+
+class Migration(migrations.Migration):
+
+    # Each backfill batch commits on its own
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('medications', '0005_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailymedicationschedule',
+            name='patient',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_medication_schedules', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='medicationintake',
+            name='patient',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='medication_intakes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_patient, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('medications', '0006_denormalise_patient'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailymedicationschedule',
+            name='patient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_medication_schedules', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='medicationintake',
+            name='patient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='medication_intakes', to=settings.AUTH_USER_MODEL),
+        ),
+        # Per-patient reads become single-table range scans; the patient column
+        # leads both indexes, so it needs no index of its own
+        migrations.AddIndex(
+            model_name='dailymedicationschedule',
+            index=models.Index(fields=['patient', 'date'], name='daily_sched_patient_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicationintake',
+            index=models.Index(fields=['patient', 'scheduled_datetime', 'id'], name='med_intake_patient_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+from hospital_system.compact_keys import analyze_table, copy_to_compact_table
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('medications', '0007_patient_not_null_indexes'),
+    ]
+
+    # The UUID primary key moves to public_id (used by the API); rows get
+    # BigAutoField keys in created_at order. Prescription keeps its
+    # UUID key: intakes, schedules and rollups all reference it.
+    # See hospital_system.compact_keys.
+    operations = [
+        migrations.CreateModel(
+            name='CompactMedicationIntake',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('scheduled_datetime', models.DateTimeField()),
+                ('actual_datetime', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('taken', 'Taken'), ('missed', 'Missed'), ('skipped', 'Skipped')], default='pending', max_length=10)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('prescription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='medications.prescription')),
+                ('patient', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-scheduled_datetime'],
+            },
+        ),
+        copy_to_compact_table('medications', 'MedicationIntake', 'CompactMedicationIntake'),
+        migrations.DeleteModel(
+            name='MedicationIntake',
+        ),
+        migrations.RenameModel(
+            old_name='CompactMedicationIntake',
+            new_name='MedicationIntake',
+        ),
+        migrations.AlterField(
+            model_name='medicationintake',
+            name='prescription',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='intakes', to='medications.prescription'),
+        ),
+        migrations.AlterField(
+            model_name='medicationintake',
+            name='patient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='medication_intakes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='medicationintake',
+            unique_together={('prescription', 'scheduled_datetime')},
+        ),
+        migrations.AddIndex(
+            model_name='medicationintake',
+            index=models.Index(fields=['-scheduled_datetime', '-id'], name='med_intake_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicationintake',
+            index=models.Index(fields=['status', 'scheduled_datetime'], name='med_intake_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicationintake',
+            index=models.Index(fields=['patient', 'scheduled_datetime', 'id'], name='med_intake_patient_idx'),
+        ),
+        analyze_table('medications', 'MedicationIntake'),
+    ]
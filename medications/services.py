@@ -3,30 +3,70 @@ from datetime import datetime, timedelta, time
 from django.db.models import Q
 from .models import Prescription, DailyMedicationSchedule, MedicationFeedback
 from notifications.services import NotificationService
+from monitoring.metrics import metrics
+from functools import wraps
 import logging
 
 logger = logging.getLogger(__name__)
 
+SWEEP_SECONDS = metrics.histogram('medcare_sweep_seconds', 'Duration of scheduling sweeps', ('sweep',))
+SWEEP_ITEMS = metrics.counter(
+    'medcare_sweep_items_total', 'Schedules generated, reminders and alerts sent by sweeps', ('sweep',)
+)
+LAST_SWEEP = metrics.gauge(
+    'medcare_sweep_last_run_timestamp_seconds', 'Unix time the sweep last finished', ('sweep',)
+)
+# Reminders are due 15 minutes before the dose; this is how long after that they went out
+REMINDER_LAG = metrics.histogram(
+    'medcare_reminder_lag_seconds', 'Delay between a reminder falling due and being sent',
+    buckets=(10, 30, 60, 120, 300, 600, 900),
+)
+
+
+def timed_sweep(name):
+    """Record a sweep's duration, the count it returns and when it last ran"""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            with SWEEP_SECONDS.time(sweep=name):
+                count = method(*args, **kwargs)
+            SWEEP_ITEMS.inc(count, sweep=name)
+            LAST_SWEEP.set(timezone.now().timestamp(), sweep=name)
+            return count
+        return wrapper
+    return decorator
+
+
 class MedicationSchedulingService:
     """Service for handling medication scheduling and automatic notifications"""
     
     def __init__(self):
         self.notification_service = NotificationService()
     
-    def generate_schedules_for_date(self, date=None):
-        """Generate medication schedules for all active prescriptions for a specific date"""
-        if date is None:
-            date = timezone.now().date()
-        
-        active_prescriptions = Prescription.objects.filter(
+    def active_prescriptions(self, date):
+        """Prescriptions that are active and in effect on a date"""
+        return Prescription.objects.filter(
             is_active=True,
             start_date__lte=date
         ).filter(
             Q(end_date__isnull=True) | Q(end_date__gte=date)
         )
+    
+    def open_schedules(self, date):
+        """Schedules on a date whose dose has not been taken"""
+        return DailyMedicationSchedule.objects.filter(
+            date=date,
+            is_taken=False
+        )
+    
+    @timed_sweep('generate_schedules')
+    def generate_schedules_for_date(self, date=None):
+        """Generate medication schedules for all active prescriptions for a specific date"""
+        if date is None:
+            date = timezone.now().date()
         
         generated_count = 0
-        for prescription in active_prescriptions:
+        for prescription in self.active_prescriptions(date):
             try:
                 schedules = prescription.generate_daily_schedules(date)
                 generated_count += len(schedules)
@@ -37,17 +77,14 @@ class MedicationSchedulingService:
         logger.info(f"Generated {generated_count} total schedules for {date}")
         return generated_count
     
+    @timed_sweep('due_reminders')
     def send_due_medication_reminders(self):
         """Send email reminders for medications that are due soon"""
         now = timezone.now()
         current_date = now.date()
         
         # Get schedules that are due within 15 minutes and haven't been sent email yet
-        due_schedules = DailyMedicationSchedule.objects.filter(
-            date=current_date,
-            is_taken=False,
-            email_sent=False
-        )
+        due_schedules = self.open_schedules(current_date).filter(email_sent=False)
         
         sent_count = 0
         for schedule in due_schedules:
@@ -70,6 +107,7 @@ class MedicationSchedulingService:
                         schedule.email_sent = True
                         schedule.email_sent_at = now
                         schedule.save(update_fields=['email_sent', 'email_sent_at'])
+                        REMINDER_LAG.observe((timedelta(minutes=15) - time_until_dose).total_seconds())
                         sent_count += 1
                         logger.info(f"Sent reminder for {schedule}")
                 
@@ -79,16 +117,14 @@ class MedicationSchedulingService:
         logger.info(f"Sent {sent_count} medication reminders")
         return sent_count
     
+    @timed_sweep('overdue_alerts')
     def send_overdue_medication_alerts(self):
         """Send alerts for overdue medications"""
         now = timezone.now()
         current_date = now.date()
         
         # Get schedules that are overdue (30 minutes past scheduled time)
-        overdue_schedules = DailyMedicationSchedule.objects.filter(
-            date=current_date,
-            is_taken=False
-        )
+        overdue_schedules = self.open_schedules(current_date)
         
         sent_count = 0
         for schedule in overdue_schedules:
@@ -149,7 +185,7 @@ class MedicationSchedulingService:
         today = timezone.now().date()
         
         schedules = DailyMedicationSchedule.objects.filter(
-            prescription__patient=patient,
+            patient=patient,
             date=today
         ).select_related('prescription__medication').order_by('time_slot')
         
@@ -161,7 +197,7 @@ class MedicationSchedulingService:
         end_time = now + timedelta(hours=hours_ahead)
         
         schedules = DailyMedicationSchedule.objects.filter(
-            prescription__patient=patient,
+            patient=patient,
             date__range=[now.date(), end_time.date()],
             is_taken=False
         ).select_related('prescription__medication').order_by('date', 'time_slot')
@@ -0,0 +1,132 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .fulltext import text_search
+from .models import DailyMedicationSchedule, MedicationFeedback, MedicationIntake, Prescription
+
+
+# An intake's stored values and its prescription's details, read in one query
+# before each save and shared by every receiver reacting to the change:
+# compliance rollups, dashboard counters and live dose events.
+INTAKE_SNAPSHOT_FIELDS = ['patient_id', 'prescription_id', 'scheduled_datetime', 'status']
+PRESCRIPTION_DETAIL_FIELDS = ['patient__first_name', 'patient__last_name', 'medication__name', 'dosage', 'priority']
+
+
+def stored_intake(instance):
+    """The intake's values as stored before the current save, or None for a new intake"""
+    return getattr(instance, '_stored_intake', None)
+
+
+def prescription_details(instance):
+    """Patient name, medication, dosage and priority of the intake's prescription"""
+    cached = getattr(instance, '_prescription_details', None)
+    if cached is None or cached[0] != instance.prescription_id:
+        details = Prescription.objects.filter(pk=instance.prescription_id).values(*PRESCRIPTION_DETAIL_FIELDS).first()
+        cached = instance._prescription_details = (instance.prescription_id, details or {})
+    return cached[1]
+
+
+@receiver(pre_save, sender=MedicationIntake)
+def snapshot_intake(sender, instance, raw=False, **kwargs):
+    instance._stored_intake = None
+    if raw or instance._state.adding:
+        return
+    row = sender.objects.filter(pk=instance.pk).values(
+        *INTAKE_SNAPSHOT_FIELDS, *[f"prescription__{field}" for field in PRESCRIPTION_DETAIL_FIELDS]
+    ).first()
+    if row is None:
+        return
+    instance._stored_intake = {field: row[field] for field in INTAKE_SNAPSHOT_FIELDS}
+    instance._prescription_details = (
+        row['prescription_id'], {field: row[f"prescription__{field}"] for field in PRESCRIPTION_DETAIL_FIELDS}
+    )
+
+
+# Schedules and intakes carry their prescription's patient_id so per-patient
+# reads need no join. bulk_create() skips these signals: set patient there.
+
+@receiver(pre_save, sender=DailyMedicationSchedule)
+@receiver(pre_save, sender=MedicationIntake)
+def copy_prescription_patient(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not instance.prescription_id:
+        return
+    if update_fields is not None and not {'prescription', 'prescription_id'} & set(update_fields):
+        # patient_id is not being written
+        return
+    stored = stored_intake(instance) if sender is MedicationIntake else None
+    if stored is not None and stored['prescription_id'] == instance.prescription_id:
+        instance.patient_id = stored['patient_id']
+    else:
+        instance.patient_id = instance.prescription.patient_id
+
+
+@receiver(post_save, sender=DailyMedicationSchedule)
+@receiver(post_save, sender=MedicationIntake)
+def store_prescription_patient(sender, instance, raw=False, update_fields=None, **kwargs):
+    # save(update_fields=['prescription']) writes only the listed fields, so
+    # the patient copied above is written here when the caller left it out
+    if raw or update_fields is None:
+        return
+    if {'prescription', 'prescription_id'} & update_fields and not {'patient', 'patient_id'} & update_fields:
+        sender.objects.filter(pk=instance.pk).update(patient_id=instance.patient_id)
+
+
+@receiver(post_save, sender=Prescription)
+def propagate_prescription_patient(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    for model in (DailyMedicationSchedule, MedicationIntake):
+        model.objects.filter(prescription=instance).exclude(patient_id=instance.patient_id).update(
+            patient_id=instance.patient_id
+        )
+
+
+# Keep the full-text index in step with feedback messages and schedule notes.
+# Writes happen in the caller's transaction, so a rolled-back save leaves no
+# stale index row behind.
+
+@receiver(post_save, sender=MedicationFeedback)
+def index_feedback(sender, instance, raw=False, **kwargs):
+    if not raw:
+        text_search.index_feedback(instance)
+
+
+@receiver(post_delete, sender=MedicationFeedback)
+def unindex_feedback(sender, instance, **kwargs):
+    text_search.remove('feedback', instance.pk)
+
+
+# The indexed fields as loaded, so saves that only touch bookkeeping such as
+# email_sent or is_taken (every reminder sweep) leave the index alone
+NOTE_FIELDS = ('notes', 'date')
+
+
+def _note_state(instance):
+    # From __dict__, so a deferred field is not fetched just to remember it
+    return tuple(instance.__dict__.get(field) for field in NOTE_FIELDS)
+
+
+@receiver(post_init, sender=DailyMedicationSchedule)
+def remember_schedule_note(sender, instance, **kwargs):
+    instance._indexed_note = _note_state(instance)
+
+
+@receiver(post_save, sender=DailyMedicationSchedule)
+def index_schedule_note(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(NOTE_FIELDS) & set(update_fields):
+        return
+    if created:
+        # Generated schedules start without notes; there is nothing to index yet
+        changed = bool(instance.notes)
+    else:
+        changed = _note_state(instance) != instance._indexed_note
+    if changed:
+        text_search.index_note(instance)
+    instance._indexed_note = _note_state(instance)
+
+
+@receiver(post_delete, sender=DailyMedicationSchedule)
+def unindex_schedule_note(sender, instance, **kwargs):
+    text_search.remove('note', instance.pk)
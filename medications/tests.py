@@ -0,0 +1,139 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import time
+from unittest import mock
+
+from accounts.models import User
+from .feedback import feedback_inbox
+from .fulltext import text_search
+from reports.models import DailyComplianceRollup
+from .models import DailyMedicationSchedule, Medication, MedicationFeedback, MedicationIntake, Prescription
+
+
+class FeedbackInboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create(username='inbox-staff', user_type='admin')
+        patient = User.objects.create(username='inbox-patient', user_type='patient')
+        prescription = Prescription.objects.create(
+            patient=patient, medication=Medication.objects.create(name='Inbox test'),
+            prescribing_physician='Dr. Test', dosage='1 tablet', frequency='once_daily',
+            start_date=timezone.now().date(), created_by=self.staff,
+        )
+        schedule = DailyMedicationSchedule.objects.create(
+            prescription=prescription, patient=patient, date=timezone.now().date(), time_slot=time(8),
+        )
+        MedicationFeedback.objects.bulk_create([
+            MedicationFeedback(daily_schedule=schedule, feedback_type='question', message=f"Question {i}")
+            for i in range(10)
+        ])
+        self.client.force_login(self.staff)
+
+    def test_next_cursor_continues_the_inbox(self):
+        first, cursor = feedback_inbox.page(limit=6)
+        rest, cursor = feedback_inbox.page(cursor=cursor, limit=6)
+        self.assertEqual((len(first), len(rest), cursor), (6, 4, None))
+
+    def test_counts_are_shared_by_staff(self):
+        self.assertEqual(feedback_inbox.counts(), {'total': 10, 'unread': 10})
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback_inbox.mark_read(self.staff, [MedicationFeedback.objects.first().pk])
+        self.assertEqual(feedback_inbox.counts(), {'total': 10, 'unread': 9})
+
+    def test_mark_read_rejects_body_that_is_not_an_object(self):
+        for body in ('[]', '"x"', '5'):
+            response = self.client.post(reverse('feedback:mark_read'), body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_mark_read_by_ids(self):
+        ids = list(MedicationFeedback.objects.values_list('pk', flat=True)[:2])
+        response = self.client.post(reverse('feedback:mark_read'), {'ids': ids}, content_type='application/json')
+        self.assertEqual(response.json()['updated'], 2)
+
+
+class IntakeSnapshotTests(TestCase):
+    def setUp(self):
+        patient = User.objects.create(username='snapshot-patient', user_type='patient')
+        self.prescription = Prescription.objects.create(
+            patient=patient, medication=Medication.objects.create(name='Snapshot test'),
+            prescribing_physician='Dr. Test', dosage='1 tablet', frequency='once_daily',
+            start_date=timezone.now().date(), created_by=patient,
+        )
+        self.intake = MedicationIntake.objects.create(prescription=self.prescription, scheduled_datetime=timezone.now())
+
+    def test_receivers_share_one_read_of_the_stored_intake(self):
+        intake = MedicationIntake.objects.get(pk=self.intake.pk)
+        intake.status = 'taken'
+        with CaptureQueriesContext(connection) as queries:
+            intake.save()
+        selects = [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+        self.assertEqual(len([sql for sql in selects if 'FROM "medications_medicationintake"' in sql]), 1, selects)
+        self.assertFalse([sql for sql in selects if 'FROM "medications_prescription"' in sql], selects)
+
+    def test_rollups_follow_status_changes(self):
+        self.intake.status = 'taken'
+        self.intake.save()
+        self.intake.status = 'missed'
+        self.intake.save()
+        rollup = DailyComplianceRollup.objects.get(prescription=self.prescription)
+        self.assertEqual((rollup.scheduled_count, rollup.taken_count, rollup.missed_count), (1, 0, 1))
+        self.assertEqual(self.intake.patient_id, self.prescription.patient_id)
+
+
+class ScheduleNoteIndexTests(TestCase):
+    def setUp(self):
+        patient = User.objects.create(username='note-patient', user_type='patient')
+        prescription = Prescription.objects.create(
+            patient=patient, medication=Medication.objects.create(name='Note test'),
+            prescribing_physician='Dr. Test', dosage='1 tablet', frequency='once_daily',
+            start_date=timezone.now().date(), created_by=patient,
+        )
+        self.schedule = DailyMedicationSchedule.objects.create(
+            prescription=prescription, patient=patient, date=timezone.now().date(), time_slot=time(8), notes='Felt dizzy',
+        )
+
+    def index_writes(self, save):
+        with mock.patch.object(text_search, 'index_note') as index_note:
+            save()
+        return index_note.call_count
+
+    def test_bookkeeping_saves_do_not_reindex(self):
+        schedule = DailyMedicationSchedule.objects.get(pk=self.schedule.pk)
+        schedule.email_sent = True
+        self.assertEqual(self.index_writes(lambda: schedule.save(update_fields=['email_sent'])), 0)
+        schedule.is_taken = True
+        self.assertEqual(self.index_writes(schedule.save), 0)
+
+    def test_note_changes_reindex(self):
+        schedule = DailyMedicationSchedule.objects.get(pk=self.schedule.pk)
+        schedule.notes = 'Felt better'
+        self.assertEqual(self.index_writes(schedule.save), 1)
+        self.assertEqual(self.index_writes(schedule.save), 0)
+
+
+class PrescriptionPatientTests(TestCase):
+    def setUp(self):
+        self.prescriptions = [
+            Prescription.objects.create(
+                patient=patient, medication=Medication.objects.create(name=f"Move test {patient.username}"),
+                prescribing_physician='Dr. Test', dosage='1 tablet', frequency='once_daily',
+                start_date=timezone.now().date(), created_by=patient,
+            )
+            for patient in (User.objects.create(username=f"move-patient-{i}", user_type='patient') for i in range(2))
+        ]
+
+    def test_moving_to_another_prescription_stores_its_patient(self):
+        first, second = self.prescriptions
+        rows = [
+            DailyMedicationSchedule.objects.create(prescription=first, date=timezone.now().date(), time_slot=time(8)),
+            MedicationIntake.objects.create(prescription=first, scheduled_datetime=timezone.now()),
+        ]
+        for row in rows:
+            row.prescription = second
+            row.save(update_fields=['prescription'])
+            row.refresh_from_db()
+            self.assertEqual(row.patient_id, second.patient_id)
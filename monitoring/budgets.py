@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+from django.urls import URLResolver, resolve
+
+from .queries import record_queries
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(limit):
+    """Declare the most queries a function view may run; class-based views set
+    a `query_budget` attribute instead. The instrumentation middleware logs
+    requests over budget and monitoring's test suite fails on them."""
+
+    def decorate(view):
+        view.query_budget = limit
+        return view
+
+    return decorate
+
+
+def view_budget(view):
+    """The budget declared on a view function or its view class, or None"""
+    budget = getattr(view, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(view, 'view_class', None), 'query_budget', None)
+    return budget
+
+
+def budgeted_views(patterns, namespace=''):
+    """(url name, pattern, budget) for every named URL whose view declares a budget"""
+    for entry in patterns:
+        if isinstance(entry, URLResolver):
+            child = ':'.join(filter(None, [namespace, entry.namespace]))
+            yield from budgeted_views(entry.url_patterns, child)
+        elif entry.name and view_budget(entry.callback) is not None:
+            name = f"{namespace}:{entry.name}" if namespace else entry.name
+            yield name, entry.pattern, view_budget(entry.callback)
+
+
+@contextmanager
+def assert_max_queries(limit, label='block'):
+    """Fail if the block runs more than `limit` queries, listing the repeated
+    statements (the usual culprit) in the error"""
+    with record_queries(label) as record:
+        yield record
+    if record.count > limit:
+        repeated = ''.join(f"\n    {count}x {sql[:300]}" for sql, count in record.duplicates())
+        raise QueryBudgetExceeded(f"{label} ran {record.count} queries, budget is {limit}{repeated}")
+
+
+def assert_view_budget(client, path, **extra):
+    """GET `path` with a test client and fail if the view it resolves to runs
+    more queries than its declared budget; returns the response"""
+    match = resolve(path.split('?')[0])
+    budget = view_budget(match.func)
+    if budget is None:
+        raise ValueError(f"{match.view_name} declares no query budget")
+    with assert_max_queries(budget, label=match.view_name):
+        response = client.get(path, **extra)
+    return response
@@ -0,0 +1,296 @@
+from contextlib import contextmanager
+from django.conf import settings
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+
+from celery.signals import worker_process_shutdown
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Values of exited processes, and the lock guarding it
+AGGREGATE_FILE = 'aggregate.json'
+LOCK_FILE = '.lock'
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, help, labels=()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[label]) for label in self.labels)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        def apply(value):
+            return (value or 0) + amount
+        self.registry.update(self, self.key(labels), apply)
+
+
+class Gauge(Metric):
+    """A current value. Across processes the most recently set value wins."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        self.registry.update(self, self.key(labels), lambda current: [value, time.time()])
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        def apply(current):
+            # Per-bucket (not cumulative) counts, then sum and count
+            current = current or [0] * (len(self.buckets) + 3)
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            current[index] += 1
+            current[-2] += value
+            current[-1] += 1
+            return current
+        self.registry.update(self, self.key(labels), apply)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+def merge(kind, current, other):
+    if current is None:
+        return other
+    if kind == 'counter':
+        return current + other
+    if kind == 'gauge':
+        return max(current, other, key=lambda value: value[1])
+    return [a + b for a, b in zip(current, other)]
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms in the Prometheus text format.
+
+    Updates only touch this process's memory. Each process writes its values
+    to its own file in METRICS_DIR at most every `flush_interval` seconds and
+    the /metrics view sums every file, so Celery prefork children and
+    gunicorn workers are reported as one. On exit a process folds its values
+    into a shared aggregate file under a file lock and removes its own file,
+    so counters never go backwards and the directory holds one file per live
+    process. Processes that are killed leave their file behind; clear the
+    directory when deploying. Without METRICS_DIR only this process is
+    reported.
+    """
+
+    def __init__(self, directory=None, flush_interval=5):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.metrics = {}
+        self.reset()
+
+    def reset(self):
+        self.values = {}
+        self.lock = threading.Lock()
+        self.timer = None
+        # Unique per process, so a reused pid never overwrites an old process's file
+        self.process_id = f"{os.getpid()}-{time.time_ns()}"
+
+    def register(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if existing.kind != metric.kind or existing.labels != metric.labels:
+                raise ValueError(f"Metric {metric.name} is already registered differently")
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(self, name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self.register(Gauge(self, name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(self, name, help, labels, buckets))
+
+    def update(self, metric, key, apply):
+        with self.lock:
+            samples = self.values.setdefault(metric.name, {})
+            samples[key] = apply(samples.get(key))
+            if self.directory and self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def snapshot(self):
+        with self.lock:
+            return {name: [[list(key), value] for key, value in samples.items()] for name, samples in self.values.items()}
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def locked(self, operation):
+        """Hold the metrics directory's file lock, shared by every process"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(LOCK_FILE), 'a') as handle:
+            fcntl.flock(handle, operation)
+            yield
+        # Closing the file releases the lock
+
+    def write(self, name, snapshot):
+        with tempfile.NamedTemporaryFile('w', dir=self.directory, suffix='.tmp', delete=False) as handle:
+            json.dump(snapshot, handle)
+        # Readers see either the old file or the new one, never a partial write
+        os.replace(handle.name, self.path(name))
+
+    def flush(self):
+        """Write this process's values to its file in the metrics directory"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self.write(f"{self.process_id}.json", self.snapshot())
+        except OSError as e:
+            logger.error(f"Could not write metrics to {self.directory}: {e}")
+
+    def retire(self):
+        """Fold this process's values into the aggregate file and remove its
+        own file. Called on exit; values recorded afterwards start from zero."""
+        if not self.directory:
+            return
+        # Updates wait until the fold is done, so none is counted twice or lost
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            try:
+                with self.locked(fcntl.LOCK_EX):
+                    if self.values:
+                        aggregate = self.read(AGGREGATE_FILE) or {}
+                        for name, samples in self.values.items():
+                            kind = self.metrics[name].kind
+                            merged = {tuple(key): value for key, value in aggregate.get(name, [])}
+                            for key, value in samples.items():
+                                merged[key] = merge(kind, merged.get(key), value)
+                            aggregate[name] = [[list(key), value] for key, value in merged.items()]
+                        self.write(AGGREGATE_FILE, aggregate)
+                        self.values = {}
+                    try:
+                        os.remove(self.path(f"{self.process_id}.json"))
+                    except FileNotFoundError:
+                        pass
+            except OSError as e:
+                logger.error(f"Could not fold metrics into {self.directory}: {e}")
+
+    def read(self, name):
+        try:
+            with open(self.path(name)) as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            # Not written yet, or removed or replaced while listing
+            return None
+
+    def collect(self):
+        """{name: {label values: value}} summed over every process"""
+        if not self.directory:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush()
+            # Shared, so an exiting process is never counted in both its own
+            # file and the aggregate, or in neither
+            with self.locked(fcntl.LOCK_SH):
+                snapshots = [self.read(os.path.basename(path)) for path in glob.glob(self.path('*.json'))]
+            snapshots = [snapshot for snapshot in snapshots if snapshot is not None]
+
+        totals = {}
+        for snapshot in snapshots:
+            for name, samples in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                merged = totals.setdefault(name, {})
+                for key, value in samples:
+                    merged[tuple(key)] = merge(metric.kind, merged.get(tuple(key)), value)
+        return totals
+
+    def render(self):
+        """Every registered metric in the Prometheus text exposition format"""
+        totals = self.collect()
+        lines = []
+        for name in sorted(self.metrics):
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(totals.get(name, {}).items()):
+                if metric.kind == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (math.inf,), value):
+                        cumulative += count
+                        labels = format_labels(metric.labels, key, [('le', format_value(bound))])
+                        lines.append(f"{name}_bucket{labels} {cumulative}")
+                    labels = format_labels(metric.labels, key)
+                    lines.append(f"{name}_sum{labels} {format_value(value[-2])}")
+                    lines.append(f"{name}_count{labels} {value[-1]}")
+                else:
+                    sample = value[0] if metric.kind == 'gauge' else value
+                    lines.append(f"{name}{format_labels(metric.labels, key)} {format_value(sample)}")
+        return '\n'.join(lines) + '\n'
+
+
+# Initialize the metrics registry
+metrics = MetricsRegistry(
+    directory=getattr(settings, 'METRICS_DIR', None),
+    flush_interval=getattr(settings, 'METRICS_FLUSH_SECONDS', 5),
+)
+
+# A forked child (Celery prefork) starts from zero under its own file, or it
+# would report the parent's values a second time
+os.register_at_fork(after_in_child=metrics.reset)
+atexit.register(metrics.retire)
+# Prefork children exit without running atexit handlers
+worker_process_shutdown.connect(lambda **kwargs: metrics.retire(), weak=False)
@@ -0,0 +1,33 @@
+from django.conf import settings
+
+from .budgets import view_budget
+from .queries import record_queries, report
+
+
+class QueryInstrumentationMiddleware:
+    """Record each request's query count, SQL time, repeated statements and
+    wall time, and log outliers and requests over their view's query budget.
+
+    Put it first in MIDDLEWARE so session and user lookups are counted.
+    Queries run while a streaming response is consumed are not included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries(request.path) as record:
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            record.label = f"{request.method} {match.view_name}"
+        report(record, budget=getattr(request, 'query_budget', None))
+        if settings.DEBUG:
+            response['Server-Timing'] = (
+                f'db;dur={record.sql_time * 1000:.1f};desc="{record.count} queries", '
+                f'app;dur={record.wall_time * 1000:.1f}'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = view_budget(view_func)
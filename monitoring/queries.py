@@ -0,0 +1,103 @@
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.db import connections
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Defaults for QUERY_INSTRUMENTATION: a request or task is logged as an outlier
+# when it exceeds any of these
+DEFAULT_THRESHOLDS = {
+    'slow_ms': 1000,
+    'max_queries': 50,
+    # The same statement run this often in one request is usually an N+1 loop
+    'duplicate_queries': 5,
+}
+
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+STRING = re.compile(r"'(?:[^']|'')*'")
+VALUE_LIST = re.compile(r'\?(?:\s*,\s*\?)+')
+
+
+def thresholds():
+    return dict(DEFAULT_THRESHOLDS, **getattr(settings, 'QUERY_INSTRUMENTATION', {}))
+
+
+def fingerprint(sql):
+    """The statement with its literal values and placeholders folded, so the
+    same query run for different rows shares one fingerprint"""
+    sql = STRING.sub('?', NUMBER.sub('?', sql.replace('%s', '?')))
+    return VALUE_LIST.sub('?, ...', ' '.join(sql.split()))
+
+
+class QueryRecord:
+    """Query count, SQL time, statement fingerprints and wall time of one
+    request or task. Installed as a database execute_wrapper."""
+
+    def __init__(self, label):
+        self.label = label
+        self.count = 0
+        self.sql_time = 0.0
+        self.fingerprints = Counter()
+        self.started = time.perf_counter()
+        self.wall_time = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def finish(self):
+        self.wall_time = time.perf_counter() - self.started
+
+    def duplicates(self, minimum=2):
+        """[(fingerprint, times run)] for statements run at least `minimum` times"""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= minimum]
+
+    def summary(self):
+        return (
+            f"{self.count} queries, {self.sql_time * 1000:.1f} ms SQL, "
+            f"{(self.wall_time or 0) * 1000:.1f} ms wall"
+        )
+
+
+@contextmanager
+def record_queries(label=''):
+    """Record every query run on this thread's connections inside the block"""
+    record = QueryRecord(label)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(record))
+        try:
+            yield record
+        finally:
+            record.finish()
+
+
+def report(record, budget=None):
+    """Log the record to the outlier log if it is slow, chatty, repetitive or
+    over its query budget; returns the reasons it was logged for"""
+    limits = thresholds()
+    reasons = []
+    if record.wall_time * 1000 >= limits['slow_ms']:
+        reasons.append('slow')
+    if record.count > limits['max_queries']:
+        reasons.append('many queries')
+    duplicates = record.duplicates(limits['duplicate_queries'])
+    if duplicates:
+        reasons.append('duplicate queries')
+    if budget is not None and record.count > budget:
+        reasons.append(f"over budget of {budget}")
+
+    if reasons:
+        lines = [f"{record.label}: {record.summary()} ({', '.join(reasons)})"]
+        lines += [f"    {count}x {sql[:300]}" for sql, count in duplicates[:5]]
+        logger.warning('\n'.join(lines))
+    return reasons
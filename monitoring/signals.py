@@ -0,0 +1,30 @@
+from celery.signals import task_postrun, task_prerun
+from contextlib import ExitStack
+
+from .metrics import metrics
+from .queries import record_queries, report
+
+TASKS = metrics.counter('medcare_celery_tasks_total', 'Celery tasks run, by task and final state', ('task', 'state'))
+TASK_SECONDS = metrics.histogram('medcare_celery_task_seconds', 'Celery task run time', ('task',))
+
+# Open recordings by task id; a worker thread runs one task at a time
+_recordings = {}
+
+
+@task_prerun.connect
+def start_task_recording(task_id=None, task=None, **kwargs):
+    stack = ExitStack()
+    record = stack.enter_context(record_queries(f"task {task.name}"))
+    _recordings[task_id] = (stack, record)
+
+
+@task_postrun.connect
+def finish_task_recording(task_id=None, task=None, state=None, **kwargs):
+    recording = _recordings.pop(task_id, None)
+    if recording is None:
+        return
+    stack, record = recording
+    stack.close()
+    report(record, budget=getattr(task, 'query_budget', None))
+    TASKS.inc(task=task.name, state=state or 'UNKNOWN')
+    TASK_SECONDS.observe(record.wall_time, task=task.name)
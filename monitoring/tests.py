@@ -0,0 +1,88 @@
+from django.test import TestCase
+from django.urls import get_resolver, reverse
+import os
+import shutil
+import tempfile
+
+from medications.models import DailyMedicationSchedule, MedicationFeedback
+from reports.models import ProgressReport
+from reports.query_plans import seed
+from .budgets import QueryBudgetExceeded, assert_max_queries, assert_view_budget, budgeted_views
+from .metrics import AGGREGATE_FILE, MetricsRegistry
+
+
+class QueryBudgetTests(TestCase):
+    """GET every view that declares a query budget, as staff and as a patient,
+    and fail if any runs over it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = seed(patients=20, days=3, notifications=500)
+        cls.staff = type(cls.patient).objects.create(username='budget-staff', user_type='admin')
+        schedules = list(DailyMedicationSchedule.objects.filter(patient=cls.patient)[:20])
+        # Read feedback, so the inbox renders the reader as well as the patient
+        feedback = MedicationFeedback.objects.bulk_create([
+            MedicationFeedback(daily_schedule=schedule, feedback_type='question', message=f"Sample question {i}",
+                               is_read=i % 2 == 0, read_by=cls.staff if i % 2 == 0 else None)
+            for i, schedule in enumerate(schedules)
+        ])
+        cls.samples = {
+            'patient_id': cls.patient.pk,
+            'report_id': ProgressReport.objects.filter(patient=cls.patient).first().public_id,
+            'feedback_id': feedback[0].pk,
+            'dataset': 'intakes',
+        }
+
+    def test_views_stay_within_their_query_budgets(self):
+        views = list(budgeted_views(get_resolver().url_patterns))
+        self.assertTrue(views)
+        for name, pattern, budget in views:
+            kwargs = {key: self.samples[key] for key in getattr(pattern, 'converters', {})}
+            # Staff name the patient a patient-scoped view is about
+            path = f"{reverse(name, kwargs=kwargs)}?patient={self.patient.pk}"
+            for user in (self.staff, self.patient):
+                with self.subTest(view=name, user=user.user_type):
+                    self.client.force_login(user)
+                    assert_view_budget(self.client, path)
+
+    def test_repeated_statements_are_listed_when_over_budget(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, '3x'):
+            with assert_max_queries(2, label='loop'):
+                for _ in range(3):
+                    list(ProgressReport.objects.filter(patient=self.patient))
+
+
+class MetricsRegistryTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def process(self):
+        """A registry as one worker process would build it"""
+        registry = MetricsRegistry(directory=self.directory, flush_interval=60)
+        self.addCleanup(lambda: registry.timer and registry.timer.cancel())
+        registry.tasks = registry.counter('tasks_total', 'Tasks', ('state',))
+        registry.seconds = registry.histogram('task_seconds', 'Task time', buckets=(1,))
+        registry.last_run = registry.gauge('last_run', 'Last run')
+        return registry
+
+    def test_exited_processes_are_folded_into_the_aggregate(self):
+        first, second = self.process(), self.process()
+        first.tasks.inc(2, state='ok')
+        first.seconds.observe(0.5)
+        first.last_run.set(100)
+        first.flush()
+        first.retire()
+        self.assertEqual(sorted(name for name in os.listdir(self.directory) if name.endswith('.json')), [AGGREGATE_FILE])
+
+        second.tasks.inc(3, state='ok')
+        second.seconds.observe(2)
+        totals = second.collect()
+        self.assertEqual(totals['tasks_total'][('ok',)], 5)
+        self.assertEqual(totals['task_seconds'][()], [1, 1, 2.5, 2])
+        self.assertEqual(totals['last_run'][()][0], 100)
+
+        second.retire()
+        second.retire()
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.endswith('.json')]), 1)
+        self.assertEqual(self.process().collect()['tasks_total'][('ok',)], 5)
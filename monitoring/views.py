@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+import hmac
+
+from .metrics import metrics
+
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+@require_GET
+def metrics_view(request):
+    """Prometheus scrape endpoint. Requires METRICS_TOKEN as a bearer token
+    when one is configured, and otherwise only answers localhost."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            return HttpResponseForbidden()
+    elif request.META.get('REMOTE_ADDR') not in LOCAL_ADDRESSES:
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,14 +1,38 @@
 from django.contrib import admin
-from .models import SMSNotification, NotificationTemplate
+from django.utils.html import format_html
+from .models import EmailNotification, SMSNotification, NotificationTemplate
 
 @admin.register(SMSNotification)
 class SMSNotificationAdmin(admin.ModelAdmin):
     list_display = ('recipient', 'notification_type', 'status', 'scheduled_at', 'sent_at')
     list_filter = ('notification_type', 'status', 'scheduled_at')
     search_fields = ('recipient__username', 'recipient__first_name', 'recipient__last_name', 'phone_number')
-    readonly_fields = ('id', 'twilio_sid', 'sent_at', 'created_at')
+    readonly_fields = ('public_id', 'twilio_sid', 'sent_at', 'created_at')
     raw_id_fields = ('recipient',)
 
+@admin.register(EmailNotification)
+class EmailNotificationAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'notification_type', 'status', 'scheduled_at', 'sent_at')
+    list_filter = ('notification_type', 'status', 'scheduled_at')
+    search_fields = ('recipient__username', 'recipient__first_name', 'recipient__last_name', 'email_address', 'subject')
+    fields = ('recipient', 'email_address', 'subject', 'notification_type', 'status', 'template_key',
+              'template_version', 'context', 'rendered_text', 'rendered_html', 'error_message',
+              'public_id', 'scheduled_at', 'sent_at', 'created_at')
+    readonly_fields = ('template_key', 'template_version', 'context', 'rendered_text', 'rendered_html',
+                       'public_id', 'sent_at', 'created_at')
+    raw_id_fields = ('recipient',)
+
+    @admin.display(description='Text')
+    def rendered_text(self, obj):
+        return format_html('<pre style="white-space: pre-wrap">{}</pre>', obj.text)
+
+    @admin.display(description='HTML')
+    def rendered_html(self, obj):
+        # Rendered in a sandboxed frame so the email's styles stay out of the admin page
+        if not obj.html:
+            return '—'
+        return format_html('<iframe sandbox srcdoc="{}" style="width: 100%; height: 400px; border: 1px solid #ccc"></iframe>', obj.html)
+
 @admin.register(NotificationTemplate)
 class NotificationTemplateAdmin(admin.ModelAdmin):
     list_display = ('name', 'notification_type', 'is_active', 'created_at')
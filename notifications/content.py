@@ -0,0 +1,59 @@
+from django.template.loader import render_to_string
+import zlib
+
+# Email bodies are stored by reference: a template key and version plus the
+# context they were rendered with. Published versions must never change, so a
+# past email renders exactly as it was sent; to change the wording, add a
+# template version and point CURRENT_VERSIONS at it.
+EMAIL_TEMPLATES = {
+    ('medication_reminder', 1): "Ukumbusho wa Dawa - {medication}",
+    ('missed_medication', 1): "Onyo la Dawa - {medication}",
+    ('medication_confirmation', 1): "Dawa Imetumika - {medication}",
+}
+
+CURRENT_VERSIONS = {
+    'medication_reminder': 1,
+    'missed_medication': 1,
+    'medication_confirmation': 1,
+}
+
+
+class UnknownTemplate(LookupError):
+    pass
+
+
+def template_name(key, version, extension):
+    return f"notifications/email/{key}_v{version}.{extension}"
+
+
+def render_subject(key, version, context):
+    if (key, version) not in EMAIL_TEMPLATES:
+        raise UnknownTemplate(f"No email template {key} v{version}")
+    return EMAIL_TEMPLATES[(key, version)].format(**context)
+
+
+def render_text(key, version, context):
+    return render_to_string(template_name(key, version, 'txt'), context).strip()
+
+
+def render_html(key, version, context):
+    return render_to_string(template_name(key, version, 'html'), context)
+
+
+def compress_body(text):
+    """Plain-text body for the compressed column (one-off messages and text overrides)"""
+    return zlib.compress(text.encode('utf-8'), 9)
+
+
+def decompress_body(data):
+    return zlib.decompress(bytes(data)).decode('utf-8')
+
+
+def email_text(body, template_key, template_version, context, message):
+    """Plain-text body of a stored email: the compressed body if it has one,
+    else its template rendered with its context, else the legacy message"""
+    if body is not None:
+        return decompress_body(body)
+    if template_key:
+        return render_text(template_key, template_version, context)
+    return message
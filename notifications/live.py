@@ -0,0 +1,61 @@
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+import asyncio
+import json
+
+from hospital_system.pubsub import broker
+
+KEEPALIVE_SECONDS = 15
+
+
+def format_event(event):
+    data = json.dumps(event['data'], cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+async def event_stream(subscription, patient_id=None, last_event_id=None):
+    """Yield SSE frames until the client goes away; idle clients only get keepalive comments"""
+    def wanted(event):
+        return patient_id is None or event['data'].get('patient_id') == patient_id
+
+    try:
+        yield "retry: 5000\n\n"
+        if last_event_id:
+            for event in broker.replay(last_event_id):
+                if wanted(event):
+                    yield format_event(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if wanted(event):
+                yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def live_feed(request):
+    """Server-sent events of dose and alert activity for staff (?patient=<id> narrows to one patient)"""
+    allowed = await sync_to_async(
+        lambda: request.user.is_authenticated and request.user.can_manage_patients
+    )()
+    if not allowed:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+
+    patient = request.GET.get('patient', '')
+    subscription = await broker.subscribe()
+    response = StreamingHttpResponse(
+        event_stream(
+            subscription,
+            patient_id=int(patient) if patient.isdigit() else None,
+            last_event_id=request.headers.get('Last-Event-ID'),
+        ),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailNotification',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('email_address', models.EmailField(max_length=254)),
+                ('subject', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('html_message', models.TextField(blank=True)),
+                ('notification_type', models.CharField(choices=[('medication_reminder', 'Medication Reminder'), ('missed_medication', 'Missed Medication'), ('treatment_complete', 'Treatment Complete'), ('emergency_alert', 'Emergency Alert'), ('general', 'General Notification'), ('feedback_request', 'Feedback Request')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('scheduled_at', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='notificationtemplate',
+            name='notification_type',
+            field=models.CharField(choices=[('medication_reminder', 'Medication Reminder'), ('missed_medication', 'Missed Medication'), ('treatment_complete', 'Treatment Complete'), ('emergency_alert', 'Emergency Alert'), ('general', 'General Notification'), ('feedback_request', 'Feedback Request')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='smsnotification',
+            name='notification_type',
+            field=models.CharField(choices=[('medication_reminder', 'Medication Reminder'), ('missed_medication', 'Missed Medication'), ('treatment_complete', 'Treatment Complete'), ('emergency_alert', 'Emergency Alert'), ('general', 'General Notification'), ('feedback_request', 'Feedback Request')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='smsnotification',
+            index=models.Index(fields=['-created_at', '-id'], name='notif_sms_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smsnotification',
+            index=models.Index(fields=['recipient', '-created_at', '-id'], name='notif_sms_recipient_idx'),
+        ),
+        migrations.AddField(
+            model_name='emailnotification',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='email_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='emailnotification',
+            index=models.Index(fields=['-created_at', '-id'], name='notif_email_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailnotification',
+            index=models.Index(fields=['recipient', '-created_at', '-id'], name='notif_email_recipient_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_email_notification_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailnotification',
+            index=models.Index(fields=['recipient', 'notification_type'], name='notif_email_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smsnotification',
+            index=models.Index(fields=['status', 'created_at'], name='notif_sms_status_idx'),
+        ),
+    ]
@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+from hospital_system.compact_keys import analyze_table, copy_to_compact_table
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0003_hot_query_indexes'),
+    ]
+
+    # The UUID primary keys move to public_id; rows get BigAutoField keys in
+    # created_at order, so keyset pages keep their order. See
+    # hospital_system.compact_keys.
+    operations = [
+        migrations.CreateModel(
+            name='CompactEmailNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('email_address', models.EmailField(max_length=254)),
+                ('subject', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('html_message', models.TextField(blank=True)),
+                ('notification_type', models.CharField(choices=[('medication_reminder', 'Medication Reminder'), ('missed_medication', 'Missed Medication'), ('treatment_complete', 'Treatment Complete'), ('emergency_alert', 'Emergency Alert'), ('general', 'General Notification'), ('feedback_request', 'Feedback Request')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('scheduled_at', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        copy_to_compact_table('notifications', 'EmailNotification', 'CompactEmailNotification'),
+        migrations.DeleteModel(
+            name='EmailNotification',
+        ),
+        migrations.RenameModel(
+            old_name='CompactEmailNotification',
+            new_name='EmailNotification',
+        ),
+        migrations.AlterField(
+            model_name='emailnotification',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='email_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='emailnotification',
+            index=models.Index(fields=['-created_at', '-id'], name='notif_email_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailnotification',
+            index=models.Index(fields=['recipient', '-created_at', '-id'], name='notif_email_recipient_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailnotification',
+            index=models.Index(fields=['recipient', 'notification_type'], name='notif_email_type_idx'),
+        ),
+        migrations.CreateModel(
+            name='CompactSMSNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('phone_number', models.CharField(max_length=17)),
+                ('message', models.TextField()),
+                ('notification_type', models.CharField(choices=[('medication_reminder', 'Medication Reminder'), ('missed_medication', 'Missed Medication'), ('treatment_complete', 'Treatment Complete'), ('emergency_alert', 'Emergency Alert'), ('general', 'General Notification'), ('feedback_request', 'Feedback Request')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('scheduled_at', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('twilio_sid', models.CharField(blank=True, max_length=50)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        copy_to_compact_table('notifications', 'SMSNotification', 'CompactSMSNotification'),
+        migrations.DeleteModel(
+            name='SMSNotification',
+        ),
+        migrations.RenameModel(
+            old_name='CompactSMSNotification',
+            new_name='SMSNotification',
+        ),
+        migrations.AlterField(
+            model_name='smsnotification',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='smsnotification',
+            index=models.Index(fields=['-created_at', '-id'], name='notif_sms_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smsnotification',
+            index=models.Index(fields=['recipient', '-created_at', '-id'], name='notif_sms_recipient_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smsnotification',
+            index=models.Index(fields=['status', 'created_at'], name='notif_sms_status_idx'),
+        ),
+        analyze_table('notifications', 'EmailNotification'),
+        analyze_table('notifications', 'SMSNotification'),
+    ]
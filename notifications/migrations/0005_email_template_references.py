@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_compact_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailnotification',
+            name='body',
+            field=models.BinaryField(blank=True, help_text='zlib-compressed plain text of one-off messages', null=True),
+        ),
+        migrations.AddField(
+            model_name='emailnotification',
+            name='context',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='emailnotification',
+            name='template_key',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='emailnotification',
+            name='template_version',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='emailnotification',
+            name='message',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 import uuid
 
+from .content import email_text, render_html
+
 User = get_user_model()
 
 class EmailNotification(models.Model):
@@ -21,11 +23,17 @@ class EmailNotification(models.Model):
         ('failed', 'Failed'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    public_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='email_notifications')
     email_address = models.EmailField()
     subject = models.CharField(max_length=200)
-    message = models.TextField()
+    # Bodies are stored by template reference (see notifications.content) and
+    # rendered on demand; message/html_message only hold emails sent before that
+    template_key = models.CharField(max_length=50, blank=True)
+    template_version = models.PositiveSmallIntegerField(null=True, blank=True)
+    context = models.JSONField(default=dict, blank=True)
+    body = models.BinaryField(null=True, blank=True, help_text="zlib-compressed plain text of one-off messages")
+    message = models.TextField(blank=True)
     html_message = models.TextField(blank=True)
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
@@ -37,8 +45,26 @@ class EmailNotification(models.Model):
     def __str__(self):
         return f"{self.notification_type} to {self.recipient.get_full_name()}"
     
+    @property
+    def text(self):
+        """The plain-text body as sent"""
+        return email_text(self.body, self.template_key, self.template_version, self.context, self.message)
+    
+    @property
+    def html(self):
+        """The HTML body as sent, or '' for plain-text emails"""
+        if self.template_key:
+            return render_html(self.template_key, self.template_version, self.context)
+        return self.html_message
+    
     class Meta:
         ordering = ['-created_at']
+        # Keyset pagination reads (created_at, id) ranges: all, and per recipient
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='notif_email_created_idx'),
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notif_email_recipient_idx'),
+            models.Index(fields=['recipient', 'notification_type'], name='notif_email_type_idx'),
+        ]
 
 class SMSNotification(models.Model):
     NOTIFICATION_TYPES = [
@@ -57,7 +83,7 @@ class SMSNotification(models.Model):
         ('failed', 'Failed'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    public_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     phone_number = models.CharField(max_length=17)
     message = models.TextField()
@@ -74,6 +100,11 @@ class SMSNotification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='notif_sms_created_idx'),
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notif_sms_recipient_idx'),
+            models.Index(fields=['status', 'created_at'], name='notif_sms_status_idx'),
+        ]
 
 class NotificationTemplate(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -5,10 +5,22 @@ from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from twilio.rest import Client
+from .content import CURRENT_VERSIONS, compress_body, render_subject
 from .models import SMSNotification, EmailNotification, NotificationTemplate
+from .status_buffer import status_buffer
+from monitoring.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+NOTIFICATIONS_SENT = metrics.counter(
+    'medcare_notifications_total', 'Notifications sent, by channel, type and outcome',
+    ('channel', 'type', 'status'),
+)
+SEND_SECONDS = metrics.histogram(
+    'medcare_notification_send_seconds', 'Time spent handing a notification to the mail server or Twilio',
+    ('channel',),
+)
+
 class NotificationService:
     def __init__(self):
         self.twilio_client = None
@@ -20,37 +32,63 @@ class NotificationService:
     
     def send_email_notification(self, email_address, subject, message, html_message=None, 
                               notification_type='general', recipient=None):
-        """Send email notification and log it to the DB."""
+        """Send a one-off email and log it to the DB, the body compressed."""
         # Create the notification record
         notification = EmailNotification.objects.create(
             recipient=recipient,
             email_address=email_address,
             subject=subject,
-            message=message,
+            body=compress_body(message),
             html_message=html_message or '',
             notification_type=notification_type,
             scheduled_at=timezone.now()
         )
+        return self.deliver_email(notification, message, html_message)
+
+    def send_template_email(self, email_address, template_key, context, notification_type, recipient=None, text=None):
+        """Send a templated email and log it by template reference and context.
+
+        `text` replaces the template's plain-text body (e.g. an admin-edited
+        NotificationTemplate); it cannot be re-rendered, so it is stored compressed.
+        """
+        version = CURRENT_VERSIONS[template_key]
+        notification = EmailNotification.objects.create(
+            recipient=recipient,
+            email_address=email_address,
+            subject=render_subject(template_key, version, context),
+            template_key=template_key,
+            template_version=version,
+            context=context,
+            body=compress_body(text) if text is not None else None,
+            notification_type=notification_type,
+            scheduled_at=timezone.now()
+        )
+        return self.deliver_email(notification, notification.text, notification.html)
 
+    def deliver_email(self, notification, message, html_message):
+        email_address = notification.email_address
         try:
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email_address],
-                html_message=html_message,
-                fail_silently=False,
-            )
+            with SEND_SECONDS.time(channel='email'):
+                send_mail(
+                    subject=notification.subject,
+                    message=message,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    recipient_list=[email_address],
+                    html_message=html_message or None,
+                    fail_silently=False,
+                )
             notification.status = 'sent'
             notification.sent_at = timezone.now()
-            notification.save(update_fields=['status', 'sent_at'])
+            status_buffer.add(notification, ['status', 'sent_at'])
+            NOTIFICATIONS_SENT.inc(channel='email', type=notification.notification_type, status='sent')
             logger.info(f"Email sent to {email_address}")
             return True
         except Exception as e:
             logger.error(f"Email send failed to {email_address}: {e}")
             notification.status = 'failed'
             notification.error_message = str(e)
-            notification.save(update_fields=['status', 'error_message'])
+            status_buffer.add(notification, ['status', 'error_message'])
+            NOTIFICATIONS_SENT.inc(channel='email', type=notification.notification_type, status='failed')
             return False
 
     def send_sms_notification(self, phone_number, message, notification_type='general', recipient=None):
@@ -68,163 +106,89 @@ class NotificationService:
             logger.warning("Twilio client not configured, simulating SMS send")
             notification.status = 'sent'
             notification.sent_at = timezone.now()
-            notification.twilio_sid = 'simulated_' + str(notification.id)[:8]
-            notification.save(update_fields=['status', 'sent_at', 'twilio_sid'])
+            notification.twilio_sid = 'simulated_' + str(notification.public_id)[:8]
+            status_buffer.add(notification, ['status', 'sent_at', 'twilio_sid'])
+            NOTIFICATIONS_SENT.inc(channel='sms', type=notification_type, status='simulated')
             logger.info(f"Simulated SMS sent to {phone_number}: {message}")
             return True
 
         try:
-            message_obj = self.twilio_client.messages.create(
-                body=message,
-                from_=settings.TWILIO_PHONE_NUMBER,
-                to=phone_number
-            )
+            with SEND_SECONDS.time(channel='sms'):
+                message_obj = self.twilio_client.messages.create(
+                    body=message,
+                    from_=settings.TWILIO_PHONE_NUMBER,
+                    to=phone_number
+                )
             notification.status = 'sent'
             notification.sent_at = timezone.now()
             notification.twilio_sid = message_obj.sid
-            notification.save(update_fields=['status', 'sent_at'])
+            status_buffer.add(notification, ['status', 'sent_at', 'twilio_sid'])
+            NOTIFICATIONS_SENT.inc(channel='sms', type=notification_type, status='sent')
             logger.info(f"SMS sent to {phone_number}")
             return True
         except Exception as e:
             logger.error(f"SMS send failed to {phone_number}: {e}")
             notification.status = 'failed'
             notification.error_message = str(e)
-            notification.save(update_fields=['status', 'error_message'])
+            status_buffer.add(notification, ['status', 'error_message'])
+            NOTIFICATIONS_SENT.inc(channel='sms', type=notification_type, status='failed')
             return False
 
     def send_medication_reminder_email(self, prescription, scheduled_datetime):
         """Send a medication reminder email."""
+        context = {
+            'patient_name': prescription.patient.get_full_name(),
+            'medication': prescription.medication.name,
+            'dosage': prescription.dosage,
+            'time': scheduled_datetime.strftime('%I:%M %p'),
+        }
         tpl = NotificationTemplate.objects.filter(
             notification_type='medication_reminder', is_active=True
         ).first()
 
+        text = None
         if tpl:
-            message = tpl.template.format(
-                patient_name=prescription.patient.get_full_name(),
-                medication_name=prescription.medication.name,
-                dosage=prescription.dosage,
-                time=scheduled_datetime.strftime('%I:%M %p')
-            )
-        else:
-            message = (
-                f"Habari {prescription.patient.get_full_name()},\n\n"
-                f"Hii ni ukumbusho wa kutumia dawa yako:\n"
-                f"Dawa: {prescription.medication.name}\n"
-                f"Kipimo: {prescription.dosage}\n"
-                f"Muda: {scheduled_datetime.strftime('%I:%M %p')}\n\n"
-                f"Tafadhali tumia dawa yako kwa wakati na uthibitishe kupitia mfumo wetu.\n\n"
-                f"Asante,\nTimu ya MedCare"
+            text = tpl.template.format(
+                patient_name=context['patient_name'],
+                medication_name=context['medication'],
+                dosage=context['dosage'],
+                time=context['time']
             )
 
-        subject = f"Ukumbusho wa Dawa - {prescription.medication.name}"
-        
-        # Create HTML version
-        html_message = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: #2563EB;">🏥 MedCare - Ukumbusho wa Dawa</h2>
-                <p>Habari <strong>{prescription.patient.get_full_name()}</strong>,</p>
-                <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                    <h3 style="color: #059669; margin-top: 0;">Muda wa Dawa Umefika!</h3>
-                    <p><strong>Dawa:</strong> {prescription.medication.name}</p>
-                    <p><strong>Kipimo:</strong> {prescription.dosage}</p>
-                    <p><strong>Muda:</strong> {scheduled_datetime.strftime('%I:%M %p')}</p>
-                </div>
-                <p>Tafadhali tumia dawa yako kwa wakati na uthibitishe kupitia mfumo wetu.</p>
-                <p style="margin-top: 30px;">Asante,<br><strong>Timu ya MedCare</strong></p>
-            </div>
-        </body>
-        </html>
-        """
-
-        return self.send_email_notification(
+        return self.send_template_email(
             email_address=prescription.patient.email,
-            subject=subject,
-            message=message,
-            html_message=html_message,
+            template_key='medication_reminder',
+            context=context,
             notification_type='medication_reminder',
-            recipient=prescription.patient
+            recipient=prescription.patient,
+            text=text
         )
 
     def send_missed_medication_alert_email(self, prescription, scheduled_datetime):
         """Send a missed medication alert email."""
-        subject = f"Onyo la Dawa - {prescription.medication.name}"
-        
-        message = (
-            f"Habari {prescription.patient.get_full_name()},\n\n"
-            f"Umesahau kutumia dawa yako:\n"
-            f"Dawa: {prescription.medication.name}\n"
-            f"Muda uliokuwa umepangwa: {scheduled_datetime.strftime('%I:%M %p')}\n\n"
-            f"Tafadhali tumia dawa yako haraka iwezekanavyo na uthibitishe kupitia mfumo wetu.\n\n"
-            f"Asante,\nTimu ya MedCare"
-        )
-        
-        html_message = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: #DC2626;">⚠️ MedCare - Onyo la Dawa</h2>
-                <p>Habari <strong>{prescription.patient.get_full_name()}</strong>,</p>
-                <div style="background-color: #fef2f2; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #DC2626;">
-                    <h3 style="color: #DC2626; margin-top: 0;">Umesahau Dawa Yako!</h3>
-                    <p><strong>Dawa:</strong> {prescription.medication.name}</p>
-                    <p><strong>Muda uliokuwa umepangwa:</strong> {scheduled_datetime.strftime('%I:%M %p')}</p>
-                </div>
-                <p>Tafadhali tumia dawa yako haraka iwezekanavyo na uthibitishe kupitia mfumo wetu.</p>
-                <p style="margin-top: 30px;">Asante,<br><strong>Timu ya MedCare</strong></p>
-            </div>
-        </body>
-        </html>
-        """
-
-        return self.send_email_notification(
+        return self.send_template_email(
             email_address=prescription.patient.email,
-            subject=subject,
-            message=message,
-            html_message=html_message,
+            template_key='missed_medication',
+            context={
+                'patient_name': prescription.patient.get_full_name(),
+                'medication': prescription.medication.name,
+                'time': scheduled_datetime.strftime('%I:%M %p'),
+            },
             notification_type='missed_medication',
             recipient=prescription.patient
         )
 
     def send_medication_confirmation_email(self, prescription, taken_at):
         """Send confirmation email when medication is taken"""
-        subject = f"Dawa Imetumika - {prescription.medication.name}"
-        
-        message = (
-            f"Habari {prescription.patient.get_full_name()},\n\n"
-            f"Tumepokea uthibitisho kwamba umetumia dawa yako:\n"
-            f"Dawa: {prescription.medication.name}\n"
-            f"Kipimo: {prescription.dosage}\n"
-            f"Muda uliotumia: {taken_at.strftime('%I:%M %p')}\n\n"
-            f"Asante kwa kufuata mipango ya dawa. Endelea hivyo!\n\n"
-            f"Asante,\nTimu ya MedCare"
-        )
-        
-        html_message = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: #059669;">✅ MedCare - Dawa Imetumika</h2>
-                <p>Habari <strong>{prescription.patient.get_full_name()}</strong>,</p>
-                <div style="background-color: #f0f9ff; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #059669;">
-                    <h3 style="color: #059669; margin-top: 0;">Dawa Imetumika Kikamilifu!</h3>
-                    <p><strong>Dawa:</strong> {prescription.medication.name}</p>
-                    <p><strong>Kipimo:</strong> {prescription.dosage}</p>
-                    <p><strong>Muda uliotumia:</strong> {taken_at.strftime('%I:%M %p')}</p>
-                </div>
-                <p>Asante kwa kufuata mipango ya dawa. Endelea hivyo!</p>
-                <p style="margin-top: 30px;">Asante,<br><strong>Timu ya MedCare</strong></p>
-            </div>
-        </body>
-        </html>
-        """
-
-        return self.send_email_notification(
+        return self.send_template_email(
             email_address=prescription.patient.email,
-            subject=subject,
-            message=message,
-            html_message=html_message,
+            template_key='medication_confirmation',
+            context={
+                'patient_name': prescription.patient.get_full_name(),
+                'medication': prescription.medication.name,
+                'dosage': prescription.dosage,
+                'time': taken_at.strftime('%I:%M %p'),
+            },
             notification_type='medication_confirmation',
             recipient=prescription.patient
         )
@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from hospital_system.pubsub import broker
+from medications.models import MedicationIntake
+from medications.signals import prescription_details, stored_intake
+from .models import SMSNotification, EmailNotification
+
+# Intake status -> live event pushed to staff dashboards
+DOSE_EVENTS = {
+    'taken': 'dose_taken',
+    'missed': 'dose_missed',
+    'skipped': 'dose_skipped',
+}
+
+ALERT_TYPES = ['missed_medication', 'emergency_alert']
+
+
+def publish_on_commit(event_type, data):
+    transaction.on_commit(lambda: broker.publish(event_type, data))
+
+
+@receiver(post_save, sender=MedicationIntake)
+def publish_dose_event(sender, instance, created, raw=False, **kwargs):
+    if raw or instance.status not in DOSE_EVENTS:
+        return
+    # Compared with the snapshot medications.signals takes before every save
+    stored = None if created else stored_intake(instance)
+    if stored is not None and stored['status'] == instance.status:
+        return
+    details = prescription_details(instance)
+    publish_on_commit(DOSE_EVENTS[instance.status], {
+        'dose_id': instance.public_id,
+        'patient_id': instance.patient_id,
+        'patient_name': f"{details.get('patient__first_name', '')} {details.get('patient__last_name', '')}".strip(),
+        'medication': details.get('medication__name'),
+        'dosage': details.get('dosage'),
+        'priority': details.get('priority'),
+        'status': instance.status,
+        'scheduled_at': instance.scheduled_datetime,
+        'at': instance.actual_datetime,
+    })
+
+
+@receiver(post_save, sender=SMSNotification)
+@receiver(post_save, sender=EmailNotification)
+def publish_alert_event(sender, instance, created, raw=False, **kwargs):
+    if raw or not created or instance.notification_type not in ALERT_TYPES:
+        return
+    publish_on_commit('alert', {
+        'patient_id': instance.recipient_id,
+        'type': instance.notification_type,
+        'channel': 'sms' if sender is SMSNotification else 'email',
+        'message': (instance.message if sender is SMSNotification else instance.text)[:200],
+        'at': instance.created_at,
+    })
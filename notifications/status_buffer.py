@@ -0,0 +1,103 @@
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.conf import settings
+from django.db import connection, transaction
+import atexit
+import logging
+import threading
+
+from hospital_system.cache_versions import bump
+
+logger = logging.getLogger(__name__)
+
+
+class StatusWriteBuffer:
+    """Coalesce notification status writes (status, sent_at, twilio_sid,
+    error_message) into one bulk_update transaction per batch.
+
+    Each send would otherwise commit its own UPDATE right after its INSERT;
+    on SQLite every commit takes the database lock, so a sweep run by several
+    workers queues up on it. Outcomes are kept in memory and flushed when
+    `batch_size` are pending, `flush_interval_ms` after the first one was
+    added, and when the process or Celery worker shuts down.
+
+    bulk_update sends no post_save, so the flush bumps the API cache version
+    of each recipient itself.
+    """
+
+    def __init__(self, batch_size=100, flush_interval_ms=500):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def add(self, notification, fields):
+        """Queue the notification's current values of `fields` for writing"""
+        with self.lock:
+            key = (type(notification), notification.pk)
+            _, queued_fields = self.pending.get(key, (notification, set()))
+            self.pending[key] = (notification, queued_fields | set(fields))
+            full = len(self.pending) >= self.batch_size
+            if not full:
+                self.schedule_flush()
+        if full:
+            self.flush()
+
+    def schedule_flush(self):
+        """Start the flush timer unless one is running; call with the lock held"""
+        if self.timer is None:
+            self.timer = threading.Timer(self.flush_interval, self.flush_on_timer)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """Write every pending outcome; returns the number of rows written"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not pending:
+            return 0
+
+        by_model = {}
+        for (model, _), (notification, fields) in pending.items():
+            objs, model_fields = by_model.setdefault(model, ([], set()))
+            objs.append(notification)
+            model_fields |= fields
+        try:
+            with transaction.atomic():
+                for model, (objs, fields) in by_model.items():
+                    model.objects.bulk_update(objs, sorted(fields), batch_size=self.batch_size)
+        except Exception as e:
+            logger.error(f"Notification status flush failed, {len(pending)} kept for retry: {e}")
+            with self.lock:
+                # Outcomes queued since are newer than the failed ones
+                for key, entry in pending.items():
+                    self.pending.setdefault(key, entry)
+                # Retry even if nothing else is added
+                self.schedule_flush()
+            return 0
+
+        for recipient_id in {notification.recipient_id for notification, _ in pending.values()}:
+            bump(f"notifications:{recipient_id}")
+        logger.debug(f"Flushed {len(pending)} notification status updates")
+        return len(pending)
+
+    def flush_on_timer(self):
+        with self.lock:
+            self.timer = None
+        try:
+            self.flush()
+        finally:
+            # The timer thread opened its own database connection
+            connection.close()
+
+
+# Initialize the status write buffer
+status_buffer = StatusWriteBuffer(**getattr(settings, 'NOTIFICATION_STATUS_BUFFER', {}))
+
+atexit.register(status_buffer.flush)
+# Prefork children exit without running atexit handlers
+worker_process_shutdown.connect(lambda **kwargs: status_buffer.flush(), weak=False)
+worker_shutdown.connect(lambda **kwargs: status_buffer.flush(), weak=False)
@@ -110,7 +110,7 @@ def check_missed_medications_sms():
             logger.warning("Twilio client not configured, simulating SMS send")
             notification.status = 'sent'
             notification.sent_at = timezone.now()
-            notification.twilio_sid = 'simulated_' + str(notification.id)[:8]
+            notification.twilio_sid = 'simulated_' + str(notification.public_id)[:8]
             notification.save(update_fields=['status', 'sent_at', 'twilio_sid'])
             logger.info(f"Simulated SMS sent to {phone_number}: {message}")
             return True
@@ -0,0 +1,52 @@
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from unittest import mock
+
+from accounts.models import User
+from .models import SMSNotification
+from .status_buffer import StatusWriteBuffer
+
+
+class NotificationHistoryTests(TestCase):
+    def setUp(self):
+        patient = User.objects.create(username='history-patient', user_type='patient')
+        SMSNotification.objects.bulk_create([
+            SMSNotification(recipient=patient, phone_number='+255700000000', message=f"Reminder {i}",
+                            notification_type='general', scheduled_at=timezone.now())
+            for i in range(25)
+        ])
+        self.client.force_login(User.objects.create(username='history-staff', user_type='admin'))
+
+    def test_next_cursor_continues_the_history(self):
+        first = self.client.get(reverse('notifications:history'))
+        rest = self.client.get(reverse('notifications:history'), {'cursor': first.context['next_cursor']})
+        self.assertEqual(len(first.context['notifications']) + len(rest.context['notifications']), 25)
+        self.assertIsNone(rest.context['next_cursor'])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse('notifications:history'), {'cursor': 'NQ'})
+        self.assertEqual(response.status_code, 404)
+
+
+class StatusWriteBufferTests(TestCase):
+    def setUp(self):
+        patient = User.objects.create(username='buffer-patient', user_type='patient')
+        self.notification = SMSNotification.objects.create(
+            recipient=patient, phone_number='+255700000000', message='Reminder',
+            notification_type='general', scheduled_at=timezone.now(),
+        )
+        self.buffer = StatusWriteBuffer(batch_size=10, flush_interval_ms=60000)
+        self.addCleanup(lambda: self.buffer.timer and self.buffer.timer.cancel())
+
+    def test_failed_flush_is_retried_on_a_timer(self):
+        self.notification.status = 'sent'
+        self.buffer.add(self.notification, ['status'])
+        with mock.patch('django.db.models.query.QuerySet.bulk_update', side_effect=DatabaseError('locked')):
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertIsNotNone(self.buffer.timer)
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, 'sent')
@@ -1,9 +1,10 @@
 from django.urls import path
-from . import views
+from . import live, views
 
 app_name = 'notifications'
 
 urlpatterns = [
     path('send-manual/', views.send_manual_notification, name='send_manual'),
     path('history/', views.NotificationHistoryView.as_view(), name='history'),
+    path('live/', live.live_feed, name='live_feed'),
 ]
\ No newline at end of file
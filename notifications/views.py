@@ -5,22 +5,41 @@ from django.views.generic import ListView
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 
-from .models import SMSNotification
+from hospital_system.pagination import KeysetListMixin
+from hospital_system.routers import ReplicaReadMixin
+from .models import EmailNotification, SMSNotification
 from .services import NotificationService
 
 User = get_user_model()
 
-class NotificationHistoryView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+def notification_history(channel):
+    # Email bodies are rendered from their template reference as the page is drawn
+    model = EmailNotification if channel == 'email' else SMSNotification
+    return model.objects.select_related('recipient')
+
+
+class NotificationHistoryView(LoginRequiredMixin, UserPassesTestMixin, ReplicaReadMixin, KeysetListMixin, ListView):
     model = SMSNotification
     template_name = 'notifications/history.html'
     context_object_name = 'notifications'
     paginate_by = 20
+    keyset_ordering = ('-created_at', '-id')
+    query_budget = 5
 
     def test_func(self):
         return self.request.user.can_manage_patients
 
+    @property
+    def channel(self):
+        return 'email' if self.request.GET.get('channel') == 'email' else 'sms'
+
     def get_queryset(self):
-        return SMSNotification.objects.all().order_by('-created_at')
+        return notification_history(self.channel)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['channel'] = self.channel
+        return context
 
 
 @login_required
@@ -51,5 +70,5 @@ def send_manual_notification(request):
 
         return redirect('medications:admin_dashboard')
 
-    patients = User.objects.filter(user_type='patient', is_active=True)
-    return render(request, 'notifications/send_manual.html', {'patients': patients})
+    # Patients are picked through the search API rather than listed in full
+    return render(request, 'notifications/send_manual.html')
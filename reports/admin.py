@@ -1,10 +1,29 @@
 from django.contrib import admin
-from .models import ProgressReport
+from .models import ProgressReport, DailyComplianceRollup, DashboardCounter, ArchiveSegment
 
 @admin.register(ProgressReport)
 class ProgressReportAdmin(admin.ModelAdmin):
     list_display = ('title', 'patient', 'report_type', 'compliance_rate', 'created_at')
     list_filter = ('report_type', 'created_at', 'report_period_start')
     search_fields = ('title', 'patient__username', 'patient__first_name', 'patient__last_name')
-    readonly_fields = ('id', 'created_at')
-    raw_id_fields = ('patient', 'generated_by')
\ No newline at end of file
+    readonly_fields = ('public_id', 'created_at')
+    raw_id_fields = ('patient', 'generated_by')
+
+@admin.register(DailyComplianceRollup)
+class DailyComplianceRollupAdmin(admin.ModelAdmin):
+    list_display = ('patient', 'prescription', 'date', 'scheduled_count', 'taken_count', 'missed_count', 'skipped_count')
+    list_filter = ('date',)
+    search_fields = ('patient__username', 'patient__first_name', 'patient__last_name')
+    readonly_fields = ('updated_at',)
+    raw_id_fields = ('patient', 'prescription')
+
+@admin.register(DashboardCounter)
+class DashboardCounterAdmin(admin.ModelAdmin):
+    list_display = ('name', 'value', 'as_of', 'updated_at')
+    readonly_fields = ('updated_at',)
+
+@admin.register(ArchiveSegment)
+class ArchiveSegmentAdmin(admin.ModelAdmin):
+    list_display = ('dataset', 'period_start', 'period_end', 'row_count', 'size', 'created_at')
+    list_filter = ('dataset',)
+    readonly_fields = ('dataset', 'period_start', 'period_end', 'name', 'row_count', 'size', 'created_at')
@@ -0,0 +1,382 @@
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
+from itertools import groupby
+import gzip
+import json
+import logging
+import posixpath
+import tempfile
+
+from hospital_system.cache_versions import bump
+from hospital_system.pagination import decode_cursor, encode_cursor, InvalidCursor
+from medications.fulltext import document_id, text_search
+from medications.models import DailyMedicationSchedule, MedicationFeedback, MedicationIntake
+from notifications.content import email_text
+from notifications.models import EmailNotification, SMSNotification
+from .counters import dashboard_counters
+from .models import ArchiveBlock, ArchiveSegment
+from .rollups import compliance_rollups
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_COLUMNS = [
+    ('id', 'id'),
+    ('public_id', 'public_id'),
+    ('recipient_id', 'recipient_id'),
+    ('notification_type', 'notification_type'),
+    ('status', 'status'),
+    ('scheduled_at', 'scheduled_at'),
+    ('sent_at', 'sent_at'),
+    ('error_message', 'error_message'),
+    ('created_at', 'created_at'),
+]
+
+def archived_email(row):
+    # Archives hold the plain text as sent, so they read without the templates;
+    # the HTML of templated emails can still be rendered from the reference
+    row['message'] = email_text(row.pop('body'), row['template_key'], row['template_version'],
+                                row['context'], row['message'])
+
+
+# Per dataset: the rows' date field, the patient they belong to, the columns
+# written to the archive (output name, ORM lookup; the first must be the primary
+# key), an optional function preparing each row for writing and the columns ?q=
+# searches. Medication names are copied into the rows
+# so archived doses still read correctly if the prescription changes later.
+ARCHIVE_DATASETS = {
+    'intakes': {
+        'model': MedicationIntake,
+        'date_field': 'scheduled_datetime',
+        'patient_field': 'patient_id',
+        'columns': [
+            ('id', 'id'),
+            ('public_id', 'public_id'),
+            ('scheduled_datetime', 'scheduled_datetime'),
+            ('actual_datetime', 'actual_datetime'),
+            ('status', 'status'),
+            ('notes', 'notes'),
+            ('created_at', 'created_at'),
+            ('prescription_id', 'prescription_id'),
+            ('patient_id', 'patient_id'),
+            ('medication', 'prescription__medication__name'),
+            ('dosage', 'prescription__dosage'),
+        ],
+        'text_columns': ['notes', 'medication'],
+        'version_scope': 'patient',
+    },
+    'schedules': {
+        'model': DailyMedicationSchedule,
+        'date_field': 'date',
+        'patient_field': 'patient_id',
+        'columns': [
+            ('id', 'id'),
+            ('date', 'date'),
+            ('time_slot', 'time_slot'),
+            ('is_taken', 'is_taken'),
+            ('taken_at', 'taken_at'),
+            ('notes', 'notes'),
+            ('email_sent', 'email_sent'),
+            ('email_sent_at', 'email_sent_at'),
+            ('created_at', 'created_at'),
+            ('prescription_id', 'prescription_id'),
+            ('patient_id', 'patient_id'),
+            ('medication', 'prescription__medication__name'),
+            ('dosage', 'prescription__dosage'),
+        ],
+        'text_columns': ['notes', 'medication'],
+        'version_scope': 'patient',
+        # Schedule notes are in the text search index
+        'search_source': 'note',
+    },
+    'sms': {
+        'model': SMSNotification,
+        'date_field': 'created_at',
+        'patient_field': 'recipient_id',
+        'columns': NOTIFICATION_COLUMNS[:3] + [
+            ('phone_number', 'phone_number'),
+            ('message', 'message'),
+            ('twilio_sid', 'twilio_sid'),
+        ] + NOTIFICATION_COLUMNS[3:],
+        'text_columns': ['message'],
+        'version_scope': 'notifications',
+    },
+    'email': {
+        'model': EmailNotification,
+        'date_field': 'created_at',
+        'patient_field': 'recipient_id',
+        'columns': NOTIFICATION_COLUMNS[:3] + [
+            ('email_address', 'email_address'),
+            ('subject', 'subject'),
+            ('template_key', 'template_key'),
+            ('template_version', 'template_version'),
+            ('context', 'context'),
+            ('body', 'body'),
+            ('message', 'message'),
+            ('html_message', 'html_message'),
+        ] + NOTIFICATION_COLUMNS[3:],
+        'text_columns': ['subject', 'message'],
+        'version_scope': 'notifications',
+        'prepare': archived_email,
+    },
+}
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+class HistoryArchiver:
+    """Move dose and notification history older than a horizon out of the hot
+    tables into monthly gzip-compressed NDJSON segments.
+
+    Within a segment rows are grouped by patient and each patient's rows are a
+    separate gzip member: the file is still an ordinary .ndjson.gz, and one
+    patient's rows are read back with a single ranged read. ArchiveBlock
+    records where each member starts.
+
+    Doses are folded into the compliance rollups before they are archived, and
+    archived rows are removed with a plain DELETE that fires no signals, so the
+    rollups keep counting them.
+    """
+
+    root = 'archive'
+
+    def __init__(self, storage=None, chunk_size=2000):
+        self.storage = storage or default_storage
+        self.chunk_size = chunk_size
+        self.encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def is_datetime(self, spec):
+        return isinstance(spec['model']._meta.get_field(spec['date_field']), models.DateTimeField)
+
+    def boundary(self, spec, day):
+        """The date field value at which `day` starts (local midnight for datetimes)"""
+        if self.is_datetime(spec):
+            return timezone.make_aware(datetime.combine(day, time.min))
+        return day
+
+    def cutoff(self, dataset, horizon_days=None):
+        """First date kept in the hot table, or None when the dataset is never archived"""
+        days = horizon_days or getattr(settings, 'ARCHIVE_HORIZON_DAYS', {}).get(dataset)
+        if days is None:
+            return None
+        return timezone.localdate() - timedelta(days=days)
+
+    def archivable(self, dataset, start, end):
+        """Rows of the dataset dated from `start` up to (not including) `end`"""
+        spec = ARCHIVE_DATASETS[dataset]
+        date_field = spec['date_field']
+        rows = spec['model'].objects.filter(**{
+            f"{date_field}__gte": self.boundary(spec, start),
+            f"{date_field}__lt": self.boundary(spec, end),
+        })
+        if dataset == 'schedules':
+            # Schedules with patient feedback stay: the feedback inbox links to them
+            rows = rows.exclude(pk__in=MedicationFeedback.objects.filter(
+                daily_schedule_id__isnull=False
+            ).values('daily_schedule_id'))
+        return rows
+
+    def pending_months(self, dataset, cutoff):
+        """First days of the months that still hold rows dated before `cutoff`"""
+        spec = ARCHIVE_DATASETS[dataset]
+        oldest = spec['model'].objects.filter(
+            **{f"{spec['date_field']}__lt": self.boundary(spec, cutoff)}
+        ).order_by(spec['date_field']).values_list(spec['date_field'], flat=True).first()
+        if oldest is None:
+            return []
+        month = month_start(timezone.localtime(oldest).date() if self.is_datetime(spec) else oldest)
+        months = []
+        while month < cutoff:
+            months.append(month)
+            month = next_month(month)
+        return months
+
+    def archive(self, dataset, horizon_days=None, dry_run=False):
+        """Archive a dataset's rows older than its horizon, one month per segment;
+        returns the number of rows archived (or that would be, for a dry run)"""
+        cutoff = self.cutoff(dataset, horizon_days)
+        if cutoff is None:
+            return 0
+        archived = 0
+        for month in self.pending_months(dataset, cutoff):
+            archived += self.archive_period(dataset, month, min(next_month(month), cutoff), dry_run=dry_run)
+        if archived and dataset == 'intakes' and not dry_run:
+            # Archived pending doses no longer count as overdue
+            dashboard_counters.reconcile(['pending_intakes'])
+        logger.info(f"Archived {archived} {dataset} rows dated before {cutoff}")
+        return archived
+
+    def archive_period(self, dataset, start, end, dry_run=False):
+        spec = ARCHIVE_DATASETS[dataset]
+        rows = self.archivable(dataset, start, end)
+        if dry_run:
+            return rows.count()
+
+        if dataset == 'intakes':
+            self.fold_into_rollups(start, end)
+        name, blocks, row_ids, noted_ids = self.write_segment(dataset, start, end, rows)
+        if not row_ids:
+            return 0
+
+        try:
+            with transaction.atomic():
+                segment = ArchiveSegment.objects.create(
+                    dataset=dataset, period_start=start, period_end=end, name=name,
+                    row_count=len(row_ids), size=self.storage.size(name),
+                )
+                for block in blocks:
+                    block.segment = segment
+                ArchiveBlock.objects.bulk_create(blocks, batch_size=1000)
+                self.delete_rows(spec['model'], row_ids)
+                if noted_ids:
+                    text_search.index([], removed=[document_id(spec['search_source'], pk) for pk in noted_ids])
+                patient_ids = [block.patient_id for block in blocks]
+                bump(*[f"{spec['version_scope']}:{patient_id}" for patient_id in patient_ids],
+                     *[f"archive:{patient_id}" for patient_id in patient_ids])
+        except Exception:
+            self.storage.delete(name)
+            raise
+        logger.info(f"Archived {len(row_ids)} {dataset} rows for {start} to {end} into {name}")
+        return len(row_ids)
+
+    def fold_into_rollups(self, start, end):
+        """Recompute the rollups for days about to be archived from their raw intakes.
+
+        rebuild() skips days before the end of an earlier intake segment: their
+        raw rows are partly archived already, so only the signals keep them current.
+        """
+        compliance_rollups.rebuild(start, end - timedelta(days=1))
+
+    def write_segment(self, dataset, start, end, rows):
+        """Write the rows to a new segment file, one gzip member per patient.
+
+        Returns (name, blocks, row_ids, noted_ids): the unsaved ArchiveBlocks,
+        the primary keys written and those with indexed note text.
+        """
+        spec = ARCHIVE_DATASETS[dataset]
+        names = [name for name, _ in spec['columns']]
+        lookups = [lookup for _, lookup in spec['columns']]
+        patient_position = lookups.index(spec['patient_field'])
+        notes_position = names.index('notes') if spec.get('search_source') else None
+        prepare = spec.get('prepare')
+        rows = rows.order_by(spec['patient_field'], spec['date_field'], 'pk').values_list(*lookups)
+
+        blocks, row_ids, noted_ids = [], [], []
+        with tempfile.TemporaryFile() as segment:
+            patient_id, lines = None, []
+
+            def flush():
+                data = gzip.compress(b''.join(lines), 6)
+                blocks.append(ArchiveBlock(
+                    patient_id=patient_id, offset=segment.tell(), length=len(data), row_count=len(lines),
+                ))
+                segment.write(data)
+
+            for row in rows.iterator(chunk_size=self.chunk_size):
+                if row[patient_position] != patient_id and lines:
+                    flush()
+                    lines = []
+                patient_id = row[patient_position]
+                record = dict(zip(names, row))
+                if prepare:
+                    prepare(record)
+                lines.append((self.encoder.encode(record) + '\n').encode('utf-8'))
+                row_ids.append(row[0])
+                if notes_position is not None and (row[notes_position] or '').strip():
+                    noted_ids.append(row[0])
+            if lines:
+                flush()
+            if not row_ids:
+                return None, [], [], []
+
+            segment.seek(0)
+            name = posixpath.join(self.root, dataset, f"{start:%Y}", f"{dataset}-{start}-{end}.ndjson.gz")
+            name = self.storage.save(name, File(segment))
+        return name, blocks, row_ids, noted_ids
+
+    def delete_rows(self, model, row_ids, batch_size=500):
+        # _raw_delete is a plain DELETE: no signals, so rollups and counters are
+        # not decremented, and no cascade collection (nothing references these rows)
+        for i in range(0, len(row_ids), batch_size):
+            rows = model.objects.filter(pk__in=row_ids[i:i + batch_size])
+            rows._raw_delete(rows.db)
+
+    def read_block(self, block):
+        """The rows of one ArchiveBlock, oldest first"""
+        with self.storage.open(block.segment.name, 'rb') as segment:
+            segment.seek(block.offset)
+            data = segment.read(block.length)
+        return [json.loads(line) for line in gzip.decompress(data).splitlines()]
+
+    def row_date(self, spec, value):
+        return parse_datetime(value) if self.is_datetime(spec) else parse_date(value)
+
+    def search(self, dataset, patient, date_from=None, date_to=None, statuses=None, text=None, cursor=None, limit=50):
+        """Archived rows for one patient, newest first: (rows, next_cursor).
+
+        The cursor holds the date and id of the last row served; segments wholly
+        after it are not read.
+        """
+        spec = ARCHIVE_DATASETS[dataset]
+        date_field = spec['date_field']
+        after = None
+        if cursor:
+            values = decode_cursor(cursor)
+            try:
+                after = (self.row_date(spec, values[0]), int(values[1]))
+            except (IndexError, TypeError, ValueError):
+                after = None
+            if after is None or after[0] is None:
+                raise InvalidCursor("Invalid cursor")
+
+        blocks = ArchiveBlock.objects.filter(segment__dataset=dataset, patient=patient).select_related(
+            'segment').order_by('-segment__period_start')
+        if date_from:
+            blocks = blocks.filter(segment__period_end__gt=date_from)
+        if date_to:
+            blocks = blocks.filter(segment__period_start__lte=date_to)
+        if after:
+            after_day = timezone.localtime(after[0]).date() if self.is_datetime(spec) else after[0]
+            blocks = blocks.filter(segment__period_start__lte=after_day)
+
+        lower = self.boundary(spec, date_from) if date_from else None
+        upper = self.boundary(spec, date_to + timedelta(days=1)) if date_to else None
+        text = (text or '').lower()
+
+        results = []
+        # A month archived in more than one run has several segments; merge them
+        for _, month_blocks in groupby(blocks, key=lambda block: block.segment.period_start):
+            rows = [
+                (self.row_date(spec, row[date_field]), row)
+                for block in month_blocks for row in self.read_block(block)
+            ]
+            rows.sort(key=lambda item: (item[0], item[1]['id']), reverse=True)
+            for when, row in rows:
+                if after and (when, row['id']) >= after:
+                    continue
+                if (lower and when < lower) or (upper and when >= upper):
+                    continue
+                if statuses and row.get('status') not in statuses:
+                    continue
+                if text and not any(text in (row.get(column) or '').lower() for column in spec['text_columns']):
+                    continue
+                results.append(row)
+                if len(results) > limit:
+                    last = results[limit - 1]
+                    return results[:limit], encode_cursor([last[date_field], last['id']])
+        return results, None
+
+
+# Initialize the history archiver
+history_archiver = HistoryArchiver()
@@ -0,0 +1,124 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+import logging
+
+from medications.models import MedicationIntake, Prescription
+from .models import DashboardCounter
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# name -> model, field values a row needs to be counted and, for time-based
+# counters, the datetime field that must be at or before the counter's as_of
+COUNTERS = {
+    'total_patients': {'model': User, 'conditions': {'user_type': 'patient'}},
+    'total_staff': {'model': User, 'conditions': {'user_type': 'admin'}},
+    'active_prescriptions': {'model': Prescription, 'conditions': {'is_active': True}},
+    'pending_intakes': {'model': MedicationIntake, 'conditions': {'status': 'pending'}, 'due_field': 'scheduled_datetime'},
+}
+
+
+def tracked_fields(model):
+    """Fields whose previous values the signal handlers need for this model"""
+    fields = set()
+    for spec in COUNTERS.values():
+        if spec['model'] is model:
+            fields.update(spec['conditions'])
+            if spec.get('due_field'):
+                fields.add(spec['due_field'])
+    return sorted(fields)
+
+
+class DashboardCounterService:
+    """Admin dashboard figures maintained incrementally.
+
+    Signal handlers move rows in and out of each counter with a single
+    ``UPDATE ... SET value = value ± 1``. The overdue-dose counter only counts
+    doses due by its ``as_of`` watermark: the handler's UPDATE checks the
+    watermark itself, and ``advance()`` periodically moves it forward, adding
+    the doses that fell due in between. ``reconcile()`` recounts everything to
+    correct any drift.
+    """
+
+    def adjust(self, name, delta, due=None):
+        counters = DashboardCounter.objects.filter(name=name)
+        if due is not None:
+            counters = counters.filter(as_of__gte=due)
+        counters.update(value=F('value') + delta, updated_at=timezone.now())
+
+    def record_change(self, model, previous, current):
+        """Apply counter deltas for a row going from `previous` to `current` field values.
+
+        Either side is None for created or deleted rows.
+        """
+        for name, spec in COUNTERS.items():
+            if spec['model'] is not model:
+                continue
+            was = previous is not None and all(previous[f] == v for f, v in spec['conditions'].items())
+            now = current is not None and all(current[f] == v for f, v in spec['conditions'].items())
+            due_field = spec.get('due_field')
+            if due_field:
+                if was and now and previous[due_field] == current[due_field]:
+                    continue
+                if was:
+                    self.adjust(name, -1, due=previous[due_field])
+                if now:
+                    self.adjust(name, 1, due=current[due_field])
+            elif was != now:
+                self.adjust(name, 1 if now else -1)
+
+    def queryset(self, name, as_of=None):
+        spec = COUNTERS[name]
+        queryset = spec['model'].objects.filter(**spec['conditions'])
+        if spec.get('due_field'):
+            queryset = queryset.filter(**{f"{spec['due_field']}__lte": as_of or timezone.now()})
+        return queryset
+
+    def advance(self, now=None):
+        """Move time-based counters' watermarks to now, counting doses that fell due since"""
+        now = now or timezone.now()
+        for name, spec in COUNTERS.items():
+            if not spec.get('due_field'):
+                continue
+            with transaction.atomic():
+                counter = DashboardCounter.objects.select_for_update().filter(name=name).first()
+                if counter is None or counter.as_of is None:
+                    continue
+                newly_due = self.queryset(name, now).filter(
+                    **{f"{spec['due_field']}__gt": counter.as_of}
+                ).count()
+                DashboardCounter.objects.filter(pk=counter.pk).update(
+                    value=F('value') + newly_due, as_of=now, updated_at=now
+                )
+
+    def reconcile(self, names=None):
+        """Recount counters from the source tables; returns {name: drift corrected}"""
+        drift = {}
+        for name in names or COUNTERS:
+            with transaction.atomic():
+                counter, created = DashboardCounter.objects.select_for_update().get_or_create(name=name)
+                as_of = timezone.now()
+                value = self.queryset(name, as_of).count()
+                drift[name] = value - counter.value
+                counter.value = value
+                if COUNTERS[name].get('due_field'):
+                    counter.as_of = as_of
+                counter.save()
+            if drift[name] and not created:
+                logger.warning(f"Dashboard counter {name} drifted by {drift[name]}, corrected to {value}")
+        return drift
+
+    def get_all(self):
+        """Current counter values by name, one indexed read of a four-row table"""
+        values = dict(DashboardCounter.objects.filter(name__in=COUNTERS).values_list('name', 'value'))
+        missing = [name for name in COUNTERS if name not in values]
+        if missing:
+            self.reconcile(missing)
+            values.update(DashboardCounter.objects.filter(name__in=missing).values_list('name', 'value'))
+        return values
+
+# Initialize the counter service
+dashboard_counters = DashboardCounterService()
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from reports.archive import ARCHIVE_DATASETS, history_archiver
+
+class Command(BaseCommand):
+    help = 'Move dose schedules, intakes and notifications older than their horizon into monthly archive segments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset',
+            action='append',
+            choices=list(ARCHIVE_DATASETS),
+            help='Archive only this dataset (repeatable; default: all)',
+        )
+        parser.add_argument(
+            '--horizon-days',
+            type=int,
+            help='Archive rows older than this many days instead of ARCHIVE_HORIZON_DAYS',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report how many rows would be archived without moving anything',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        prefix = '[dry run] ' if dry_run else ''
+
+        for dataset in options['dataset'] or ARCHIVE_DATASETS:
+            cutoff = history_archiver.cutoff(dataset, options['horizon_days'])
+            if cutoff is None:
+                self.stdout.write(f'{prefix}{dataset}: no horizon configured, skipped')
+                continue
+            count = history_archiver.archive(dataset, horizon_days=options['horizon_days'], dry_run=dry_run)
+            self.stdout.write(
+                self.style.SUCCESS(f'{prefix}{dataset}: archived {count} rows dated before {cutoff}')
+            )
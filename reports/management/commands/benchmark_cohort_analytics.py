@@ -0,0 +1,115 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from collections import defaultdict
+from datetime import timedelta
+import time
+import tracemalloc
+
+import numpy as np
+
+from reports.analytics import cohort_analytics, STATUS_CODES
+from reports.query_plans import seed
+
+class Command(BaseCommand):
+    help = 'Benchmark cohort analytics loading and aggregation on a synthetic dose dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doses', type=int, default=1_000_000, help='Number of synthetic doses')
+        parser.add_argument('--patients', type=int, default=5000, help='Number of synthetic patients')
+        parser.add_argument('--prescriptions', type=int, default=15000, help='Number of synthetic prescriptions')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs (best is reported)')
+        parser.add_argument(
+            '--compare-loop',
+            action='store_true',
+            help='Also time an equivalent pure-Python group-by',
+        )
+        parser.add_argument(
+            '--skip-load',
+            action='store_true',
+            help='Only time the aggregation, not loading the doses from the database',
+        )
+
+    def synthetic_dataset(self, doses, patients, prescriptions):
+        rng = np.random.default_rng(42)
+        prescription_patient = rng.integers(0, patients, prescriptions)
+        prescription = rng.integers(0, prescriptions, doses).astype(np.int32)
+        columns = {
+            'patient_id': prescription_patient[prescription].astype(np.int64),
+            'prescription': prescription,
+            'hour': rng.choice([8, 9, 12, 14, 16, 20, 21], doses).astype(np.int8),
+            'status': rng.choice(
+                list(STATUS_CODES.values()), doses, p=[0.05, 0.75, 0.15, 0.05]
+            ).astype(np.int8),
+        }
+        dimensions = {
+            'medication': [f"Medication {i % 300}" for i in range(prescriptions)],
+            'physician': [f"Dr. {i % 120}" for i in range(prescriptions)],
+            'priority': [('low', 'medium', 'high', 'critical')[i % 4] for i in range(prescriptions)],
+        }
+        return columns, dimensions
+
+    def loop_aggregate(self, columns, dimensions):
+        """Reference implementation: one Python iteration per dose per dimension"""
+        result = {}
+        prescriptions = columns['prescription'].tolist()
+        statuses = columns['status'].tolist()
+        for name, labels in dimensions.items():
+            groups = defaultdict(lambda: [0, 0])
+            for code, status in zip(prescriptions, statuses):
+                group = groups[labels[code]]
+                group[0] += 1
+                group[1] += status == STATUS_CODES['taken']
+            result[name] = groups
+        return result
+
+    def best_of(self, repeat, func, *args):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(*args)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def time_load(self, doses, days=30):
+        """Seed about `doses` intakes (rolled back afterwards) and time loading them into columns"""
+        end_date = timezone.now().date()
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {doses:,} doses into the database...")
+            seed(patients=max(doses // (days * 3), 1), days=days, notifications=0)
+            started = time.perf_counter()
+            columns = cohort_analytics.load_columns(end_date - timedelta(days=days), end_date)
+            elapsed = time.perf_counter() - started
+            # Memory in a second run: tracing slows the load down too much to time it
+            del columns
+            tracemalloc.start()
+            columns = cohort_analytics.load_columns(end_date - timedelta(days=days), end_date)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            transaction.set_rollback(True)
+        loaded = columns['status'].size if columns is not None else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Database load: {loaded:,} doses in {elapsed * 1000:.1f} ms, peak {peak / 2 ** 20:.1f} MiB"
+        ))
+
+    def handle(self, *args, **options):
+        if not options['skip_load']:
+            self.time_load(options['doses'])
+
+        self.stdout.write(
+            f"Generating {options['doses']:,} doses over {options['prescriptions']:,} prescriptions..."
+        )
+        columns, dimensions = self.synthetic_dataset(
+            options['doses'], options['patients'], options['prescriptions']
+        )
+
+        elapsed = self.best_of(options['repeat'], cohort_analytics.aggregate, columns, dimensions)
+        self.stdout.write(
+            self.style.SUCCESS(f"Vectorised aggregation: {elapsed * 1000:.1f} ms")
+        )
+
+        if options['compare_loop']:
+            elapsed_loop = self.best_of(1, self.loop_aggregate, columns, dimensions)
+            self.stdout.write(
+                f"Python loop group-by: {elapsed_loop * 1000:.1f} ms ({elapsed_loop / elapsed:.0f}x slower)"
+            )
@@ -0,0 +1,111 @@
+from django.core.management.base import BaseCommand
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from hospital_system.db import pragma_statements, sqlite_pragmas
+
+# Django's own default lock wait for SQLite connections, in seconds
+DEFAULT_TIMEOUT = 5
+
+
+def writer(path, pragmas, persistent, tasks, results):
+    """One worker process: each task inserts a notification-like row and then
+    updates its status, as a send does, each statement its own transaction"""
+    committed = locked = 0
+    started = time.perf_counter()
+    connection = None
+    for task in range(tasks):
+        if connection is None:
+            connection = sqlite3.connect(path, timeout=DEFAULT_TIMEOUT, isolation_level=None)
+            for statement in pragma_statements(pragmas):
+                connection.execute(statement)
+        try:
+            row_id = connection.execute(
+                "INSERT INTO bench (status, message, created_at) VALUES ('pending', ?, ?)",
+                (f"Reminder {task}" * 8, time.time()),
+            ).lastrowid
+            connection.execute("UPDATE bench SET status = 'sent', sent_at = ? WHERE id = ?", (time.time(), row_id))
+            committed += 2
+        except sqlite3.OperationalError:
+            locked += 1
+        if not persistent:
+            connection.close()
+            connection = None
+    if connection is not None:
+        connection.close()
+    results.put((committed, locked, time.perf_counter() - started))
+
+
+def reader(path, pragmas, stop):
+    """Dashboard-style reads running alongside the writers"""
+    connection = sqlite3.connect(path, timeout=DEFAULT_TIMEOUT, isolation_level=None)
+    for statement in pragma_statements(pragmas):
+        connection.execute(statement)
+    while not stop.is_set():
+        try:
+            connection.execute("SELECT status, COUNT(*) FROM bench GROUP BY status").fetchall()
+        except sqlite3.OperationalError:
+            pass
+    connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent SQLite writers with the default settings and with the hospital_system.db PRAGMA profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4, help='Concurrent writer processes')
+        parser.add_argument('--readers', type=int, default=2, help='Concurrent reader processes')
+        parser.add_argument('--tasks', type=int, default=500, help='Insert + update pairs per writer')
+
+    def run(self, label, pragmas, persistent, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            connection = sqlite3.connect(path)
+            connection.execute(
+                "CREATE TABLE bench (id INTEGER PRIMARY KEY, status TEXT, message TEXT, "
+                "created_at REAL, sent_at REAL)"
+            )
+            connection.execute("CREATE INDEX bench_status ON bench (status)")
+            connection.commit()
+            connection.close()
+
+            results, stop = multiprocessing.Queue(), multiprocessing.Event()
+            readers = [
+                multiprocessing.Process(target=reader, args=(path, pragmas, stop))
+                for _ in range(options['readers'])
+            ]
+            writers = [
+                multiprocessing.Process(target=writer, args=(path, pragmas, persistent, options['tasks'], results))
+                for _ in range(options['writers'])
+            ]
+            for process in readers:
+                process.start()
+            started = time.perf_counter()
+            for process in writers:
+                process.start()
+            outcomes = [results.get() for _ in writers]
+            elapsed = time.perf_counter() - started
+            stop.set()
+            for process in writers + readers:
+                process.join()
+
+        committed = sum(outcome[0] for outcome in outcomes)
+        locked = sum(outcome[1] for outcome in outcomes)
+        self.stdout.write(
+            f"{label:<10} {committed / elapsed:>9.0f} writes/s  {elapsed:>6.2f} s  "
+            f"{locked} tasks failed with 'database is locked'"
+        )
+        return committed / elapsed
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['writers']} writers x {options['tasks']} sends, {options['readers']} readers"
+        )
+        # Before: SQLite defaults (rollback journal, synchronous=FULL) and a new
+        # connection per task, as with CONN_MAX_AGE=0
+        before = self.run('default', {}, False, options)
+        after = self.run('profile', sqlite_pragmas(), True, options)
+        self.stdout.write(self.style.SUCCESS(f"Profile throughput: {after / before:.1f}x the default"))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from reports.query_plans import check, hot_queries, seed, table_sizes
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot queries and fail if any falls back to a full table scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            action='store_true',
+            help='Check against a synthetic dataset inserted in a transaction that is rolled back',
+        )
+        parser.add_argument('--patients', type=int, default=500, help='Synthetic patients when seeding')
+        parser.add_argument('--days', type=int, default=30, help='Days of synthetic doses when seeding')
+        parser.add_argument('--sizes', action='store_true', help='Also report table and index sizes of the hot tables')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f"Query plan checks support SQLite and PostgreSQL, not {connection.vendor}")
+        
+        with transaction.atomic():
+            patient = None
+            if options['seed']:
+                self.stdout.write(f"Seeding {options['patients']} patients x {options['days']} days...")
+                patient = seed(patients=options['patients'], days=options['days'])
+            results = check(patient)
+            sizes = None
+            if options['sizes']:
+                sizes = table_sizes(sorted({table for query in hot_queries() for table in query.tables}))
+            transaction.set_rollback(True)
+        
+        regressions = 0
+        for query, plan, scans in results:
+            if scans:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f"FULL SCAN  {query.name}: {', '.join(scans)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"ok         {query.name}"))
+            if scans or options['verbosity'] > 1:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+        
+        if sizes:
+            self.stdout.write(f"{'table':<40} {'table MB':>10} {'index MB':>10}")
+            for table, (table_bytes, index_bytes) in sizes.items():
+                self.stdout.write(f"{table:<40} {table_bytes / 2 ** 20:>10.1f} {index_bytes / 2 ** 20:>10.1f}")
+        
+        if regressions:
+            raise CommandError(f"{regressions} of {len(results)} hot queries use a full table scan")
+        self.stdout.write(self.style.SUCCESS(f"All {len(results)} hot queries use indexes"))
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import datetime, timedelta
+from reports.exports import history_exporter, EXPORT_DATASETS, EXPORT_FORMATS
+import sys
+
+class Command(BaseCommand):
+    help = 'Export medication intake or schedule history as CSV/NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset',
+            choices=sorted(EXPORT_DATASETS),
+            default='intakes',
+            help='History table to export',
+        )
+        parser.add_argument(
+            '--format',
+            choices=sorted(EXPORT_FORMATS),
+            default='csv',
+            help='Output format',
+        )
+        parser.add_argument(
+            '--start',
+            help='First date to export (YYYY-MM-DD), defaults to 30 days before --end',
+        )
+        parser.add_argument(
+            '--end',
+            help='Last date to export (YYYY-MM-DD), defaults to today',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Gzip-compress the output',
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write to, defaults to stdout',
+        )
+
+    def parse_date(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        end_date = self.parse_date(options['end']) if options['end'] else timezone.now().date()
+        start_date = self.parse_date(options['start']) if options['start'] else end_date - timedelta(days=30)
+
+        chunks = history_exporter.stream(
+            options['dataset'], options['format'], start_date, end_date, compress=options['gzip']
+        )
+
+        written = 0
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+
+        if options['output']:
+            self.stdout.write(
+                self.style.SUCCESS(f"Exported {options['dataset']} to {options['output']} ({written} bytes)")
+            )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from datetime import timedelta
+from reports.storage import report_blob_store
+
+class Command(BaseCommand):
+    help = 'Expire old progress reports by type and delete unreferenced report PDFs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be removed without deleting anything',
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=1,
+            help='Keep unreferenced blobs younger than this many hours',
+        )
+        parser.add_argument(
+            '--adopt-legacy',
+            action='store_true',
+            help='Move per-report PDFs from before the blob store into it first',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        prefix = '[dry run] ' if dry_run else ''
+
+        if options['adopt_legacy']:
+            count = report_blob_store.adopt_legacy_files(dry_run=dry_run)
+            self.stdout.write(f'{prefix}Moved {count} legacy report PDFs into the blob store')
+
+        count = report_blob_store.expire_reports(dry_run=dry_run)
+        self.stdout.write(f'{prefix}Expired {count} progress reports')
+
+        count = report_blob_store.prune_unreferenced(
+            grace=timedelta(hours=options['grace_hours']), dry_run=dry_run
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'{prefix}Deleted {count} unreferenced report PDFs')
+        )
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import datetime, timedelta
+from reports.rollups import compliance_rollups
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Recompute daily compliance rollups from raw medication intakes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            help='First date to rebuild (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--end',
+            help='Last date to rebuild (YYYY-MM-DD), defaults to today',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Number of days back from --end to rebuild when --start is not given',
+        )
+
+    def parse_date(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        end_date = self.parse_date(options['end']) if options['end'] else timezone.now().date()
+        if options['start']:
+            start_date = self.parse_date(options['start'])
+        else:
+            start_date = end_date - timedelta(days=options['days'])
+
+        if start_date > end_date:
+            raise CommandError('--start must not be after --end')
+
+        archived_until = compliance_rollups.archived_until()
+        if archived_until is not None and start_date < archived_until:
+            if end_date < archived_until:
+                raise CommandError(f'Intakes before {archived_until} are archived; their rollups cannot be rebuilt')
+            self.stdout.write(self.style.WARNING(
+                f'Intakes before {archived_until} are archived; rebuilding from {archived_until} instead'
+            ))
+            start_date = archived_until
+
+        self.stdout.write(f'Rebuilding compliance rollups for {start_date} to {end_date}...')
+        count = compliance_rollups.rebuild(start_date, end_date)
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {count} compliance rollups')
+        )
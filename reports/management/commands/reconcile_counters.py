@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from reports.counters import dashboard_counters, COUNTERS
+
+class Command(BaseCommand):
+    help = 'Recount the admin dashboard counters from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names',
+            nargs='*',
+            help=f"Counters to reconcile (default: all of {', '.join(sorted(COUNTERS))})",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(COUNTERS)
+        if unknown:
+            raise CommandError(f"Unknown counters: {', '.join(sorted(unknown))}")
+        drift = dashboard_counters.reconcile(options['names'] or None)
+        for name, delta in drift.items():
+            self.stdout.write(f"{name}: corrected by {delta:+d}" if delta else f"{name}: ok")
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {len(drift)} counters"))
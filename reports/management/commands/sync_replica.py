@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+import sqlite3
+import time
+
+from hospital_system.routers import REPLICA
+
+class Command(BaseCommand):
+    help = 'Copy the default SQLite database onto the replica file: a local stand-in for replication'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every',
+            type=float,
+            default=None,
+            help='Keep copying every N seconds (the replica then lags by up to N seconds)',
+        )
+
+    def copy(self, source, target):
+        started = time.monotonic()
+        primary, replica = sqlite3.connect(source), sqlite3.connect(target)
+        try:
+            # The backup API copies a consistent snapshot while writers carry on
+            primary.backup(replica)
+        finally:
+            primary.close()
+            replica.close()
+        return time.monotonic() - started
+
+    def handle(self, *args, **options):
+        if REPLICA not in settings.DATABASES:
+            raise CommandError("No replica configured; set REPLICA_DATABASE_NAME")
+        databases = [settings.DATABASES['default'], settings.DATABASES[REPLICA]]
+        if any(database['ENGINE'] != 'django.db.backends.sqlite3' for database in databases):
+            raise CommandError("sync_replica only copies SQLite files; use the database's own replication")
+        source, target = (str(database['NAME']) for database in databases)
+
+        while True:
+            elapsed = self.copy(source, target)
+            self.stdout.write(self.style.SUCCESS(f"Replica {target} refreshed in {elapsed:.2f}s"))
+            if options['every'] is None:
+                break
+            time.sleep(options['every'])
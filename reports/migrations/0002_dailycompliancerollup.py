@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:37
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    """Build rollups from the existing intakes, so reports and the compliance
+    badge are right from the first deploy (rebuild_compliance_rollups does the
+    same later)"""
+    MedicationIntake = apps.get_model('medications', 'MedicationIntake')
+    DailyComplianceRollup = apps.get_model('reports', 'DailyComplianceRollup')
+    rows = MedicationIntake.objects.using(schema_editor.connection.alias).annotate(
+        date=TruncDate('scheduled_datetime')
+    ).values('prescription__patient_id', 'prescription_id', 'date').annotate(
+        scheduled_count=Count('id'),
+        taken_count=Count('id', filter=Q(status='taken')),
+        missed_count=Count('id', filter=Q(status='missed')),
+        skipped_count=Count('id', filter=Q(status='skipped')),
+    ).order_by()
+
+    batch = []
+    for row in rows.iterator():
+        batch.append(DailyComplianceRollup(
+            patient_id=row['prescription__patient_id'],
+            prescription_id=row['prescription_id'],
+            date=row['date'],
+            scheduled_count=row['scheduled_count'],
+            taken_count=row['taken_count'],
+            missed_count=row['missed_count'],
+            skipped_count=row['skipped_count'],
+        ))
+        if len(batch) >= 1000:
+            DailyComplianceRollup.objects.using(schema_editor.connection.alias).bulk_create(batch)
+            batch = []
+    DailyComplianceRollup.objects.using(schema_editor.connection.alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0002_dailymedicationschedule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyComplianceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('scheduled_count', models.PositiveIntegerField(default=0)),
+                ('taken_count', models.PositiveIntegerField(default=0)),
+                ('missed_count', models.PositiveIntegerField(default=0)),
+                ('skipped_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compliance_rollups', to=settings.AUTH_USER_MODEL)),
+                ('prescription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compliance_rollups', to='medications.prescription')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['patient', 'date'], name='reports_rollup_patient_date')],
+                'unique_together': {('patient', 'prescription', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
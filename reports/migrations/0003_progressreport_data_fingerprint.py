@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_dailycompliancerollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='progressreport',
+            name='data_fingerprint',
+            field=models.CharField(blank=True, help_text='Digest of the dose data the report was built from', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='progressreport',
+            index=models.Index(fields=['patient', 'report_type', 'report_period_start', 'report_period_end'], name='reports_report_period_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_progressreport_data_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+                ('as_of', models.DateTimeField(blank=True, help_text='For time-based counters: doses due up to this moment are counted', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
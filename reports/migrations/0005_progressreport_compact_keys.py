@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+from hospital_system.compact_keys import analyze_table, copy_to_compact_table
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reports', '0004_dashboardcounter'),
+    ]
+
+    # The UUID primary key moves to public_id (used in URLs); rows get
+    # BigAutoField keys in created_at order. See hospital_system.compact_keys.
+    operations = [
+        migrations.CreateModel(
+            name='CompactProgressReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('report_type', models.CharField(choices=[('treatment_complete', 'Treatment Complete'), ('weekly_summary', 'Weekly Summary'), ('monthly_summary', 'Monthly Summary'), ('discharge_summary', 'Discharge Summary')], max_length=20)),
+                ('title', models.CharField(max_length=200)),
+                ('content', models.TextField()),
+                ('compliance_rate', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('total_medications', models.IntegerField(default=0)),
+                ('taken_medications', models.IntegerField(default=0)),
+                ('missed_medications', models.IntegerField(default=0)),
+                ('report_period_start', models.DateField()),
+                ('report_period_end', models.DateField()),
+                ('pdf_file', models.FileField(blank=True, null=True, upload_to='reports/')),
+                ('data_fingerprint', models.CharField(blank=True, help_text='Digest of the dose data the report was built from', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('generated_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        copy_to_compact_table('reports', 'ProgressReport', 'CompactProgressReport'),
+        migrations.DeleteModel(
+            name='ProgressReport',
+        ),
+        migrations.RenameModel(
+            old_name='CompactProgressReport',
+            new_name='ProgressReport',
+        ),
+        migrations.AlterField(
+            model_name='progressreport',
+            name='generated_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generated_reports', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='progressreport',
+            name='patient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_reports', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='progressreport',
+            index=models.Index(fields=['patient', 'report_type', 'report_period_start', 'report_period_end'], name='reports_report_period_idx'),
+        ),
+        analyze_table('reports', 'ProgressReport'),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reports', '0005_progressreport_compact_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(choices=[('intakes', 'Medication Intakes'), ('schedules', 'Daily Schedules'), ('sms', 'SMS Notifications'), ('email', 'Email Notifications')], max_length=20)),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField(help_text='First day after the period (exclusive)')),
+                ('name', models.CharField(help_text='Storage name of the segment file', max_length=255)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('size', models.PositiveBigIntegerField(default=0, help_text='Compressed size in bytes')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['dataset', '-period_start'],
+                'indexes': [models.Index(fields=['dataset', 'period_start'], name='archive_segment_period_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchiveBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset', models.PositiveBigIntegerField()),
+                ('length', models.PositiveIntegerField()),
+                ('row_count', models.PositiveIntegerField()),
+                ('patient', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archive_blocks', to=settings.AUTH_USER_MODEL)),
+                ('segment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocks', to='reports.archivesegment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['patient', 'segment'], name='archive_block_patient_idx')],
+            },
+        ),
+    ]
@@ -12,7 +12,8 @@ class ProgressReport(models.Model):
         ('discharge_summary', 'Discharge Summary'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Compact integer key internally; the UUID is what URLs expose
+    public_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     patient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='progress_reports')
     report_type = models.CharField(max_length=20, choices=REPORT_TYPES)
     title = models.CharField(max_length=200)
@@ -25,10 +26,95 @@ class ProgressReport(models.Model):
     report_period_end = models.DateField()
     generated_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='generated_reports')
     pdf_file = models.FileField(upload_to='reports/', null=True, blank=True)
+    data_fingerprint = models.CharField(max_length=64, blank=True, help_text="Digest of the dose data the report was built from")
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return f"{self.title} - {self.patient.get_full_name()}"
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['patient', 'report_type', 'report_period_start', 'report_period_end'], name='reports_report_period_idx'),
+        ]
+
+class DailyComplianceRollup(models.Model):
+    """Per-day dose counters for one prescription, kept current by signals."""
+    patient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='compliance_rollups')
+    prescription = models.ForeignKey('medications.Prescription', on_delete=models.CASCADE, related_name='compliance_rollups')
+    date = models.DateField()
+    scheduled_count = models.PositiveIntegerField(default=0)
+    taken_count = models.PositiveIntegerField(default=0)
+    missed_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.prescription} - {self.date}"
+    
+    @property
+    def compliance_rate(self):
+        recorded = self.taken_count + self.missed_count + self.skipped_count
+        return (self.taken_count / recorded * 100) if recorded > 0 else 0
+    
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['patient', 'prescription', 'date']
+        indexes = [
+            models.Index(fields=['patient', 'date'], name='reports_rollup_patient_date'),
+        ]
+
+class DashboardCounter(models.Model):
+    """A dashboard statistic kept current by signals instead of COUNT(*) per page load."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+    as_of = models.DateTimeField(null=True, blank=True, help_text="For time-based counters: doses due up to this moment are counted")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+    
+    class Meta:
+        ordering = ['name']
+
+class ArchiveSegment(models.Model):
+    """A gzip-compressed NDJSON file of history moved out of a hot table by the archiver."""
+    DATASETS = [
+        ('intakes', 'Medication Intakes'),
+        ('schedules', 'Daily Schedules'),
+        ('sms', 'SMS Notifications'),
+        ('email', 'Email Notifications'),
+    ]
+    
+    dataset = models.CharField(max_length=20, choices=DATASETS)
+    period_start = models.DateField()
+    period_end = models.DateField(help_text="First day after the period (exclusive)")
+    name = models.CharField(max_length=255, help_text="Storage name of the segment file")
+    row_count = models.PositiveIntegerField(default=0)
+    size = models.PositiveBigIntegerField(default=0, help_text="Compressed size in bytes")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.get_dataset_display()} {self.period_start} to {self.period_end}"
+    
+    class Meta:
+        ordering = ['dataset', '-period_start']
+        indexes = [
+            models.Index(fields=['dataset', 'period_start'], name='archive_segment_period_idx'),
+        ]
+
+class ArchiveBlock(models.Model):
+    """One patient's rows within a segment: a separately gzipped byte range."""
+    segment = models.ForeignKey(ArchiveSegment, on_delete=models.CASCADE, related_name='blocks')
+    patient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archive_blocks', db_index=False)
+    offset = models.PositiveBigIntegerField()
+    length = models.PositiveIntegerField()
+    row_count = models.PositiveIntegerField()
+    
+    def __str__(self):
+        return f"{self.segment} - patient {self.patient_id}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['patient', 'segment'], name='archive_block_patient_idx'),
+        ]
@@ -0,0 +1,189 @@
+from datetime import datetime, time, timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+import random
+import re
+
+from api.resources import history_paginator, notification_paginator, patient_doses, patient_notifications
+from medications.history_views import MedicationHistoryView, patient_history
+from medications.models import DailyMedicationSchedule, Medication, MedicationIntake, Prescription
+from medications.services import medication_service
+from notifications.models import EmailNotification, SMSNotification
+from notifications.views import NotificationHistoryView, notification_history
+from .counters import dashboard_counters
+from .models import DailyComplianceRollup, ProgressReport
+from .services import ReportGenerator
+
+User = get_user_model()
+
+
+class HotQuery:
+    """A query the application runs often, and the tables it must reach by index"""
+
+    def __init__(self, name, build, tables):
+        self.name = name
+        self.build = build
+        self.tables = [model._meta.db_table for model in tables]
+
+
+def hot_queries():
+    """The hot queries, each built from a sample patient and today's date by
+    the same service and view helpers the application runs"""
+    reports = ReportGenerator()
+
+    def week(today):
+        return today - timedelta(days=7), today
+
+    return [
+        HotQuery('schedules: active prescriptions for a date',
+                 lambda patient, today: medication_service.active_prescriptions(today), [Prescription]),
+        HotQuery('schedules: due reminders and overdue alerts',
+                 lambda patient, today: medication_service.open_schedules(today), [DailyMedicationSchedule]),
+        HotQuery('schedules: patient today', lambda patient, today: medication_service.get_patient_today_schedule(patient),
+                 [DailyMedicationSchedule]),
+        HotQuery('reports: existing report', lambda patient, today: reports.existing_reports(
+            patient, 'weekly_summary', *week(today)), [ProgressReport]),
+        HotQuery('reports: rollup fingerprint', lambda patient, today: reports.period_rollups(patient, *week(today)),
+                 [DailyComplianceRollup]),
+        HotQuery('reports: period intakes', lambda patient, today: reports.period_intakes(patient, *week(today)),
+                 [MedicationIntake]),
+        HotQuery('counters: pending intakes due', lambda patient, today: dashboard_counters.queryset('pending_intakes'),
+                 [MedicationIntake]),
+        HotQuery('views: notification history page', lambda patient, today: NotificationHistoryView.keyset_paginator(
+            ).page_query(notification_history('sms')), [SMSNotification]),
+        HotQuery('views: medication history page', lambda patient, today: MedicationHistoryView.keyset_paginator(
+            ).page_query(patient_history(patient)), [MedicationIntake]),
+        HotQuery('api: dose history page', lambda patient, today: history_paginator.page_query(patient_doses(patient)),
+                 [MedicationIntake]),
+        HotQuery('api: email notifications page', lambda patient, today: notification_paginator.page_query(
+            patient_notifications(EmailNotification, patient)), [EmailNotification]),
+    ]
+
+
+def full_scans(plan, tables, vendor=None):
+    """Tables from `tables` that the plan reads with a full table scan"""
+    vendor = vendor or connection.vendor
+    scanned = set()
+    for line in plan.splitlines():
+        if vendor == 'sqlite':
+            # "SCAN t" is a table scan; "SCAN t USING [COVERING] INDEX i" walks an index
+            match = re.search(r'\bSCAN (\w+)(?: AS \w+)?\s*$', line.strip())
+        elif vendor == 'postgresql':
+            match = re.search(r'Seq Scan on (\w+)', line)
+        else:
+            match = None
+        if match and match.group(1) in tables:
+            scanned.add(match.group(1))
+    return sorted(scanned)
+
+
+def check(patient=None, queries=None):
+    """Run EXPLAIN for each hot query: [(query, plan, full_scans)]"""
+    if patient is None:
+        patient = User.objects.filter(user_type='patient').order_by('pk').first() or User(pk=0, user_type='patient')
+    today = timezone.now().date()
+    results = []
+    for query in queries or hot_queries():
+        plan = query.build(patient, today).explain()
+        results.append((query, plan, full_scans(plan, query.tables)))
+    return results
+
+
+def table_sizes(tables, vendor=None):
+    """{table: (table_bytes, index_bytes)} on disk for the given tables"""
+    vendor = vendor or connection.vendor
+    sizes = {table: [0, 0] for table in tables}
+    with connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            # dbstat reports pages per b-tree; sqlite_master maps each index to its table
+            cursor.execute(
+                "SELECT m.tbl_name, m.type, SUM(s.pgsize) FROM dbstat s "
+                "JOIN sqlite_master m ON m.name = s.name GROUP BY m.tbl_name, m.type"
+            )
+            for table, kind, size in cursor.fetchall():
+                if table in sizes:
+                    sizes[table][kind == 'index'] += size
+        elif vendor == 'postgresql':
+            for table in tables:
+                cursor.execute("SELECT pg_table_size(%s), pg_indexes_size(%s)", [table, table])
+                sizes[table] = list(cursor.fetchone())
+    return {table: tuple(size) for table, size in sizes.items()}
+
+
+def seed(patients=500, days=30, doses_per_day=3, notifications=20000):
+    """Bulk-insert a representative synthetic dataset (run inside a transaction
+    that is rolled back afterwards)"""
+    rng = random.Random(42)
+    now = timezone.now()
+    today = now.date()
+    suffix = rng.randrange(10 ** 6)
+    staff = User.objects.create(username=f"query-plan-{suffix}-staff", user_type='admin')
+    Medication.objects.bulk_create([Medication(name=f"Query plan medication {i}") for i in range(50)])
+    medications = list(Medication.objects.order_by('-pk')[:50])
+
+    User.objects.bulk_create([
+        User(username=f"query-plan-{suffix}-{i}", user_type='patient', last_name=f"Patient {i}",
+             medical_record_number=f"QP{suffix:06d}{i:06d}")
+        for i in range(patients)
+    ])
+    patient_list = list(User.objects.filter(username__startswith=f"query-plan-{suffix}-", user_type='patient'))
+
+    Prescription.objects.bulk_create([
+        Prescription(
+            patient=patient, medication=rng.choice(medications), prescribing_physician='Dr. Query',
+            dosage='1 tablet', frequency='three_times_daily', start_date=today - timedelta(days=rng.randrange(365)),
+            end_date=None if rng.random() < 0.5 else today + timedelta(days=rng.randrange(-200, 60)),
+            is_active=rng.random() < 0.3, created_by=staff,
+        )
+        for patient in patient_list
+    ], batch_size=1000)
+    prescriptions = list(Prescription.objects.filter(patient__in=patient_list))
+
+    slots = [time(8), time(14), time(20)][:doses_per_day]
+    schedules, intakes = [], []
+    for prescription in prescriptions:
+        for day in range(days):
+            date = today - timedelta(days=day)
+            for slot in slots:
+                taken = day > 0 or rng.random() < 0.5
+                schedules.append(DailyMedicationSchedule(
+                    prescription=prescription, patient_id=prescription.patient_id, date=date, time_slot=slot,
+                    is_taken=taken, email_sent=taken,
+                ))
+                intakes.append(MedicationIntake(
+                    prescription=prescription, patient_id=prescription.patient_id,
+                    scheduled_datetime=timezone.make_aware(datetime.combine(date, slot)),
+                    status=rng.choice(['taken', 'taken', 'taken', 'missed', 'skipped']) if day > 0 else 'pending',
+                ))
+    DailyMedicationSchedule.objects.bulk_create(schedules, batch_size=2000)
+    MedicationIntake.objects.bulk_create(intakes, batch_size=2000)
+
+    DailyComplianceRollup.objects.bulk_create([
+        DailyComplianceRollup(patient_id=prescription.patient_id, prescription=prescription,
+                              date=today - timedelta(days=day), scheduled_count=len(slots))
+        for prescription in prescriptions for day in range(days)
+    ], batch_size=2000)
+    ProgressReport.objects.bulk_create([
+        ProgressReport(patient=patient, report_type='weekly_summary', title='Weekly Summary', content='',
+                       report_period_start=today - timedelta(days=7 * (week + 1)),
+                       report_period_end=today - timedelta(days=7 * week), generated_by=staff)
+        for patient in patient_list for week in range(4)
+    ], batch_size=2000)
+    SMSNotification.objects.bulk_create([
+        SMSNotification(recipient=rng.choice(patient_list), phone_number='+255700000000', message='Reminder',
+                        notification_type='medication_reminder', scheduled_at=now,
+                        status=rng.choice(['sent', 'sent', 'sent', 'delivered', 'failed', 'pending']))
+        for _ in range(notifications)
+    ], batch_size=2000)
+    EmailNotification.objects.bulk_create([
+        EmailNotification(recipient=rng.choice(patient_list), email_address='patient@example.com', subject='Reminder',
+                          message='Reminder', scheduled_at=now, status='sent',
+                          notification_type=rng.choice(['medication_reminder', 'missed_medication', 'general']))
+        for _ in range(notifications)
+    ], batch_size=2000)
+
+    # Give the planner statistics for the new data
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return patient_list[0]
@@ -0,0 +1,157 @@
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+import logging
+
+from medications.models import MedicationIntake
+from .models import ArchiveSegment, DailyComplianceRollup
+
+logger = logging.getLogger(__name__)
+
+# Intake statuses that have their own counter; 'pending' only counts as scheduled
+STATUS_COUNTERS = {
+    'taken': 'taken_count',
+    'missed': 'missed_count',
+    'skipped': 'skipped_count',
+}
+
+COUNTER_FIELDS = ['scheduled_count', 'taken_count', 'missed_count', 'skipped_count']
+
+
+class ComplianceRollupService:
+    """Maintain and read the per-day compliance counters in DailyComplianceRollup"""
+
+    def intake_key(self, intake):
+        """Return the (patient_id, prescription_id, date) rollup key for an intake,
+        given as a model instance or a dict of its values"""
+        values = intake if isinstance(intake, dict) else vars(intake)
+        return (
+            values['patient_id'],
+            values['prescription_id'],
+            timezone.localtime(values['scheduled_datetime']).date(),
+        )
+
+    def apply_delta(self, key, status, sign):
+        """Add (sign=1) or remove (sign=-1) a single dose with the given status"""
+        patient_id, prescription_id, date = key
+        deltas = {'scheduled_count': sign}
+        if status in STATUS_COUNTERS:
+            deltas[STATUS_COUNTERS[status]] = sign
+
+        rollups = DailyComplianceRollup.objects.filter(
+            patient_id=patient_id,
+            prescription_id=prescription_id,
+            date=date
+        )
+        with transaction.atomic():
+            # Removals never create rows, so cascading prescription deletes stay safe
+            if sign > 0:
+                DailyComplianceRollup.objects.get_or_create(
+                    patient_id=patient_id,
+                    prescription_id=prescription_id,
+                    date=date
+                )
+            rollups.update(
+                updated_at=timezone.now(),
+                **{field: F(field) + delta for field, delta in deltas.items()}
+            )
+
+    def record_intake_change(self, previous, current):
+        """Move an intake's contribution from its previous (key, status) to its current one.
+
+        Either side may be None for newly created or deleted intakes.
+        """
+        if previous == current:
+            if current is not None:
+                self.touch(current[0])
+            return
+        if previous is not None:
+            self.apply_delta(previous[0], previous[1], -1)
+        if current is not None:
+            self.apply_delta(current[0], current[1], 1)
+
+    def touch(self, key):
+        """Bump updated_at for an intake edit that leaves the counters unchanged (e.g. notes)"""
+        patient_id, prescription_id, date = key
+        DailyComplianceRollup.objects.filter(
+            patient_id=patient_id,
+            prescription_id=prescription_id,
+            date=date
+        ).update(updated_at=timezone.now())
+
+    def archived_until(self):
+        """First day whose intakes are all still in the raw table, or None if
+        nothing has been archived"""
+        return ArchiveSegment.objects.filter(dataset='intakes').aggregate(end=Max('period_end'))['end']
+
+    def rebuild(self, start_date, end_date, patient=None):
+        """Recompute rollups for a date range from the raw intake rows.
+
+        Days before archived_until() are left alone: their raw rows are partly
+        archived, so rebuilding would zero the compliance recorded for them.
+        """
+        archived_until = self.archived_until()
+        if archived_until is not None and start_date < archived_until:
+            logger.warning(f"Not rebuilding rollups before {archived_until}: those intakes are archived")
+            start_date = archived_until
+        if start_date > end_date:
+            return 0
+
+        rollups = DailyComplianceRollup.objects.filter(date__range=(start_date, end_date))
+        intakes = MedicationIntake.objects.annotate(
+            date=TruncDate('scheduled_datetime')
+        ).filter(date__range=(start_date, end_date))
+        if patient is not None:
+            rollups = rollups.filter(patient=patient)
+            intakes = intakes.filter(patient=patient)
+
+        rows = intakes.values(
+            'patient_id', 'prescription_id', 'date'
+        ).annotate(
+            scheduled_count=Count('id'),
+            taken_count=Count('id', filter=Q(status='taken')),
+            missed_count=Count('id', filter=Q(status='missed')),
+            skipped_count=Count('id', filter=Q(status='skipped')),
+        ).order_by()
+
+        with transaction.atomic():
+            deleted, _ = rollups.delete()
+            created = DailyComplianceRollup.objects.bulk_create(
+                [
+                    DailyComplianceRollup(
+                        patient_id=row['patient_id'],
+                        prescription_id=row['prescription_id'],
+                        date=row['date'],
+                        **{field: row[field] for field in COUNTER_FIELDS}
+                    )
+                    for row in rows.iterator()
+                ],
+                batch_size=500
+            )
+
+        logger.info(f"Rebuilt {len(created)} compliance rollups for {start_date} to {end_date} (replaced {deleted})")
+        return len(created)
+
+    def summary(self, patient, start_date=None, end_date=None, prescription=None):
+        """Sum the rollup counters for a patient (optionally one prescription) over a date range"""
+        rollups = DailyComplianceRollup.objects.filter(patient=patient)
+        if start_date is not None:
+            rollups = rollups.filter(date__gte=start_date)
+        if end_date is not None:
+            rollups = rollups.filter(date__lte=end_date)
+        if prescription is not None:
+            rollups = rollups.filter(prescription=prescription)
+
+        totals = rollups.aggregate(**{field: Sum(field) for field in COUNTER_FIELDS})
+        totals = {field: totals[field] or 0 for field in COUNTER_FIELDS}
+        recorded = totals['taken_count'] + totals['missed_count'] + totals['skipped_count']
+        totals['recorded_count'] = recorded
+        totals['compliance_rate'] = (totals['taken_count'] / recorded * 100) if recorded > 0 else 0
+        return totals
+
+    def compliance_rate(self, patient, start_date=None, end_date=None):
+        return round(self.summary(patient, start_date, end_date)['compliance_rate'], 1)
+
+# Initialize the rollup service
+compliance_rollups = ComplianceRollupService()
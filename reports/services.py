@@ -1,5 +1,8 @@
 from django.utils import timezone
-from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
 from datetime import timedelta
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
@@ -7,10 +10,22 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from io import BytesIO
-import os
+import hashlib
 
 from medications.models import MedicationIntake, Prescription
-from .models import ProgressReport
+from monitoring.metrics import metrics
+from .models import ProgressReport, DailyComplianceRollup
+from .rollups import compliance_rollups
+from .storage import report_blob_store
+
+User = get_user_model()
+
+REPORTS_REQUESTED = metrics.counter(
+    'medcare_reports_total', 'Progress report requests, by whether an existing report was reused', ('result',)
+)
+REPORT_BUILD_SECONDS = metrics.histogram(
+    'medcare_report_build_seconds', 'Time to compute, store and render a new progress report', ('report_type',)
+)
 
 class ReportGenerator:
     def __init__(self):
@@ -23,26 +38,106 @@ class ReportGenerator:
             textColor=colors.HexColor('#2563EB')
         )
     
-    def generate_patient_progress_report(self, patient, report_type='weekly_summary', days=7):
-        """Generate comprehensive patient progress report"""
+    def generate_patient_progress_report(self, patient, report_type='weekly_summary', days=7, force=False):
+        """Return the progress report for this patient, type and period.
+        
+        An existing report is reused when its data fingerprint still matches;
+        it is only regenerated when the underlying doses changed (or force=True).
+        """
         end_date = timezone.now().date()
         start_date = end_date - timedelta(days=days)
         
-        # Calculate statistics
-        total_intakes = MedicationIntake.objects.filter(
-            prescription__patient=patient,
+        with transaction.atomic():
+            # Serialise concurrent requests for the same patient so double clicks cannot race.
+            # A no-op UPDATE, not select_for_update(): SQLite ignores FOR UPDATE, but
+            # a write as the first statement holds its write lock until commit.
+            User.objects.filter(pk=patient.pk).update(id=F('id'))
+            fingerprint = self.data_fingerprint(patient, start_date, end_date)
+            
+            if not force:
+                existing = self.existing_reports(
+                    patient, report_type, start_date, end_date
+                ).filter(data_fingerprint=fingerprint).first()
+                if existing:
+                    self.record_cache_result('hit')
+                    existing.reused = True
+                    return existing
+            
+            self.record_cache_result('miss')
+            with REPORT_BUILD_SECONDS.time(report_type=report_type):
+                report = self.build_report(patient, report_type, start_date, end_date, fingerprint)
+            report.reused = False
+            return report
+    
+    def data_fingerprint(self, patient, start_date, end_date):
+        """Digest of the rollup counters and their latest update time for the period"""
+        state = self.period_rollups(patient, start_date, end_date).aggregate(
+            rows=Count('id'),
+            scheduled=Sum('scheduled_count'),
+            taken=Sum('taken_count'),
+            missed=Sum('missed_count'),
+            skipped=Sum('skipped_count'),
+            updated=Max('updated_at'),
+        )
+        raw = '|'.join(str(state[key]) for key in sorted(state))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def existing_reports(self, patient, report_type, start_date, end_date):
+        """Stored reports of this type and period that have a PDF"""
+        return ProgressReport.objects.filter(
+            patient=patient,
+            report_type=report_type,
+            report_period_start=start_date,
+            report_period_end=end_date
+        ).exclude(pdf_file='')
+    
+    def period_rollups(self, patient, start_date, end_date):
+        return DailyComplianceRollup.objects.filter(
+            patient=patient,
+            date__range=(start_date, end_date)
+        )
+    
+    def period_intakes(self, patient, start_date, end_date):
+        """Recorded (taken, missed or skipped) doses in the period"""
+        return MedicationIntake.objects.filter(
+            patient=patient,
             scheduled_datetime__date__range=(start_date, end_date),
             status__in=['taken', 'missed', 'skipped']
-        )
-        
-        taken_count = total_intakes.filter(status='taken').count()
-        missed_count = total_intakes.filter(status='missed').count()
-        total_count = total_intakes.count()
+        ).select_related('prescription__medication')
+    
+    def record_cache_result(self, result):
+        REPORTS_REQUESTED.inc(result=result)
+        key = f"reports:generation:{result}"
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    
+    def cache_stats(self):
+        """Hit/miss counts for report generation since the cache was last cleared"""
+        counts = cache.get_many(['reports:generation:hit', 'reports:generation:miss'])
+        hits = counts.get('reports:generation:hit', 0)
+        misses = counts.get('reports:generation:miss', 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total * 100, 1) if total else 0,
+        }
+    
+    def build_report(self, patient, report_type, start_date, end_date, fingerprint=''):
+        """Compute statistics, create the report record and its PDF"""
+        # Statistics come from the daily rollups: O(days) rows instead of O(doses).
+        # Like the fingerprint they must match, they are read from the primary:
+        # a lagging replica could miss a dose recorded just before the request.
+        summary = compliance_rollups.summary(patient, start_date, end_date)
         
-        compliance_rate = (taken_count / total_count * 100) if total_count > 0 else 0
+        total_intakes = self.period_intakes(patient, start_date, end_date)
         
         # Generate report content
-        content = self.create_report_content(patient, start_date, end_date, total_intakes)
+        content = self.create_report_content(patient, start_date, end_date, total_intakes, summary)
+        taken_count = summary['taken_count']
+        missed_count = summary['missed_count']
+        total_count = summary['recorded_count']
+        compliance_rate = summary['compliance_rate']
         
         # Create report record
         report = ProgressReport.objects.create(
@@ -56,26 +151,18 @@ class ReportGenerator:
             missed_medications=missed_count,
             report_period_start=start_date,
             report_period_end=end_date,
-            generated_by=patient  # In real scenario, this would be the admin generating the report
+            generated_by=patient,  # In real scenario, this would be the admin generating the report
+            data_fingerprint=fingerprint
         )
         
-        # Generate PDF
+        # Generate PDF and store it once under its content hash
         pdf_buffer = self.create_pdf_report(report)
-        
-        # Save PDF file
-        pdf_filename = f"report_{patient.id}_{report.id}.pdf"
-        pdf_path = os.path.join(settings.MEDIA_ROOT, 'reports', pdf_filename)
-        os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
-        
-        with open(pdf_path, 'wb') as f:
-            f.write(pdf_buffer.getvalue())
-        
-        report.pdf_file = f"reports/{pdf_filename}"
-        report.save()
+        report.pdf_file = report_blob_store.save(pdf_buffer.getvalue())
+        report.save(update_fields=['pdf_file'])
         
         return report
     
-    def create_report_content(self, patient, start_date, end_date, intakes):
+    def create_report_content(self, patient, start_date, end_date, intakes, summary):
         """Create detailed report content"""
         content = f"""
         Patient Progress Report
@@ -85,10 +172,10 @@ class ReportGenerator:
         Report Period: {start_date} to {end_date}
         
         MEDICATION COMPLIANCE SUMMARY:
-        - Total Medications Scheduled: {intakes.count()}
-        - Medications Taken: {intakes.filter(status='taken').count()}
-        - Medications Missed: {intakes.filter(status='missed').count()}
-        - Medications Skipped: {intakes.filter(status='skipped').count()}
+        - Total Medications Scheduled: {summary['recorded_count']}
+        - Medications Taken: {summary['taken_count']}
+        - Medications Missed: {summary['missed_count']}
+        - Medications Skipped: {summary['skipped_count']}
         
         DETAILED MEDICATION HISTORY:
         """
@@ -107,7 +194,8 @@ class ReportGenerator:
     def create_pdf_report(self, report):
         """Create PDF version of the report"""
         buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        # invariant output: unchanged reports render byte-identical and share a blob
+        doc = SimpleDocTemplate(buffer, pagesize=A4, invariant=1)
         story = []
         
         # Title
@@ -120,7 +208,7 @@ class ReportGenerator:
             ['Patient Name:', report.patient.get_full_name()],
             ['Medical Record:', report.patient.medical_record_number or 'N/A'],
             ['Report Period:', f"{report.report_period_start} to {report.report_period_end}"],
-            ['Generated On:', report.created_at.strftime('%Y-%m-%d %H:%M')],
+            ['Generated On:', report.created_at.strftime('%Y-%m-%d')],
         ]
         
         patient_table = Table(patient_info, colWidths=[2*inch, 4*inch])
@@ -0,0 +1,96 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from hospital_system.cache_versions import bump
+from medications.models import Medication, MedicationFeedback, MedicationIntake, Prescription
+from medications.signals import stored_intake
+from .counters import dashboard_counters, tracked_fields, User
+from .rollups import compliance_rollups
+
+
+def _rollup_state(intake):
+    status = intake['status'] if isinstance(intake, dict) else intake.status
+    return (compliance_rollups.intake_key(intake), status)
+
+
+# The previous state of an intake comes from the snapshot medications.signals
+# takes before every save, so these receivers run no queries of their own
+
+@receiver(post_save, sender=MedicationIntake)
+def update_rollup_on_intake_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    stored = None if created else stored_intake(instance)
+    compliance_rollups.record_intake_change(stored and _rollup_state(stored), _rollup_state(instance))
+
+
+@receiver(post_delete, sender=MedicationIntake)
+def update_rollup_on_intake_delete(sender, instance, **kwargs):
+    compliance_rollups.record_intake_change(_rollup_state(instance), None)
+
+
+def _counter_state(instance):
+    return {field: getattr(instance, field) for field in tracked_fields(type(instance))}
+
+
+def remember_counter_state(sender, instance, raw=False, **kwargs):
+    """Capture the stored field values the dashboard counters depend on"""
+    instance._counter_previous = None
+    if raw or instance._state.adding:
+        return
+    instance._counter_previous = sender.objects.filter(pk=instance.pk).values(*tracked_fields(sender)).first()
+
+
+def previous_counter_state(sender, instance):
+    if sender is MedicationIntake:
+        stored = stored_intake(instance)
+        return stored and {field: stored[field] for field in tracked_fields(sender)}
+    return getattr(instance, '_counter_previous', None)
+
+
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else previous_counter_state(sender, instance)
+    dashboard_counters.record_change(sender, previous, _counter_state(instance))
+
+
+def update_counters_on_delete(sender, instance, **kwargs):
+    dashboard_counters.record_change(sender, _counter_state(instance), None)
+
+
+for counted_model in (User, Prescription, MedicationIntake):
+    if counted_model is not MedicationIntake:
+        pre_save.connect(remember_counter_state, sender=counted_model, dispatch_uid=f"counters_pre_save_{counted_model._meta.label}")
+    post_save.connect(update_counters_on_save, sender=counted_model, dispatch_uid=f"counters_post_save_{counted_model._meta.label}")
+    post_delete.connect(update_counters_on_delete, sender=counted_model, dispatch_uid=f"counters_post_delete_{counted_model._meta.label}")
+
+
+# Fragment cache versions: patient pages are keyed on 'patient:<id>', the admin
+# dashboard's recent prescriptions on 'prescriptions', medication names on 'medications',
+# the feedback inbox counts on 'feedback'
+
+@receiver([post_save, post_delete], sender=MedicationIntake)
+def bump_intake_versions(sender, instance, **kwargs):
+    bump(f"patient:{instance.patient_id}")
+
+
+@receiver([post_save, post_delete], sender=Prescription)
+def bump_prescription_versions(sender, instance, **kwargs):
+    bump(f"patient:{instance.patient_id}", 'prescriptions')
+
+
+@receiver([post_save, post_delete], sender=Medication)
+def bump_medication_versions(sender, instance, **kwargs):
+    bump('medications')
+
+
+@receiver([post_save, post_delete], sender=User)
+def bump_user_versions(sender, instance, **kwargs):
+    if instance.user_type == 'patient':
+        bump(f"patient:{instance.pk}", 'prescriptions')
+
+
+@receiver([post_save, post_delete], sender=MedicationFeedback)
+def bump_feedback_versions(sender, instance, **kwargs):
+    bump('feedback')
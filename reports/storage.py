@@ -0,0 +1,171 @@
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from datetime import timedelta
+import gzip
+import hashlib
+import logging
+import os
+import posixpath
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+from .models import ProgressReport
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_SUFFIXES = {
+    'none': '',
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+
+class ReportBlobStore:
+    """Content-addressed store for rendered report PDFs.
+
+    Each PDF is stored once under its SHA-256 digest, sharded two levels deep
+    (``reports/blobs/ab/cd/<digest>.pdf[.gz|.zst]``) so no directory grows past
+    a few hundred entries. Reports with identical output share one blob.
+    """
+
+    root = 'reports/blobs'
+
+    def __init__(self, storage=None, compression=None):
+        self.storage = storage or default_storage
+        self.compression = compression or getattr(settings, 'REPORT_BLOB_COMPRESSION', 'gzip')
+        if self.compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown report blob compression '{self.compression}'")
+        if self.compression == 'zstd' and zstandard is None:
+            logger.warning("zstandard is not installed, falling back to gzip for report blobs")
+            self.compression = 'gzip'
+
+    def blob_name(self, digest):
+        suffix = COMPRESSION_SUFFIXES[self.compression]
+        return posixpath.join(self.root, digest[:2], digest[2:4], f"{digest}.pdf{suffix}")
+
+    def find_existing(self, digest):
+        """Return the stored name for a digest under any compression, if present"""
+        for suffix in COMPRESSION_SUFFIXES.values():
+            name = posixpath.join(self.root, digest[:2], digest[2:4], f"{digest}.pdf{suffix}")
+            if self.storage.exists(name):
+                return name
+        return None
+
+    def compress(self, data):
+        if self.compression == 'gzip':
+            return gzip.compress(data, mtime=0)
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return data
+
+    def decompress(self, name, data):
+        if name.endswith('.gz'):
+            return gzip.decompress(data)
+        if name.endswith('.zst'):
+            if zstandard is None:
+                raise RuntimeError(f"zstandard is required to read {name}")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return data
+
+    def save(self, pdf_bytes):
+        """Store PDF bytes and return the blob name; existing content is reused"""
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        existing = self.find_existing(digest)
+        if existing:
+            # Restart its grace period so a prune already under way keeps it
+            self.touch(existing)
+            return existing
+
+        name = self.blob_name(digest)
+        saved_name = self.storage.save(name, ContentFile(self.compress(pdf_bytes)))
+        if saved_name != name:
+            # Another worker stored the same digest concurrently; keep theirs
+            self.storage.delete(saved_name)
+        return name
+
+    def touch(self, name):
+        try:
+            path = self.storage.path(name)
+        except NotImplementedError:
+            # Remote storages cannot set a file's time; prune re-checks references instead
+            return
+        os.utime(path)
+
+    def read(self, name):
+        """Return the PDF bytes for a stored name (blob or legacy per-report file)"""
+        with self.storage.open(name, 'rb') as f:
+            return self.decompress(name, f.read())
+
+    def iter_blob_names(self):
+        # listdir() returns (directories, files)
+        shards, _ = self.storage.listdir(self.root) if self.storage.exists(self.root) else ([], [])
+        for shard in shards:
+            subshards, _ = self.storage.listdir(posixpath.join(self.root, shard))
+            for subshard in subshards:
+                directory = posixpath.join(self.root, shard, subshard)
+                _, files = self.storage.listdir(directory)
+                for filename in files:
+                    yield posixpath.join(directory, filename)
+
+    def prune_unreferenced(self, grace=timedelta(hours=1), dry_run=False):
+        """Delete blobs no report points at; blobs younger than `grace` are kept
+        so a report being generated right now never loses its file."""
+        referenced = set(
+            ProgressReport.objects.exclude(pdf_file='').exclude(pdf_file__isnull=True)
+            .values_list('pdf_file', flat=True)
+        )
+        cutoff = timezone.now() - grace
+        removed = 0
+        for name in self.iter_blob_names():
+            if name in referenced or self.storage.get_modified_time(name) > cutoff:
+                continue
+            # `referenced` may be stale by now: save() can have reused this blob since
+            if self.storage.get_modified_time(name) > cutoff or ProgressReport.objects.filter(pdf_file=name).exists():
+                continue
+            if not dry_run:
+                self.storage.delete(name)
+            removed += 1
+        logger.info(f"Pruned {removed} unreferenced report blobs")
+        return removed
+
+    def expire_reports(self, retention_days=None, dry_run=False):
+        """Delete reports older than the per-type retention window (None keeps forever)"""
+        retention_days = retention_days or getattr(settings, 'REPORT_RETENTION_DAYS', {})
+        expired = 0
+        for report_type, days in retention_days.items():
+            if days is None:
+                continue
+            reports = ProgressReport.objects.filter(
+                report_type=report_type,
+                created_at__lt=timezone.now() - timedelta(days=days)
+            )
+            expired += reports.count() if dry_run else reports.delete()[1].get(ProgressReport._meta.label, 0)
+        logger.info(f"Expired {expired} progress reports")
+        return expired
+
+    def adopt_legacy_files(self, dry_run=False):
+        """Move per-report PDFs written before the blob store into it"""
+        adopted = 0
+        legacy = ProgressReport.objects.exclude(pdf_file='').exclude(pdf_file__isnull=True).exclude(
+            pdf_file__startswith=self.root + '/'
+        )
+        for report in legacy.iterator():
+            old_name = report.pdf_file.name
+            if not self.storage.exists(old_name):
+                continue
+            if not dry_run:
+                new_name = self.save(self.read(old_name))
+                ProgressReport.objects.filter(pk=report.pk).update(pdf_file=new_name)
+                if not ProgressReport.objects.filter(pdf_file=old_name).exists():
+                    self.storage.delete(old_name)
+            adopted += 1
+        logger.info(f"Moved {adopted} legacy report PDFs into the blob store")
+        return adopted
+
+# Initialize the blob store
+report_blob_store = ReportBlobStore()
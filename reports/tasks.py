@@ -0,0 +1,24 @@
+from celery import shared_task
+import logging
+
+from .archive import ARCHIVE_DATASETS, history_archiver
+from .counters import dashboard_counters
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def advance_dashboard_counters():
+    """Count doses that became overdue since the last run"""
+    dashboard_counters.advance()
+
+@shared_task
+def reconcile_dashboard_counters():
+    """Recount the dashboard counters to correct drift from bulk updates"""
+    drift = dashboard_counters.reconcile()
+    logger.info(f"Reconciled dashboard counters: {drift}")
+
+@shared_task
+def archive_history():
+    """Move history older than ARCHIVE_HORIZON_DAYS out of the hot tables"""
+    for dataset in ARCHIVE_DATASETS:
+        history_archiver.archive(dataset)
@@ -0,0 +1,14 @@
+from django import template
+from django.utils import timezone
+from datetime import timedelta
+
+from reports.rollups import compliance_rollups
+
+register = template.Library()
+
+
+@register.simple_tag
+def patient_compliance_rate(patient, days=None):
+    """Compliance percentage for a patient read from the daily rollups"""
+    start_date = timezone.now().date() - timedelta(days=days) if days else None
+    return compliance_rollups.compliance_rate(patient, start_date=start_date)
@@ -0,0 +1,11 @@
+from django import template
+
+from reports.counters import dashboard_counters
+
+register = template.Library()
+
+
+@register.simple_tag
+def dashboard_stats():
+    """Admin dashboard figures read from the signal-maintained counters"""
+    return dashboard_counters.get_all()
@@ -0,0 +1,45 @@
+from django import template
+
+from hospital_system.cache_versions import get_version
+from medications.models import MedicationIntake, Prescription
+
+register = template.Library()
+
+
+@register.simple_tag
+def data_version(*scopes):
+    """Version string to key a {% cache %} fragment on, e.g. {% data_version 'medications' as v %}"""
+    return get_version(*[str(scope) for scope in scopes])
+
+
+@register.simple_tag
+def patient_version(patient):
+    return get_version(f"patient:{patient.pk}", 'medications')
+
+
+# The querysets below only run on a fragment cache miss
+
+@register.simple_tag
+def patient_active_prescriptions(patient):
+    return list(
+        Prescription.objects.filter(patient=patient, is_active=True)
+        .select_related('medication')
+        .order_by('-created_at')
+    )
+
+
+@register.simple_tag
+def patient_recent_intakes(patient, limit=20):
+    return list(
+        MedicationIntake.objects.filter(patient=patient)
+        .select_related('prescription__medication')
+        .order_by('-scheduled_datetime')[:limit]
+    )
+
+
+@register.simple_tag
+def recent_prescriptions(limit=10):
+    return list(
+        Prescription.objects.select_related('patient', 'medication')
+        .order_by('-created_at')[:limit]
+    )
@@ -0,0 +1,143 @@
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from unittest import mock
+import os
+import shutil
+import tempfile
+import time
+
+from accounts.models import User
+from medications.models import Medication, MedicationIntake, Prescription
+from .analytics import CohortAnalytics, STATUS_CODES
+from .exports import history_exporter
+from .models import ArchiveSegment, DailyComplianceRollup
+from .query_plans import check, seed
+from .rollups import compliance_rollups
+from .services import ReportGenerator
+from .storage import ReportBlobStore
+
+
+def create_prescription(username='reports-patient'):
+    patient = User.objects.create(username=username, user_type='patient')
+    return Prescription.objects.create(
+        patient=patient, medication=Medication.objects.create(name='Reports test'),
+        prescribing_physician='Dr. Test', dosage='1 tablet', frequency='once_daily',
+        start_date=timezone.now().date() - timedelta(days=60), created_by=patient,
+    )
+
+
+class RollupRebuildTests(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.prescription = create_prescription()
+        ArchiveSegment.objects.create(dataset='intakes', period_start=self.today - timedelta(days=40),
+                                      period_end=self.today - timedelta(days=10), name='segment')
+        self.archived = DailyComplianceRollup.objects.create(
+            patient=self.prescription.patient, prescription=self.prescription, date=self.today - timedelta(days=20),
+            scheduled_count=3, taken_count=2, missed_count=1,
+        )
+
+    def test_rebuild_keeps_rollups_of_archived_days(self):
+        compliance_rollups.rebuild(self.today - timedelta(days=30), self.today)
+        self.archived.refresh_from_db()
+        self.assertEqual((self.archived.scheduled_count, self.archived.taken_count), (3, 2))
+
+    def test_rebuild_of_archived_days_only_does_nothing(self):
+        self.assertEqual(compliance_rollups.rebuild(self.today - timedelta(days=30), self.today - timedelta(days=15)), 0)
+        self.assertTrue(DailyComplianceRollup.objects.filter(pk=self.archived.pk).exists())
+
+
+class ReportBlobStoreTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = ReportBlobStore(storage=FileSystemStorage(location=self.directory), compression='gzip')
+
+    def age(self, name, hours=2):
+        old = time.time() - hours * 3600
+        os.utime(self.store.storage.path(name), (old, old))
+
+    def test_prune_removes_old_unreferenced_blobs(self):
+        name = self.store.save(b'%PDF unreferenced')
+        self.age(name)
+        self.assertEqual(self.store.prune_unreferenced(), 1)
+        self.assertFalse(self.store.storage.exists(name))
+
+    def test_reusing_an_old_blob_restarts_its_grace_period(self):
+        name = self.store.save(b'%PDF shared')
+        self.age(name)
+        self.assertEqual(self.store.save(b'%PDF shared'), name)
+        self.assertEqual(self.store.prune_unreferenced(), 0)
+        self.assertTrue(self.store.storage.exists(name))
+
+
+class ReportReuseTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        media_root = override_settings(MEDIA_ROOT=media)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.patient = create_prescription().patient
+        self.generator = ReportGenerator()
+
+    def test_unchanged_report_is_reused(self):
+        first = self.generator.generate_patient_progress_report(self.patient)
+        second = self.generator.generate_patient_progress_report(self.patient)
+        self.assertFalse(first.reused)
+        self.assertTrue(second.reused)
+        self.assertEqual(first.pk, second.pk)
+
+    def test_fingerprint_and_statistics_are_read_from_the_primary(self):
+        # A configured replica that does not exist fails any read routed to it
+        with mock.patch('hospital_system.routers.replica_configured', return_value=True):
+            report = self.generator.generate_patient_progress_report(self.patient)
+        self.assertFalse(report.reused)
+
+    def test_generation_starts_with_a_write_lock_on_the_patient(self):
+        # SQLite ignores SELECT ... FOR UPDATE; only a write serialises generations
+        with CaptureQueriesContext(connection) as queries:
+            self.generator.generate_patient_progress_report(self.patient)
+        statements = [query['sql'] for query in queries if not query['sql'].upper().startswith(('SAVEPOINT', 'BEGIN'))]
+        self.assertTrue(statements[0].startswith('UPDATE "accounts_user"'), statements[0])
+
+
+class CohortAnalyticsTests(TestCase):
+    def test_columns_are_loaded_across_chunks(self):
+        prescription = create_prescription()
+        now = timezone.now()
+        statuses = ['taken', 'missed', 'taken', 'skipped', 'pending']
+        for i, status in enumerate(statuses):
+            MedicationIntake.objects.create(prescription=prescription, scheduled_datetime=now - timedelta(hours=i + 1),
+                                            status=status)
+        analytics = CohortAnalytics()
+        analytics.chunk_size = 2
+        columns = analytics.load_columns(now.date() - timedelta(days=1), now.date())
+        self.assertEqual(sorted(columns['status'].tolist()), sorted(STATUS_CODES[status] for status in statuses))
+        self.assertEqual(columns['prescription_keys'], [prescription.pk])
+        result = analytics.aggregate(columns, analytics.load_dimensions(columns['prescription_keys']))
+        self.assertEqual((result['overall']['taken'], result['overall']['missed']), (2, 1))
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = seed(patients=200, days=7, notifications=2000)
+
+    def test_hot_queries_use_indexes(self):
+        for query, plan, scans in check(self.patient):
+            with self.subTest(query=query.name):
+                self.assertEqual(scans, [], plan)
+
+
+class HistoryExportTests(TestCase):
+    def test_read_alias_is_resolved_before_streaming(self):
+        today = timezone.now().date()
+        with mock.patch('reports.exports.read_alias', return_value='default') as read_alias:
+            chunks = history_exporter.stream('intakes', 'csv', today - timedelta(days=1), today)
+            read_alias.assert_called_once_with()
+        self.assertTrue(b''.join(chunks).startswith(b'id,'))
@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from datetime import timedelta
+import hashlib
+
+from .models import DailyComplianceRollup
+from .rollups import COUNTER_FIELDS
+
+# Granularity -> truncation applied to the daily rollup date (None keeps the daily buckets)
+GRANULARITIES = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+class ComplianceTrendService:
+    """Compliance time series served from the incrementally maintained daily rollups.
+
+    Day buckets are read as stored; week and month buckets are summed from at
+    most one row per day and prescription, so a one-year series never touches
+    the intake table.
+    """
+
+    cache_timeout = 60 * 60
+
+    def buckets(self, patient, start_date, end_date, prescription_id=None):
+        rollups = DailyComplianceRollup.objects.filter(
+            patient=patient,
+            date__range=(start_date, end_date)
+        )
+        if prescription_id is not None:
+            rollups = rollups.filter(prescription_id=prescription_id)
+        return rollups
+
+    def version(self, patient, start_date, end_date, granularity, prescription_id=None):
+        """ETag value for a series; changes whenever a dose in range is added or updated"""
+        state = self.buckets(patient, start_date, end_date, prescription_id).aggregate(
+            rows=Count('id'),
+            scheduled=Sum('scheduled_count'),
+            updated=Max('updated_at'),
+        )
+        raw = '|'.join(str(part) for part in (
+            patient.pk, prescription_id, granularity, start_date, end_date,
+            state['rows'], state['scheduled'], state['updated'],
+        ))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+    def series(self, patient, start_date, end_date, granularity='day', prescription_id=None):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}'")
+
+        rollups = self.buckets(patient, start_date, end_date, prescription_id)
+        trunc = GRANULARITIES[granularity]
+        period = trunc('date') if trunc else F('date')
+        rows = rollups.annotate(period=period).values('period').annotate(
+            **{field: Sum(field) for field in COUNTER_FIELDS}
+        ).order_by('period')
+
+        points = []
+        for row in rows:
+            recorded = row['taken_count'] + row['missed_count'] + row['skipped_count']
+            points.append({
+                'period': row['period'],
+                'scheduled': row['scheduled_count'],
+                'taken': row['taken_count'],
+                'missed': row['missed_count'],
+                'skipped': row['skipped_count'],
+                'compliance_rate': round(row['taken_count'] / recorded * 100, 1) if recorded else None,
+            })
+        return points
+
+    def period(self, days=365):
+        end_date = timezone.now().date()
+        return end_date - timedelta(days=days), end_date
+
+    def get(self, patient, start_date, end_date, granularity='day', prescription_id=None, version=None):
+        """Return the series payload, cached under its version so it is built once per change"""
+        version = version or self.version(patient, start_date, end_date, granularity, prescription_id)
+        return cache.get_or_set(
+            f"reports:compliance_trend:{version}",
+            lambda: {
+                'patient_id': patient.pk,
+                'prescription_id': prescription_id,
+                'granularity': granularity,
+                'start_date': start_date,
+                'end_date': end_date,
+                'points': self.series(patient, start_date, end_date, granularity, prescription_id),
+            },
+            self.cache_timeout
+        )
+
+# Initialize the trend service
+compliance_trends = ComplianceTrendService()
@@ -7,4 +7,7 @@ urlpatterns = [
     path('', views.ReportListView.as_view(), name='report_list'),
     path('generate/<int:patient_id>/', views.generate_patient_report, name='generate_report'),
     path('download/<uuid:report_id>/', views.download_report_pdf, name='download_pdf'),
+    path('export/', views.export_history, name='export_history'),
+    path('analytics/', views.cohort_analytics_view, name='cohort_analytics'),
+    path('api/trend/<int:patient_id>/', views.compliance_trend_api, name='compliance_trend'),
 ]
\ No newline at end of file
@@ -2,14 +2,21 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import ListView
-from django.http import HttpResponse, Http404
+from django.http import HttpResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.contrib.auth import get_user_model
-from datetime import timedelta
+from datetime import datetime, timedelta
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+import uuid
 
+from monitoring.budgets import query_budget
 from .models import ProgressReport
 from .services import report_generator
+from .exports import history_exporter, EXPORT_DATASETS, EXPORT_FORMATS
+from .analytics import cohort_analytics
+from .storage import report_blob_store
+from .trends import compliance_trends, GRANULARITIES
 
 User = get_user_model()
 
@@ -18,17 +25,24 @@ class ReportListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
     template_name = 'reports/report_list.html'
     context_object_name = 'reports'
     paginate_by = 20
+    query_budget = 6
     
     def test_func(self):
         return self.request.user.can_manage_patients or self.request.user.is_patient
     
     def get_queryset(self):
         if self.request.user.can_manage_patients:
-            return ProgressReport.objects.all().order_by('-created_at')
+            return ProgressReport.objects.select_related('patient').order_by('-created_at')
         else:
             return ProgressReport.objects.filter(
                 patient=self.request.user
             ).order_by('-created_at')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.request.user.can_manage_patients:
+            context['generation_stats'] = report_generator.cache_stats()
+        return context
 
 @login_required
 def generate_patient_report(request, patient_id):
@@ -38,19 +52,23 @@ def generate_patient_report(request, patient_id):
     
     patient = get_object_or_404(User, id=patient_id, user_type='patient')
     
-    # Generate weekly report by default
+    # Generate weekly report by default; an unchanged report is reused instead of rebuilt
     report = report_generator.generate_patient_progress_report(
         patient=patient,
         report_type='weekly_summary',
-        days=7
+        days=7,
+        force=request.GET.get('force') == '1'
     )
     
-    messages.success(request, f"Progress report generated for {patient.get_full_name()}")
+    if report.reused:
+        messages.info(request, f"No new doses since the last report for {patient.get_full_name()}; showing the existing report")
+    else:
+        messages.success(request, f"Progress report generated for {patient.get_full_name()}")
     return redirect('reports:report_list')
 
 @login_required
 def download_report_pdf(request, report_id):
-    report = get_object_or_404(ProgressReport, id=report_id)
+    report = get_object_or_404(ProgressReport, public_id=report_id)
     
     # Check permissions
     if not (request.user.can_manage_patients or request.user == report.patient):
@@ -61,10 +79,99 @@ def download_report_pdf(request, report_id):
         return redirect('reports:report_list')
     
     try:
-        with open(report.pdf_file.path, 'rb') as pdf_file:
-            response = HttpResponse(pdf_file.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{report.title}.pdf"'
-            return response
+        response = HttpResponse(report_blob_store.read(report.pdf_file.name), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{report.title}.pdf"'
+        return response
     except FileNotFoundError:
         messages.error(request, "PDF file not found")
-        return redirect('reports:report_list')
\ No newline at end of file
+        return redirect('reports:report_list')
+
+@login_required
+def export_history(request):
+    """Stream intake or schedule history for a date range as CSV/NDJSON"""
+    if not request.user.can_manage_patients:
+        messages.error(request, "Access denied.")
+        return redirect('medications:dashboard')
+    
+    dataset = request.GET.get('dataset', 'intakes')
+    fmt = request.GET.get('format', 'csv')
+    compress = request.GET.get('gzip') in ('1', 'true', 'yes')
+    
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+        messages.error(request, "Unknown export dataset or format")
+        return redirect('reports:report_list')
+    
+    try:
+        end_date = datetime.strptime(request.GET['end'], '%Y-%m-%d').date() if request.GET.get('end') else timezone.now().date()
+        start_date = datetime.strptime(request.GET['start'], '%Y-%m-%d').date() if request.GET.get('start') else end_date - timedelta(days=30)
+    except ValueError:
+        messages.error(request, "Dates must be in YYYY-MM-DD format")
+        return redirect('reports:report_list')
+    
+    response = StreamingHttpResponse(
+        history_exporter.stream(dataset, fmt, start_date, end_date, compress=compress),
+        content_type='application/gzip' if compress else EXPORT_FORMATS[fmt]
+    )
+    filename = history_exporter.filename(dataset, fmt, start_date, end_date, compress=compress)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@query_budget(6)
+@login_required
+def cohort_analytics_view(request):
+    """Adherence across all patients by medication, physician, priority and hour"""
+    if not request.user.can_manage_patients:
+        messages.error(request, "Access denied.")
+        return redirect('medications:dashboard')
+    
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), 365)
+    except ValueError:
+        days = 30
+    
+    analytics = cohort_analytics.get(days=days, refresh=request.GET.get('refresh') == '1')
+    return render(request, 'reports/cohort_analytics.html', {
+        'analytics': analytics,
+        'days': days,
+        'sections': [
+            ('Medication', analytics.get('by_medication', [])),
+            ('Prescribing Physician', analytics.get('by_physician', [])),
+            ('Priority', analytics.get('by_priority', [])),
+            ('Hour of Day', analytics.get('by_hour', [])),
+        ],
+    })
+
+
+@query_budget(7)
+@login_required
+def compliance_trend_api(request, patient_id):
+    """Compliance series for a patient (optionally one prescription) by day, week or month"""
+    patient = get_object_or_404(User, id=patient_id, user_type='patient')
+    if not (request.user.can_manage_patients or request.user == patient):
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    granularity = request.GET.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return JsonResponse({'error': f"granularity must be one of {', '.join(GRANULARITIES)}"}, status=400)
+    try:
+        days = min(max(int(request.GET.get('days', 365)), 1), 730)
+        prescription_id = uuid.UUID(request.GET['prescription']) if request.GET.get('prescription') else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid days or prescription'}, status=400)
+    
+    # A single aggregate over the rollups decides whether the client copy is still current
+    start_date, end_date = compliance_trends.period(days)
+    etag = f'"{compliance_trends.version(patient, start_date, end_date, granularity, prescription_id)}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is None:
+        payload = compliance_trends.get(
+            patient, start_date, end_date, granularity, prescription_id, version=etag.strip('"')
+        )
+        response = JsonResponse(payload)
+    else:
+        response = not_modified
+    
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response